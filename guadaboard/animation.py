@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the animations of the pieces between two consecutive boards: the
+moved pieces slide to their new square, and the captured ones shrink until
+they disappear.
+
+The frames are drawn over the surface of the board with the sprites of the
+boards, and only the squares involved are redrawn. The position of the
+pieces is computed from the time elapsed since the animation started, so
+it goes on at the same speed whatever the frame rate is.
+"""
+
+import pygame
+
+#Event of the timer of the frames
+ANIMATION_EVENT = pygame.USEREVENT + 3
+
+#Duration of an animation, in milliseconds
+__default_duration__ = 400
+#Period of the timer of the frames, in milliseconds, for 60 frames per second
+FRAME_PERIOD = 1000 / 60
+
+
+def _get_team(value):
+    """
+    Returns the team of a value of the board, or 0 if it's empty
+    """
+    if value == 0:
+        return 0
+    return value / abs(value)
+
+
+def _are_adjacent(square_a, square_b):
+    """
+    Checks if two squares are next to each other
+    """
+    return abs(square_a[0] - square_b[0]) + \
+        abs(square_a[1] - square_b[1]) == 1
+
+
+def get_moves(previous, actual):
+    """
+    Returns the pieces moved and captured between two board.Board. The
+    result is a pair: the list of moves as (source, destination) and the
+    list of squares whose piece was captured. Squares are (row, column)
+    pairs of the board_state of the boards.
+
+    If both boards have the identifiers of the pieces, they are used to
+    follow the pieces. Otherwise, the moves are guessed from the squares
+    that changed.
+    """
+    prev_state = previous.board_state
+    state = actual.board_state
+    size = len(state)
+
+    changed = []
+    for i in range(size):
+        for j in range(size):
+            if not prev_state[i][j] == state[i][j]:
+                changed.append((i, j))
+
+    moves = []
+    prev_ids = getattr(previous, 'identifiers', None)
+    ids = getattr(actual, 'identifiers', None)
+    if not (prev_ids == None or ids == None):
+        destinations = {}
+        for i, j in changed:
+            if not state[i][j] == 0:
+                destinations[ids[i][j]] = (i, j)
+        for i, j in changed:
+            if not prev_state[i][j] == 0:
+                dest = destinations.get(prev_ids[i][j])
+                if not (dest == None or dest == (i, j)):
+                    moves.append(((i, j), dest))
+    else:
+        for source in changed:
+            team = _get_team(prev_state[source[0]][source[1]])
+            if team == 0 or _get_team(state[source[0]][source[1]]) == team:
+                continue
+            for dest in changed:
+                if _are_adjacent(source, dest) and \
+                        _get_team(state[dest[0]][dest[1]]) == team and \
+                        not _get_team(prev_state[dest[0]][dest[1]]) == team:
+                    moves.append((source, dest))
+                    break
+
+    sources = [move[0] for move in moves]
+    captured = []
+    for i, j in changed:
+        team = _get_team(prev_state[i][j])
+        if not (team == 0 or (i, j) in sources or
+                _get_team(state[i][j]) == team):
+            captured.append((i, j))
+
+    return moves, captured
+
+
+class Animation(object):
+    """
+    Class that animates the change between two consecutive boards on the
+    surface where the first one is drawn
+    """
+    def __init__(self, previous, actual, surface,
+                 duration=__default_duration__):
+        """
+        Keywords arguments:
+        previous -- The board.Board drawn on the surface
+        actual -- The board.Board drawn when the animation finishes
+        surface -- The surface of the board
+        duration -- Duration of the animation, in milliseconds
+        """
+        self.previous = previous
+        self.actual = actual
+        self.surface = surface
+        self.duration = duration
+        self.moves, self.captured = get_moves(previous, actual)
+
+        self.squares = list(self.captured)
+        for source, dest in self.moves:
+            for square in (source, dest):
+                if not square in self.squares:
+                    self.squares.append(square)
+        self.start = pygame.time.get_ticks()
+        self.finished = False
+
+    def _get_position(self, square):
+        """
+        Returns the position of a square on the surface
+        """
+        piece_size = self.actual.piece_size
+        return (square[1] * piece_size, square[0] * piece_size)
+
+    def _get_sprite(self, square):
+        """
+        Returns the pair (atlas, area) of the piece of a square on the
+        previous board
+        """
+        return self.previous.keys[
+            self.previous.board_state[square[0]][square[1]]]
+
+    def step(self):
+        """
+        Draws the frame of the actual moment. Returns the list of rects of
+        the surface that have changed.
+        """
+        if self.finished:
+            return []
+        progress = (pygame.time.get_ticks() - self.start) / \
+            float(self.duration)
+        if progress >= 1 or not self.squares:
+            return self.finish()
+
+        piece_size = self.actual.piece_size
+        rects = []
+        empty_atlas, empty_area = self.actual.keys[0]
+        for square in self.squares:
+            rects.append(self.surface.blit(empty_atlas,
+                                           self._get_position(square),
+                                           empty_area))
+
+        side = int(piece_size * (1 - progress))
+        for square in self.captured:
+            if side > 0:
+                atlas, area = self._get_sprite(square)
+                sprite = pygame.transform.scale(atlas.subsurface(area),
+                                                (side, side))
+                pos_x, pos_y = self._get_position(square)
+                offset = (piece_size - side) / 2
+                self.surface.blit(sprite, (pos_x + offset, pos_y + offset))
+
+        for source, dest in self.moves:
+            atlas, area = self._get_sprite(source)
+            src_x, src_y = self._get_position(source)
+            dest_x, dest_y = self._get_position(dest)
+            position = (int(src_x + (dest_x - src_x) * progress),
+                        int(src_y + (dest_y - src_y) * progress))
+            self.surface.blit(atlas, position, area)
+
+        return rects
+
+    def finish(self):
+        """
+        Finishes the animation, drawing the actual board. Returns the list
+        of rects of the surface that have changed.
+        """
+        if self.finished:
+            return []
+        self.finished = True
+        return self.actual.draw_changes(self.surface, self.previous)
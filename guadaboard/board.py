@@ -27,6 +27,9 @@ import pygame
 
 import guadaboard.piece as piece
 
+#Colors of the squares of the thumbnails
+_thumbnail_colors = {0: (60, 60, 60), 1: (240, 140, 30), -1: (140, 70, 170)}
+
 
 class Board(object):
     """This class represents a complete board of the game.
@@ -67,8 +70,8 @@ class Board(object):
         self.board_size = board_size
         self.keys = {}
         self.pieces_rects = []
-        _piece = piece.Piece(0, 0, 60, img_path=default_piece)
-        self.keys[0] = _piece.get_surface().convert()
+        _piece = piece.Piece(0, 0, self.piece_size, img_path=default_piece)
+        self.keys[0] = _piece.get_sprite()
         self.value_max = value_max
         self.hidden = hidden
         if not identifiers == None:
@@ -83,9 +86,9 @@ class Board(object):
         print player
         self.player_team = player
 
-        # next loop will generate the surfaces of every different piece and
+        # next loop will get the sprites of every different piece and
         # store them on a dictionary. This way we can make an easy conversion
-        # from the piece value to its proper surface.
+        # from the piece value to its proper area of the sprites atlas.
         for i in range(board_size):
             for j in range(board_size):
                 if not state[i][j] in self.keys:
@@ -100,8 +103,8 @@ class Board(object):
                         value = value - value_max
                         covered = 1
                     _piece = piece.Piece(
-                        value, covered, 60, rhidde, images[team])
-                    self.keys[state[i][j]] = _piece.get_surface().convert()
+                        value, covered, self.piece_size, rhidde, images[team])
+                    self.keys[state[i][j]] = _piece.get_sprite()
         print 'termina board.Board()'
 
     def get_surface(self):
@@ -118,11 +121,29 @@ class Board(object):
             aux = []
             for j in range(self.board_size):
                 point = (j * self.piece_size, i * self.piece_size)
-                aux.append(surface.blit(self.keys[aux_board[i][j]], point))
+                atlas, area = self.keys[aux_board[i][j]]
+                aux.append(surface.blit(atlas, point, area))
             self.pieces_rects.append(aux)
 
         return surface
 
+    def draw_changes(self, surface, previous):
+        """
+        Draws on the surface of a previous board only the squares that are
+        different on this one. Returns the list of rects of the surface
+        that have changed.
+        """
+        rects = []
+        for i in range(self.board_size):
+            for j in range(self.board_size):
+                if not self.board_state[i][j] == previous.board_state[i][j]:
+                    point = (j * self.piece_size, i * self.piece_size)
+                    atlas, area = self.keys[self.board_state[i][j]]
+                    rects.append(surface.blit(atlas, point, area))
+        self.pieces_rects = previous.pieces_rects
+
+        return rects
+
     def check_collision(self, pos, offset=(0, 0)):
         """
         Check if a point collides with a piece
@@ -163,3 +184,28 @@ def _reverse_board(board):
             tmp_board[_number - (i + 1)][j] = board[i][j]
 
     return tmp_board
+
+
+def get_thumbnail(state, size):
+    """
+    Returns a small surface with a state of the board, where every piece is
+    a square of the color of its team. It doesn't use the sprites, so it
+    can be drawn out of the main thread.
+
+    Keywords arguments:
+    state -- The matrix of the board, like on Board
+    size -- Width and height of the thumbnail
+    """
+    board_state = _reverse_board(state)
+    _number = len(board_state)
+    square = size / _number
+    surface = pygame.Surface((square * _number, ) * 2)
+    for i in range(_number):
+        for j in range(_number):
+            value = board_state[i][j]
+            team = 0
+            if not value == 0:
+                team = value / abs(value)
+            surface.fill(_thumbnail_colors[team],
+                         (j * square, i * square, square - 1, square - 1))
+    return surface
@@ -21,14 +21,19 @@
 This module contains the handling of a game for the one player mode.
 """
 
-import time
-
 import pygame
 
 from resistencia import configure, xdg
 
 from guadaboard import board
 from guadaboard import layout
+from guadaboard import animation
+from guadaboard import sprites
+
+#Duration of the animation of every new board, and pause before the next one,
+#in milliseconds
+_move_duration = 600
+_move_pause = 900
 
 
 def _find_element_matrix(board_rep, element):
@@ -61,6 +66,11 @@ class DynGame:
         self.srfc_board_size = (self.board_size * self.piece_size, ) * 2
         self.player = player
 
+        self.last_board = None
+        self.animation = None
+        self.animations = []
+        self.next_animation = 0
+
         self.music = False
         if configure.load_configuration()['music_active'] == '1':
             self.music = True
@@ -106,6 +116,79 @@ class DynGame:
         self.screen.blit(self.xml_layout.get_surface(), (0, 0))
         pygame.display.flip()
 
+    def _update_board_rects(self, rects):
+        """
+        Shows on the screen only some rects of the board surface
+        """
+        screen_rects = []
+        for rect in rects:
+            screen_rects.append(self.screen.blit(self.srfc_board,
+                                                 rect.move(self.offset), rect))
+        pygame.display.update(screen_rects)
+
+    def _queue_boards(self, boards):
+        """
+        Queues the animations from the board shown to every new board
+        """
+        previous = self.last_board
+        if previous == None:
+            previous = boards[0]
+            boards = boards[1:]
+        self.srfc_board.blit(previous.get_surface(), (0, 0))
+        self._update_layout()
+
+        for actual in boards:
+            self.animations.append((previous, actual))
+            previous = actual
+        self.last_board = previous
+        self.next_animation = pygame.time.get_ticks()
+        if self.animations:
+            pygame.time.set_timer(animation.ANIMATION_EVENT,
+                                  animation.FRAME_PERIOD)
+
+    def _is_animating(self):
+        """
+        Returns True if there are animations running or queued
+        """
+        return not (self.animation == None and len(self.animations) == 0)
+
+    def _step_animations(self):
+        """
+        Draws the next frame of the queued animations. When one finishes,
+        the next one starts after a pause.
+        """
+        if self.animation == None:
+            if pygame.time.get_ticks() < self.next_animation:
+                return
+            if len(self.animations) == 0:
+                pygame.time.set_timer(animation.ANIMATION_EVENT, 0)
+                return
+            previous, actual = self.animations.pop(0)
+            self.animation = animation.Animation(previous, actual,
+                                                 self.srfc_board,
+                                                 _move_duration)
+        rects = self.animation.step()
+        if self.animation.finished:
+            self.animation = None
+            self.next_animation = pygame.time.get_ticks() + _move_pause
+            if len(self.animations) == 0:
+                pygame.time.set_timer(animation.ANIMATION_EVENT, 0)
+        self._update_board_rects(rects)
+
+    def _finish_animations(self):
+        """
+        Finishes the animations running and queued, showing the last board
+        """
+        rects = []
+        if not self.animation == None:
+            rects.extend(self.animation.finish())
+            self.animation = None
+        for previous, actual in self.animations:
+            rects.extend(actual.draw_changes(self.srfc_board, previous))
+        self.animations = []
+        pygame.time.set_timer(animation.ANIMATION_EVENT, 0)
+        self._update_board_rects(rects)
+
     def draw_layers(self, state, collision):
         """
         Draw the layers that represents the focused piece and
@@ -150,6 +233,8 @@ class DynGame:
         """
         if self.music:
             pygame.mixer.music.stop()
+            sprites.clear()
+            layout.clear_images()
             pygame.display.quit()
 
     def draw_boards(self, board_list):
@@ -158,24 +243,24 @@ class DynGame:
         """
         print 'draw_boards'
         print board_list[0]
-        _board = None
+        boards = []
 
         for i in board_list:
             state = i[0]
             identifiers = i[1]
             self.turn += 1
-            _board = board.Board(state, self.team_a_piece, self.team_b_piece,
-                                 self.default_piece, self.piece_size,
-                                 self.board_size, identifiers=identifiers,
-                                 player=self.player, hidden=True)
+            boards.append(board.Board(state, self.team_a_piece,
+                                      self.team_b_piece, self.default_piece,
+                                      self.piece_size, self.board_size,
+                                      identifiers=identifiers,
+                                      player=self.player, hidden=True))
             print 'vuelta a draw_boards'
-            srfc = _board.get_surface()
 
-            self.srfc_board.blit(srfc.convert(), (0, 0))
-            self._update_layout()
-            #pygame.display.flip()
-            if i != board_list[len(board_list) - 1]:
-                time.sleep(2)
+        # the new boards are shown with animations, drawn while the events
+        # are handled
+        _board = boards[-1]
+        srfc = _board.get_surface()
+        self._queue_boards(boards)
 
         print 'todo pintado'
         band = False
@@ -186,53 +271,59 @@ class DynGame:
         find_element_neg_1 = _find_element_matrix(state, -1)
         game_continue = find_element_1 and find_element_neg_1
 
-        clock = pygame.time.Clock()
-        while not band and game_continue:
-            clock.tick(50)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    if self.music:
-                        pygame.mixer.music.stop()
-                    pygame.display.quit()
-                elif event.type == pygame.MOUSEMOTION:
-                    res = _get_collision(event.pos, self.rects)
-                    if res != '':
-                        if band_pos == False:
-                            surface = self.xml_layout.get_surface((res, 2))
-                            self.screen.blit(surface, (0, 0))
-                            pygame.display.flip()
-                            band_pos = True
-                    else:
-                        if band_pos == True:
-                            surface = self.xml_layout.get_surface()
-                            self.screen.blit(surface, (0, 0))
-                            pygame.display.flip()
-                            band_pos = False
-                elif event.type == pygame.MOUSEBUTTONUP:
-                    if event.button == 1:
-                        if _get_collision(event.pos,
-                                          self.rects) == 'button_exit':
-                            if self.music:
-                                pygame.mixer.music.stop()
-                            pygame.display.quit()
-                        collision = _board.check_collision(event.pos)
-                        if not piece_selected:
-                            if collision[2] == self.player:
-                                self.srfc_board.blit(srfc.convert(), (0, 0))
-                                self._update_layout()
-                                self.draw_layers(state, collision)
-                                piece = collision
-                                piece_selected = True
-                        else:  # piece_selected
-                            if collision[2] == piece[2]:
-                                piece = collision
-                                self.srfc_board.blit(srfc.convert(), (0, 0))
-                                self._update_layout()
-                                self.draw_layers(state, collision)
-                            elif check_valid_movement(collision, piece):
-                                mov = get_movement(piece[1], collision[1],
-                                                   self.player)
-                                return (piece[0], mov)
+        while not band and (game_continue or self._is_animating()):
+            event = pygame.event.wait()
+            if event.type == animation.ANIMATION_EVENT:
+                self._step_animations()
+            elif event.type == pygame.QUIT:
+                if self.music:
+                    pygame.mixer.music.stop()
+                sprites.clear()
+                layout.clear_images()
+                pygame.display.quit()
+            elif event.type == pygame.MOUSEMOTION:
+                res = _get_collision(event.pos, self.rects)
+                if res != '':
+                    if band_pos == False:
+                        pygame.display.update(self.xml_layout.draw_buttons(
+                            self.screen, (res, 2)))
+                        band_pos = True
+                else:
+                    if band_pos == True:
+                        pygame.display.update(
+                            self.xml_layout.draw_buttons(self.screen))
+                        band_pos = False
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1:
+                    if _get_collision(event.pos,
+                                      self.rects) == 'button_exit':
+                        if self.music:
+                            pygame.mixer.music.stop()
+                        sprites.clear()
+                        layout.clear_images()
+                        pygame.display.quit()
+                    if self._is_animating():
+                        # a click skips the animations
+                        self._finish_animations()
+                        continue
+                    collision = _board.check_collision(event.pos)
+                    if not piece_selected:
+                        if collision[2] == self.player:
+                            self.srfc_board.blit(srfc.convert(), (0, 0))
+                            self._update_layout()
+                            self.draw_layers(state, collision)
+                            piece = collision
+                            piece_selected = True
+                    else:  # piece_selected
+                        if collision[2] == piece[2]:
+                            piece = collision
+                            self.srfc_board.blit(srfc.convert(), (0, 0))
+                            self._update_layout()
+                            self.draw_layers(state, collision)
+                        elif check_valid_movement(collision, piece):
+                            mov = get_movement(piece[1], collision[1],
+                                               self.player)
+                            return (piece[0], mov)
 
 
 def check_valid_movement(source, dest):
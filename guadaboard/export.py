@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Renders the records of games without a window, using the dummy video driver
+of SDL, as a sequence of PNG frames or as an animated GIF. Every frame is the
+layout of the replay viewer with a caption below it, with the title of the
+layout and the number of the turn.
+
+Several records are rendered on a pool of processes. Each worker keeps its
+own sprites cache, so the pieces are only drawn once for all its games.
+"""
+
+import os
+import multiprocessing
+
+import pygame
+
+try:
+    from PIL import Image
+except ImportError:
+    # PIL is not available, games can only be exported as PNG frames
+    Image = None
+
+from guadaboard import game, layout, sprites
+from libguadalete import file_parser
+from resistencia import filenames, configure
+from resistencia.xdg import get_data_path as xdg_data_path
+
+#Height of the caption below every frame
+_caption_height = 30
+
+
+class Error(Exception):
+    """Base class for exceptions in this module."""
+    pass
+
+
+class ExportError(Error):
+    """
+    Exception to handle an unsupported export format or a record that can't
+    be exported
+    """
+    def __init__(self, msg):
+        # the arguments are kept, so the error can be sent back from a worker
+        Error.__init__(self, msg)
+        self.msg = msg
+
+
+def init_display():
+    """
+    Initializes pygame with the dummy video driver. The display is needed to
+    convert the surfaces, but it is never shown.
+    """
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    pygame.init()
+    pygame.display.set_mode((1, 1), 0, 32)
+
+
+def _check_format(image_format):
+    """
+    Checks that games can be exported with the given format
+    """
+    if not image_format in ('png', 'gif'):
+        raise ExportError('Unknown format: %s' % image_format)
+    if image_format == 'gif':
+        if Image == None:
+            raise ExportError('PIL is needed to export GIF files')
+        # the old versions of PIL can't save animated images
+        Image.init()
+        if not 'GIF' in getattr(Image, 'SAVE_ALL', {}):
+            raise ExportError('The installed PIL can not save animated GIF '
+                              'files')
+
+
+def _check_speed(turns_per_second):
+    """
+    Checks that the speed of the GIF files, if given, is positive
+    """
+    if not (turns_per_second == None or turns_per_second > 0):
+        raise ExportError('The speed must be a positive number of turns per '
+                          'second')
+
+
+def _draw_caption(xml_layout, frame, text):
+    """
+    Returns a new surface with the frame and the text below it
+    """
+    width, height = frame.get_size()
+    surface = pygame.Surface((width, height + _caption_height))
+    surface.blit(frame, (0, 0))
+    caption_font = sprites.get_font(xml_layout.elements['font_type'], 18)
+    caption = caption_font.render(text, 1, xml_layout.elements['font_color'])
+    surface.blit(caption, (10, height + (_caption_height -
+                                         caption.get_height()) / 2))
+    return surface
+
+
+def _to_image(surface):
+    """
+    Converts a pygame surface to a PIL image
+    """
+    data = pygame.image.tostring(surface, 'RGB')
+    if hasattr(Image, 'frombytes'):
+        return Image.frombytes('RGB', surface.get_size(), data)
+    return Image.fromstring('RGB', surface.get_size(), data)
+
+
+def export_game(src_file, output, image_format='png',
+                team_a=xdg_data_path('images/piece-orange.png'),
+                team_b=xdg_data_path('images/piece-violete.png'),
+                path_piece_def=xdg_data_path('images/piece-default.png'),
+                xml_file=xdg_data_path('layouts/alternative-layout.xml'),
+                hidden=False, turns_per_second=None):
+    """
+    Renders every turn of a game record. Returns the list of files written.
+    The display must be initialized with init_display.
+
+    Keywords arguments:
+    src_file -- The record of the game
+    output -- The prefix of the PNG frames, that are named as
+    output_0000.png, or the name of the GIF file
+    image_format -- 'png' or 'gif'
+    team_a, team_b -- The images of the pieces of every team
+    turns_per_second -- The speed of the GIF. By default, the speed of the
+    auto-play of the replay viewer
+    """
+    _check_format(image_format)
+    _check_speed(turns_per_second)
+
+    entire_game = file_parser.parse_file(src_file)[0]
+    if len(entire_game) == 0:
+        raise ExportError('The record has no turns: %s' % src_file)
+    name_a, name_b = filenames.extract_names_from_file(src_file)
+
+    xml_layout = layout.Layout(xml_file)
+    res_game = game.Game(entire_game, team_a, team_b, path_piece_def,
+                         hidden=hidden)
+    xml_layout.init((team_a, name_a), (team_b, name_b),
+                    res_game.draw_board())
+
+    title = xml_layout.get_window_title()
+    outputs = []
+    images = []
+    for turn in range(res_game.num_turn):
+        res_game.set_turn(turn)
+        res_game.update_board()
+        xml_layout.change_board(res_game.surface)
+        frame = _draw_caption(xml_layout, xml_layout.get_surface(),
+                              '%s - %d/%d' % (title, turn + 1,
+                                              res_game.num_turn))
+        if image_format == 'png':
+            frame_file = '%s_%04d.png' % (output, turn)
+            pygame.image.save(frame, frame_file)
+            outputs.append(frame_file)
+        else:
+            images.append(_to_image(frame).convert('P'))
+
+    if image_format == 'gif':
+        if turns_per_second == None:
+            config = configure.load_configuration()
+            turns_per_second = configure.get_autoplay_speed(config)
+        images[0].save(output, save_all=True, append_images=images[1:],
+                       duration=int(1000 / turns_per_second), loop=0)
+        outputs.append(output)
+
+    return outputs
+
+
+def _init_worker():
+    """
+    Initializes the display of a worker process
+    """
+    init_display()
+
+
+def _export_job(job):
+    """
+    Exports a game on a worker process
+    """
+    src_file, output, options = job
+    return export_game(src_file, output, **options)
+
+
+def export_games(records, output_dir, image_format='png', processes=None,
+                 **options):
+    """
+    Exports several records to the output directory, using a pool of
+    processes. Every record is exported with its name, without the
+    extension. Returns the list of files written.
+
+    Keywords arguments:
+    records -- The list of records of the games
+    output_dir -- The directory where the frames or the GIF files are
+    written
+    image_format -- 'png' or 'gif'
+    processes -- The number of processes of the pool. By default, the
+    number of cores
+    options -- The arguments of export_game for all the games
+    """
+    _check_format(image_format)
+    _check_speed(options.get('turns_per_second'))
+    options['image_format'] = image_format
+    jobs = []
+    for record in records:
+        name = os.path.splitext(os.path.basename(record))[0]
+        output = os.path.join(output_dir, name)
+        if image_format == 'gif':
+            output = output + '.gif'
+        jobs.append((record, output, options))
+
+    pool = multiprocessing.Pool(processes, _init_worker)
+    try:
+        results = pool.map(_export_job, jobs, 1)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    outputs = []
+    for result in results:
+        outputs.extend(result)
+    return outputs
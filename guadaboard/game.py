@@ -23,14 +23,23 @@ game, showing the differents boards.
 """
 
 import guadaboard.board as board
+from guadaboard import animation
+from guadaboard.record import LRUCache
+
+#Number of boards of the turns kept with their pieces drawn
+__default_cache_size__ = 16
 
 
 class Game(object):
     """
     This class provides the funcionalities to iterate turns on a game.
+
+    The turns can be given as a list of boards or as a
+    record.RecordReader, that decodes them when they are shown.
     """
     def __init__(self, entire_game, team_a_piece, team_b_piece,
-                 default_piece, piece_size=60, board_size=8, hidden=False):
+                 default_piece, piece_size=60, board_size=8, hidden=False,
+                 cache_size=__default_cache_size__):
         self.entire_game = entire_game
         self.turn = 0
         self.num_turn = len(self.entire_game)
@@ -41,18 +50,95 @@ class Game(object):
         self.piece_size = piece_size
         self.board_size = board_size
         self.hidden = hidden
+        self.surface = None
+        self.drawn_state = None
+        self.animation = None
+        self._states = LRUCache(cache_size)
 
-        self.state = board.Board(
-            self.entire_game[self.turn],
-            self.team_a_piece, self.team_b_piece,
-            self.default_piece, self.piece_size,
-            self.board_size, hidden=self.hidden)
+        self.state = self._get_state(self.turn)
+
+    def _get_state(self, turn):
+        """
+        Returns the board.Board of a turn, creating it only if it isn't on
+        the cache
+        """
+        state = self._states.get(turn)
+        if state == None:
+            state = board.Board(
+                self.entire_game[turn],
+                self.team_a_piece, self.team_b_piece,
+                self.default_piece, self.piece_size,
+                self.board_size, hidden=self.hidden)
+            self._states.put(turn, state)
+        return state
 
     def draw_board(self):
         """
         Returns a pygame surface with the actual state board
         """
-        return self.state.get_surface()
+        self.surface = self.state.get_surface()
+        self.drawn_state = self.state
+        return self.surface
+
+    def update_board(self):
+        """
+        Draws the actual state on the surface returned by draw_board, but
+        only the squares that changed since it was drawn. Returns the list
+        of rects of the surface that have changed.
+        """
+        if self.surface == None:
+            self.draw_board()
+            return [self.surface.get_rect()]
+        rects = self.finish_animation()
+        if not self.drawn_state is self.state:
+            rects.extend(self.state.draw_changes(self.surface,
+                                                 self.drawn_state))
+            self.drawn_state = self.state
+        return rects
+
+    def animate_board(self, duration=animation.__default_duration__):
+        """
+        Like update_board, but the pieces are moved to the actual state
+        with an animation, whose frames are drawn with step_animation.
+        Returns the list of rects of the surface that have changed.
+        """
+        if self.surface == None or self.drawn_state is self.state:
+            return self.update_board()
+        rects = self.finish_animation()
+        self.animation = animation.Animation(self.drawn_state, self.state,
+                                             self.surface, duration)
+        self.drawn_state = self.state
+        rects.extend(self.step_animation())
+        return rects
+
+    def is_animating(self):
+        """
+        Returns True if there is an animation running
+        """
+        return not self.animation == None
+
+    def step_animation(self):
+        """
+        Draws the next frame of the animation running. Returns the list of
+        rects of the surface that have changed.
+        """
+        if self.animation == None:
+            return []
+        rects = self.animation.step()
+        if self.animation.finished:
+            self.animation = None
+        return rects
+
+    def finish_animation(self):
+        """
+        Draws the last frame of the animation running, if any. Returns the
+        list of rects of the surface that have changed.
+        """
+        if self.animation == None:
+            return []
+        rects = self.animation.finish()
+        self.animation = None
+        return rects
 
     def next_turn(self):
         """
@@ -61,11 +147,7 @@ class Game(object):
         if self.turn != self.num_turn - 1:
             self.turn = self.turn + 1
 
-            self.state = board.Board(
-                self.entire_game[self.turn],
-                self.team_a_piece, self.team_b_piece,
-                self.default_piece, self.piece_size,
-                self.board_size, hidden=self.hidden)
+            self.state = self._get_state(self.turn)
 
     def previous_turn(self):
         """
@@ -74,11 +156,21 @@ class Game(object):
         if self.turn != 0:
             self.turn = self.turn - 1
 
-            self.state = board.Board(
-                self.entire_game[self.turn],
-                self.team_a_piece, self.team_b_piece,
-                self.default_piece, self.piece_size,
-                self.board_size, hidden=self.hidden)
+            self.state = self._get_state(self.turn)
+
+    def set_turn(self, turn):
+        """
+        Iterates to the given turn, limited to the turns of the game
+        """
+        self.turn = max(0, min(turn, self.num_turn - 1))
+
+        self.state = self._get_state(self.turn)
+
+    def is_last_turn(self):
+        """
+        Returns True if the actual turn is the last one of the game
+        """
+        return self.turn == self.num_turn - 1
 
     def first_turn(self):
         """
@@ -86,11 +178,7 @@ class Game(object):
         """
         self.turn = 0
 
-        self.state = board.Board(
-            self.entire_game[self.turn],
-            self.team_a_piece, self.team_b_piece,
-            self.default_piece, self.piece_size,
-            self.board_size, hidden=self.hidden)
+        self.state = self._get_state(self.turn)
 
     def last_turn(self):
         """
@@ -98,8 +186,4 @@ class Game(object):
         """
         self.turn = self.num_turn - 1
 
-        self.state = board.Board(
-            self.entire_game[self.turn],
-            self.team_a_piece, self.team_b_piece,
-            self.default_piece, self.piece_size,
-            self.board_size, hidden=self.hidden)
+        self.state = self._get_state(self.turn)
@@ -28,14 +28,18 @@ from pygame import mixer
 
 import gtk
 
-from guadaboard import  game, layout
-from libguadalete import libguadalete, file_parser, stats
+from guadaboard import  game, layout, record, timeline, animation, sprites
+from libguadalete import libguadalete, file_parser, stats, results_cache
+from libguadalete import timing
 from libguadalete.libguadalete import FileError as LibFileError
 from resistencia import filenames, configure
 from resistencia.xdg import get_data_path as xdg_data_path
 from resistencia.gui import notify_result
 
 
+AUTOPLAY_EVENT = pygame.USEREVENT + 1
+
+
 class Error(Exception):
     """Base class for exceptions in this module."""
     pass
@@ -55,13 +59,21 @@ def _handle_draw(output_file):
     """
     entire_game, winner = file_parser.parse_file(output_file)
 
+    return _break_draw(entire_game, winner)
+
+
+def _break_draw(entire_game, winner):
+    """
+    Given the boards of a game and its result, returns a winner even if the
+    game ended on a draw.
+    """
     if not winner == 0:
         return winner
     else:  # if it's a draw
         num_a = 0
         num_b = 0
         _sum = 0
-        final_board = entire_game[:-1]
+        final_board = entire_game[-1]
         _num = len(final_board)
         for i in range(_num):
             for j in range(_num):
@@ -88,11 +100,50 @@ def _handle_draw(output_file):
                 return -1  # B team is in disvantage
 
 
+class _AutoPlay:
+    """
+    Advances the turns of a replay at a fixed rate. A pygame timer wakes up
+    the event loop, and the turn to show is computed from the time elapsed
+    since the auto-play started, so late timer events do not accumulate
+    delay.
+    """
+    def __init__(self, turns_per_second):
+        self.turns_per_second = turns_per_second
+        self.active = False
+        self._start_turn = 0
+        self._start_ticks = 0
+
+    def start(self, turn):
+        """
+        Starts the auto-play from the given turn
+        """
+        self.active = True
+        self._start_turn = turn
+        self._start_ticks = pygame.time.get_ticks()
+        period = max(1, int(1000.0 / self.turns_per_second))
+        pygame.time.set_timer(AUTOPLAY_EVENT, period)
+
+    def stop(self):
+        """
+        Stops the auto-play and its timer
+        """
+        self.active = False
+        pygame.time.set_timer(AUTOPLAY_EVENT, 0)
+
+    def get_turn(self):
+        """
+        Returns the turn that has to be shown now
+        """
+        elapsed = pygame.time.get_ticks() - self._start_ticks
+        return self._start_turn + int(elapsed * self.turns_per_second / 1000.0)
+
+
 def _load_game_from_file(src_file, team_a, team_b, path_piece_def, xml_file,
                          hidden=False, cant_draw=False):
-    entire_game, winner = file_parser.parse_file(src_file)
+    reader = record.RecordReader(src_file)
+    winner = reader.get_winner()
     if cant_draw:
-        winner = _handle_draw(src_file)
+        winner = _break_draw(reader, winner)
 
     if winner == 0:
         print u'Empate'
@@ -101,8 +152,9 @@ def _load_game_from_file(src_file, team_a, team_b, path_piece_def, xml_file,
     else:
         print u'Ganó %s' % team_b[0]
 
+    config = configure.load_configuration()
     music = False
-    if configure.load_configuration()['music_active'] == '1':
+    if config['music_active'] == '1':
         music = True
 
     pygame.init()
@@ -117,83 +169,140 @@ def _load_game_from_file(src_file, team_a, team_b, path_piece_def, xml_file,
         mixer.music.load(_music_path)
         mixer.music.play()
 
-    res_game = game.Game(entire_game, team_a[1],
+    res_game = game.Game(reader, team_a[1],
                          team_b[1], path_piece_def, hidden=hidden)
 
-    img_board = res_game.draw_board().convert()
+    img_board = res_game.draw_board()
 
     xml_layout.init((team_a[1], team_a[0]), (team_b[1], team_b[0]), img_board)
     rects = xml_layout.get_buttons_rects()
 
     pygame.display.set_icon(xml_layout.get_favicon())
 
+    slider = None
+    slider_rect = xml_layout.get_timeline_rect()
+    if not slider_rect == None:
+        slider = timeline.Timeline(lambda turn: reader.get_board(turn, False),
+                                   res_game.num_turn, slider_rect,
+                                   xml_layout.get_background())
+
     screen.blit(xml_layout.get_surface(), (0, 0))
+    if slider:
+        slider.draw(screen, res_game.turn)
     pygame.display.flip()
 
     band_pos = False
-    clock = pygame.time.Clock()
+    dragging = False
+    drag_turn = 0
+    autoplay = _AutoPlay(configure.get_autoplay_speed(config))
+    # the animations of the auto-play last less than a turn
+    autoplay_animation = min(animation.__default_duration__,
+                             int(800 / autoplay.turns_per_second))
     while True:
-        clock.tick(50)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                if music:
-                    mixer.music.stop()
-                pygame.display.quit()
-                show_dialog_result((team_a[0], team_b[0]), winner)
-                return winner
-            elif event.type == pygame.KEYDOWN:
-                if event.key == 275:
-                    surface = next_turn(res_game, xml_layout)
-                    screen.blit(surface, (0, 0))
-                    pygame.display.flip()
-                if event.key == 276:
-                    surface = previous_turn(res_game, xml_layout)
-                    screen.blit(surface, (0, 0))
-                    pygame.display.flip()
-            elif event.type == pygame.MOUSEMOTION:
-                res = get_collision(event.pos, rects)
-                if res != '':
-                    if band_pos == False:
-                        surface = xml_layout.get_surface((res, 2))
-                        screen.blit(surface, (0, 0))
-                        pygame.display.flip()
-                        band_pos = True
+        event = pygame.event.wait()
+        if event.type == animation.ANIMATION_EVENT:
+            _show_animation_frame(screen, res_game, xml_layout)
+        elif event.type == timeline.THUMBNAIL_EVENT:
+            if dragging:
+                pygame.display.update(slider.draw(screen, drag_turn, True))
+        elif event.type == AUTOPLAY_EVENT:
+            if autoplay.active:
+                turn = autoplay.get_turn()
+                if not turn == res_game.turn:
+                    animate = 0
+                    if turn == res_game.turn + 1:
+                        animate = autoplay_animation
+                    res_game.set_turn(turn)
+                    _show_turn(screen, res_game, xml_layout, slider=slider,
+                               animate=animate)
+                if res_game.is_last_turn():
+                    autoplay.stop()
+        elif event.type == pygame.QUIT:
+            autoplay.stop()
+            pygame.time.set_timer(animation.ANIMATION_EVENT, 0)
+            reader.close()
+            if slider:
+                slider.close()
+            if music:
+                mixer.music.stop()
+            sprites.clear()
+            layout.clear_images()
+            pygame.display.quit()
+            show_dialog_result((team_a[0], team_b[0]), winner)
+            return winner
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                if autoplay.active:
+                    autoplay.stop()
                 else:
-                    if band_pos == True:
-                        surface = xml_layout.get_surface()
-                        screen.blit(surface, (0, 0))
-                        pygame.display.flip()
-                        band_pos = False
-            elif event.type == pygame.MOUSEBUTTONUP:
-                res = get_collision(event.pos, rects)
-                if event.button == 1 and res != '':
-                    if res == 'button_exit':
-                        if music:
-                            mixer.music.stop()
-                        pygame.display.quit()
-                        show_dialog_result((team_a[0], team_b[0]), winner)
-                        return winner
-                    else:
-                        if res == 'button_left_2':
-                            surface = first_turn(
-                                res_game, xml_layout, (res, 1))
-                            screen.blit(surface, (0, 0))
-                            pygame.display.flip()
-                        elif res == 'button_left_1':
-                            surface = previous_turn(
-                                res_game, xml_layout, (res, 1))
-                            screen.blit(surface, (0, 0))
-                            pygame.display.flip()
-                        elif res == 'button_right_1':
-                            surface = next_turn(
-                                res_game, xml_layout, (res, 1))
-                            screen.blit(surface, (0, 0))
-                            pygame.display.flip()
-                        elif res == 'button_right_2':
-                            surface = last_turn(
-                                res_game, xml_layout, (res, 1))
-                            screen.blit(surface, (0, 0))
-                            pygame.display.flip()
+                    if res_game.is_last_turn():
+                        res_game.first_turn()
+                        _show_turn(screen, res_game, xml_layout, slider=slider)
+                    autoplay.start(res_game.turn)
+            if event.key == 275:
+                autoplay.stop()
+                res_game.next_turn()
+                _show_turn(screen, res_game, xml_layout, slider=slider,
+                           animate=animation.__default_duration__)
+            if event.key == 276:
+                autoplay.stop()
+                res_game.previous_turn()
+                _show_turn(screen, res_game, xml_layout, slider=slider,
+                           animate=animation.__default_duration__)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1 and slider and slider.collide(event.pos):
+                autoplay.stop()
+                dragging = True
+                drag_turn = slider.get_turn_at(event.pos[0])
+                pygame.display.update(slider.draw(screen, drag_turn, True))
+        elif event.type == pygame.MOUSEMOTION and dragging:
+            drag_turn = slider.get_turn_at(event.pos[0])
+            pygame.display.update(slider.draw(screen, drag_turn, True))
+        elif event.type == pygame.MOUSEBUTTONUP and dragging:
+            dragging = False
+            res_game.set_turn(slider.get_turn_at(event.pos[0]))
+            _show_turn(screen, res_game, xml_layout, slider=slider)
+        elif event.type == pygame.MOUSEMOTION:
+            res = get_collision(event.pos, rects)
+            if res != '':
+                if band_pos == False:
+                    pygame.display.update(
+                        xml_layout.draw_buttons(screen, (res, 2)))
+                    band_pos = True
+            else:
+                if band_pos == True:
+                    pygame.display.update(xml_layout.draw_buttons(screen))
+                    band_pos = False
+        elif event.type == pygame.MOUSEBUTTONUP:
+            res = get_collision(event.pos, rects)
+            if event.button == 1 and res != '':
+                autoplay.stop()
+                if res == 'button_exit':
+                    pygame.time.set_timer(animation.ANIMATION_EVENT, 0)
+                    reader.close()
+                    if slider:
+                        slider.close()
+                    if music:
+                        mixer.music.stop()
+                    sprites.clear()
+                    layout.clear_images()
+                    pygame.display.quit()
+                    show_dialog_result((team_a[0], team_b[0]), winner)
+                    return winner
+                else:
+                    animate = 0
+                    if res == 'button_left_2':
+                        res_game.first_turn()
+                    elif res == 'button_left_1':
+                        res_game.previous_turn()
+                        animate = animation.__default_duration__
+                    elif res == 'button_right_1':
+                        res_game.next_turn()
+                        animate = animation.__default_duration__
+                    elif res == 'button_right_2':
+                        res_game.last_turn()
+                    _show_turn(screen, res_game, xml_layout, (res, 1),
+                               slider, animate)
 
 
 def get_collision(point, rects):
@@ -214,13 +323,62 @@ def _get_turn(actual_game, xml_layout, mouse=None):
     """
     Changes the turn
     """
-    surface = actual_game.draw_board()
-    surface.convert()
-    xml_layout.change_board(surface)
+    actual_game.update_board()
+    xml_layout.change_board(actual_game.surface)
 
     return xml_layout.get_surface(mouse)
 
 
+def _blit_board(screen, actual_game, xml_layout, changed):
+    """
+    Copies the changed rects of the board surface to the screen. Returns
+    the list of rects of the screen that have been drawn.
+    """
+    board_position = xml_layout.get_board_position()
+    rects = []
+    for rect in changed:
+        rects.append(screen.blit(actual_game.surface,
+                                 rect.move(board_position), rect))
+    return rects
+
+
+def _show_turn(screen, actual_game, xml_layout, mouse=None, slider=None,
+               animate=0):
+    """
+    Shows the actual turn redrawing only the squares of the board that
+    changed, the buttons and the timeline, and updating only those areas of
+    the screen.
+
+    If animate is given, the pieces are moved with an animation of that
+    duration in milliseconds. Its frames are drawn on every
+    animation.ANIMATION_EVENT by _show_animation_frame.
+    """
+    if animate:
+        changed = actual_game.animate_board(animate)
+        if actual_game.is_animating():
+            pygame.time.set_timer(animation.ANIMATION_EVENT,
+                                  animation.FRAME_PERIOD)
+    else:
+        changed = actual_game.update_board()
+    rects = _blit_board(screen, actual_game, xml_layout, changed)
+    rects.extend(xml_layout.draw_buttons(screen, mouse))
+    if slider:
+        rects.extend(slider.draw(screen, actual_game.turn))
+    pygame.display.update(rects)
+
+
+def _show_animation_frame(screen, actual_game, xml_layout):
+    """
+    Shows the next frame of the animation of the board, stopping the timer
+    of the frames when it finishes.
+    """
+    changed = actual_game.step_animation()
+    pygame.display.update(_blit_board(screen, actual_game, xml_layout,
+                                      changed))
+    if not actual_game.is_animating():
+        pygame.time.set_timer(animation.ANIMATION_EVENT, 0)
+
+
 def next_turn(actual_game, xml_layout, mouse=None):
     """
     Iterates to the next turn
@@ -257,28 +415,77 @@ def run(team_a, team_b, fast=False, dont_log=False, hidden=False,
         number_turns=100,
         path_piece_def=xdg_data_path('images/piece-default.png'),
         xml_file=xdg_data_path('layouts/main-layout.xml'),
-        get_stats=False, cant_draw=False):
+        get_stats=False, cant_draw=False, seed=None):
     """
     Runs a game using the system expert teams given. It calls to libguadalete,
     generating the game and parsing the file.
+
+    If a seed is given, the game is reproducible, so its result is looked up
+    on the results cache and the simulation is skipped if it was already
+    played (and its record still exists, if it has to be shown).
+
+    The time spent on every phase of the game is added to the metrics of
+    the timing module. The time the game is shown to the user is not.
     """
-    lib = libguadalete.LibGuadalete(team_a[0], team_b[0], number_turns)
-    try:
-        out_file, winner = lib.run_game()
-    except LibFileError as exc:
-        raise GuadaFileError(exc.msg)
+    timing.begin_game()
+    cache = None
+    entry = None
+    if not seed == None:
+        timing.start('cache')
+        cache = results_cache.get_cache()
+        key = results_cache.get_cache_key(team_a[0], team_b[0], seed,
+                                          number_turns)
+        entry = cache.get(key)
+        if not (entry == None or fast):
+            if entry['record'] == None or not os.path.exists(entry['record']):
+                entry = None
+        timing.stop('cache')
+
+    if entry == None:
+        lib = libguadalete.LibGuadalete(team_a[0], team_b[0], number_turns,
+                                        seed=seed)
+        try:
+            out_file, winner = lib.run_game()
+        except LibFileError as exc:
+            raise GuadaFileError(exc.msg)
+        simulated = True
+        if not cache == None:
+            entire_game, winner = file_parser.parse_file(out_file)
+            record = out_file
+            if dont_log:
+                record = None
+            game_stats = stats.get_game_stats(entire_game, winner)
+            timing.start('cache')
+            cache.put(key, winner, game_stats,
+                      _break_draw(entire_game, winner), record)
+            entry = cache.get(key)
+            timing.stop('cache')
+    else:
+        out_file = entry['record']
+        winner = entry['winner']
+        simulated = False
+
+    if cant_draw:
+        if entry == None:
+            winner = _handle_draw(out_file)
+        else:
+            winner = entry['cant_draw_winner']
+    res = winner
+    if get_stats:
+        if entry == None:
+            res = (winner, stats.get_game_file_stats(out_file))
+        else:
+            res = (winner, entry['stats'])
+    # the viewer waits for the user, so it's not timed with the game
+    timing.end_game()
+
     if not fast:
         name_team_a = filenames.extract_name_expert_system(team_a[0])
         name_team_b = filenames.extract_name_expert_system(team_b[0])
         _load_game_from_file(out_file, (name_team_a, team_a[1]),
                              (name_team_b, team_b[1]), path_piece_def,
                              xml_file, hidden, cant_draw=cant_draw)
-    if cant_draw:
-        winner = _handle_draw(out_file)
-    res = winner
-    if get_stats:
-        res = (winner, stats.get_game_file_stats(out_file))
-    if dont_log or get_stats:
+    if simulated and dont_log:
         os.remove(out_file)
     return res
 
@@ -23,7 +23,7 @@ This module intialize the Clips environment for the 1 player mode
 """
 
 import os
-import random
+import shutil
 
 import clips
 
@@ -31,6 +31,7 @@ import guadaboard.real_interaction as r_intact
 
 from libguadalete import funciones, f1, mover, texto
 from libguadalete import traducirF, traducirM, fA, fB, mirroring, interaccion
+from libguadalete import file_parser, libguadalete
 
 from resistencia import configure, filenames, xdg
 from resistencia.nls import gettext as _
@@ -49,17 +50,22 @@ def _generate_file_name(team_a, team_b):
     return '%s/%s' % (base_path, des)
 
 
-def _rename_output_file(des):
+def _rename_output_file(des, header):
     """
-    Simple function that rename the output file named 'resultado.txt'
-    to the proper filename with the date, names and so on.
+    Simple function that moves the output file named 'resultado.txt'
+    to the proper filename with the date, names and so on, writing the
+    header before.
     """
     src = "resultado.txt"
-    _file = open(src, "a")
-    _file.write("fin\n")
     print "src: %s" % src
     print "des: %s" % des
-    os.rename(src, des)
+    f_src = open(src, "r")
+    f_des = open(des, "w")
+    file_parser.write_header(f_des, header)
+    shutil.copyfileobj(f_src, f_des)
+    f_des.write("fin\n")
+    f_des.close()
+    f_src.close()
 
 
 class Error(Exception):
@@ -79,9 +85,10 @@ class FileError(Error):
 
 
 def init_human_game(player_formation, computer_team, player_as,
-                    number_turns, dont_save=False):
+                    number_turns, dont_save=False, seed=None):
     """
-    Intialize the clips environment
+    Intialize the clips environment. If no seed is given, a random one is
+    generated and written on the header of the record.
     """
     player_num = 0
     team_a = None
@@ -116,8 +123,9 @@ def init_human_game(player_formation, computer_team, player_as,
 
     clips.EngineConfig.Strategy = clips.RANDOM_STRATEGY
 
-    random.seed()
-    clips.Eval("(seed %d)" % random.randint(0, 9999))
+    if seed == None:
+        seed = libguadalete.generate_seed()
+    clips.Eval("(seed %d)" % seed)
 
     funciones.LoadFunctions(clips)
     f1.init_world(clips, number_turns)
@@ -191,5 +199,7 @@ def init_human_game(player_formation, computer_team, player_as,
     print interaccion.interaction_object.define_winner()
 
     if not dont_save:
-        _rename_output_file(_generate_file_name(name_team_a, name_team_b))
+        _rename_output_file(_generate_file_name(name_team_a, name_team_b),
+                            [('seed', seed), ('turns', number_turns),
+                             ('engine', libguadalete.__engine_version__)])
     os.remove('resultado.txt')
@@ -65,8 +65,12 @@ after reading the XML file:
   |- 'exit_button_size'
   |- 'exit_button_position'
   |- 'exit_button_images'
+- 'timeline' (optional)
+  |- 'timeline_size'
+  |- 'timeline_position'
 """
 
+import os
 from xml.dom import minidom
 
 import pygame
@@ -75,40 +79,89 @@ from pygame import font
 from guadaboard import main_layout_functions as functions
 
 
+#Layouts already read, formed by xml path -> (mtime, elements, images), where
+#images is a dictionary (path, mode) -> surface, filled by Layout._load_image
+_layouts = {}
+
+
+def _parse_layout(xml_layout_document):
+    """
+    Parses a layout XML file, returning the dictionary of its elements
+    """
+    elements = {}
+    docxml = minidom.parse(xml_layout_document)
+
+    window_board = docxml.firstChild
+    window_board_childs = window_board.childNodes
+
+    functions.erase_childs_end_of_line(window_board_childs)
+
+    for element in window_board_childs:
+        tag = element.tagName
+        attr = element.getAttribute('type')
+
+        _x_ = eval('functions.parse_' + tag + '_' + attr + '(element)')
+        elements[element.getAttribute('name')] = _x_
+
+    return elements
+
+
+def _get_layout(xml_layout_document):
+    """
+    Returns the pair (elements, images) of a layout, reading the XML file
+    only the first time or if it was modified
+    """
+    mtime = os.path.getmtime(xml_layout_document)
+    cached = _layouts.get(xml_layout_document)
+    if cached == None or not cached[0] == mtime:
+        cached = (mtime, _parse_layout(xml_layout_document), {})
+        _layouts[xml_layout_document] = cached
+    return cached[1], cached[2]
+
+
+def clear_cache():
+    """
+    Forgets the layouts already read
+    """
+    _layouts.clear()
+
+
+def clear_images():
+    """
+    Forgets the images of the layouts already read, keeping their elements.
+    The images are converted for the actual display, so they must be
+    loaded again for a new one.
+    """
+    for mtime, elements, images in _layouts.values():
+        images.clear()
+
+
 class Layout(object):
     """
     Class that reads a xml file containing the layout of the board
     """
     def __init__(self, xml_layout_document, interaction=False):
         self._color_key = (255, 0, 255)
-        self.elements = {}
         self.interaction = interaction
-        docxml = minidom.parse(xml_layout_document)
-
-        window_board = docxml.firstChild
-        window_board_childs = window_board.childNodes
-
-        functions.erase_childs_end_of_line(window_board_childs)
-
-        for element in window_board_childs:
-            tag = element.tagName
-            attr = element.getAttribute('type')
-
-            _x_ = eval('functions.parse_' + tag + '_' + attr + '(element)')
-            self.elements[element.getAttribute('name')] = _x_
+        # the elements and the images are shared by all the layouts of the
+        # same file, so they must not be modified
+        self.elements, self._images = _get_layout(xml_layout_document)
 
         self.window_size = self.elements['window_size']
         self.window_title = self.elements['window_title']
         self.state = {'button_exit': 0, 'button_left_2': 0, 'button_left_1': 0,
                       'button_right_1': 0, 'button_right_2': 0}
 
-        self.favicon = pygame.image.load(self.elements['favicon'])
+        self.favicon = self._load_image(self.elements['favicon'])
 
         self.player_a = None
         self.player_b = None
         self.board = None
         self._static_background = None
         self._buttons_rects = None
+        self._frame = None
+        self._drawn_buttons = None
+        self._board_changed = False
         self.labels = None
         self.buttons = None
 
@@ -118,8 +171,6 @@ class Layout(object):
         __init__ function.
 
         """
-        self.favicon = pygame.image.load(self.elements['favicon'])
-
         self.player_a = player_a
         self.player_b = player_b
 
@@ -130,6 +181,30 @@ class Layout(object):
 
         self._static_background = self._get_static_surface()
         self._buttons_rects = self._generate_buttons_rects()
+        self._frame = None
+        self._drawn_buttons = {}
+        self._board_changed = True
+
+    def _load_image(self, path, mode=None):
+        """
+        Returns the surface of an image, loading it only the first time for
+        all the layouts of the same file. The surfaces must not be modified.
+
+        Keywords arguments:
+        path -- The path of the image
+        mode -- None to keep the surface as it's loaded, 'opaque' to convert
+        it to the format of the display, or 'alpha' to convert it keeping
+        its transparency
+        """
+        key = (path, mode)
+        if not key in self._images:
+            image = pygame.image.load(path)
+            if mode == 'opaque':
+                image = image.convert()
+            elif mode == 'alpha':
+                image = image.convert_alpha()
+            self._images[key] = image
+        return self._images[key]
 
     def _create_labels(self):
         """
@@ -137,14 +212,14 @@ class Layout(object):
         """
         players_names = self.elements['players_names']
         piece_size = players_names['inside_labels']['piece_size']
-        label_a = pygame.image.load(
-            players_names['names_background']).convert()
-        label_b = pygame.image.load(
-            players_names['names_background']).convert()
+        label_a = self._load_image(players_names['names_background'],
+                                   'opaque').copy()
+        label_b = self._load_image(players_names['names_background'],
+                                   'opaque').copy()
 
-        piece_a = pygame.transform.scale(pygame.image.load(self.player_a[0]),
+        piece_a = pygame.transform.scale(self._load_image(self.player_a[0]),
                                          piece_size)
-        piece_b = pygame.transform.scale(pygame.image.load(self.player_b[0]),
+        piece_b = pygame.transform.scale(self._load_image(self.player_b[0]),
                                          piece_size)
 
         name_font = font.Font(self.elements['font_type'], 22)
@@ -176,37 +251,37 @@ class Layout(object):
         btn_right_2_pth = action_btns['fourth_button']['fourth_button_images']
         self.buttons = {}
 
-        btn_exit_default = pygame.image.load(btn_exit_pth[0])
-        btn_exit_above = pygame.image.load(btn_exit_pth[1])
-        btn_exit_pressed = pygame.image.load(btn_exit_pth[2])
+        btn_exit_default = self._load_image(btn_exit_pth[0], 'alpha')
+        btn_exit_above = self._load_image(btn_exit_pth[1], 'alpha')
+        btn_exit_pressed = self._load_image(btn_exit_pth[2], 'alpha')
         self.buttons['button_exit'] = (btn_exit_default,
                                        btn_exit_above,
                                        btn_exit_pressed)
 
-        btn_left_2_default = pygame.image.load(btn_left_2_pth[0])
-        btn_left_2_above = pygame.image.load(btn_left_2_pth[1])
-        btn_left_2_pressed = pygame.image.load(btn_left_2_pth[2])
+        btn_left_2_default = self._load_image(btn_left_2_pth[0], 'alpha')
+        btn_left_2_above = self._load_image(btn_left_2_pth[1], 'alpha')
+        btn_left_2_pressed = self._load_image(btn_left_2_pth[2], 'alpha')
         self.buttons['button_left_2'] = (btn_left_2_default,
                                          btn_left_2_above,
                                          btn_left_2_pressed)
 
-        btn_left_1_default = pygame.image.load(btn_left_1_pth[0])
-        btn_left_1_above = pygame.image.load(btn_left_1_pth[1])
-        btn_left_1_pressed = pygame.image.load(btn_left_1_pth[2])
+        btn_left_1_default = self._load_image(btn_left_1_pth[0], 'alpha')
+        btn_left_1_above = self._load_image(btn_left_1_pth[1], 'alpha')
+        btn_left_1_pressed = self._load_image(btn_left_1_pth[2], 'alpha')
         self.buttons['button_left_1'] = (btn_left_1_default,
                                          btn_left_1_above,
                                          btn_left_1_pressed)
 
-        btn_right_1_default = pygame.image.load(btn_right_1_pth[0])
-        btn_right_1_above = pygame.image.load(btn_right_1_pth[1])
-        btn_right_1_pressed = pygame.image.load(btn_right_1_pth[2])
+        btn_right_1_default = self._load_image(btn_right_1_pth[0], 'alpha')
+        btn_right_1_above = self._load_image(btn_right_1_pth[1], 'alpha')
+        btn_right_1_pressed = self._load_image(btn_right_1_pth[2], 'alpha')
         self.buttons['button_right_1'] = (btn_right_1_default,
                                           btn_right_1_above,
                                           btn_right_1_pressed)
 
-        btn_right_2_default = pygame.image.load(btn_right_2_pth[0])
-        btn_right_2_above = pygame.image.load(btn_right_2_pth[1])
-        btn_right_2_pressed = pygame.image.load(btn_right_2_pth[2])
+        btn_right_2_default = self._load_image(btn_right_2_pth[0], 'alpha')
+        btn_right_2_above = self._load_image(btn_right_2_pth[1], 'alpha')
+        btn_right_2_pressed = self._load_image(btn_right_2_pth[2], 'alpha')
         self.buttons['button_right_2'] = (btn_right_2_default,
                                           btn_right_2_above,
                                           btn_right_2_pressed)
@@ -215,7 +290,7 @@ class Layout(object):
         """
         Load the background image and convert it to pygame surface
         """
-        return pygame.image.load(self.elements['background']).convert()
+        return self._load_image(self.elements['background'], 'opaque')
 
     def _draw_labels(self):
         """
@@ -236,52 +311,12 @@ class Layout(object):
 
         return labels
 
-    def _draw_exit_button(self):
-        """
-        Generate the surface for the exit button
-        """
-        return self.buttons['button_exit'][self.state['button_exit']]
-
-    def _draw_buttons(self):
-        """
-        Returns the surface for the buttons
-        """
-        action_btns = self.elements['action_buttons']
-        buttons_size = action_btns['action_buttons_size']
-        button_1 = self.buttons['button_left_2'][self.state['button_left_2']]
-        button_2 = self.buttons['button_left_1'][self.state['button_left_1']]
-        button_3 = self.buttons['button_right_1'][self.state['button_right_1']]
-        button_4 = self.buttons['button_right_2'][self.state['button_right_2']]
-
-        buttons = []
-
-        buttons.append((
-                button_1,
-                action_btns['first_button']['first_button_position']))
-        buttons.append((
-                button_2,
-                action_btns['second_button']['second_button_position']))
-        buttons.append((
-                button_3,
-                action_btns['third_button']['third_button_position']))
-        buttons.append((
-                button_4,
-                action_btns['fourth_button']['fourth_button_position']))
-
-        buttons_srfc = pygame.Surface(buttons_size)
-        buttons_srfc.set_colorkey(self._color_key)
-        buttons_srfc.fill(self._color_key)
-
-        for button in buttons:
-            buttons_srfc.blit(button[0], button[1])
-
-        return buttons_srfc
-
     def change_board(self, board):
         """
         Update the board with a new state
         """
         self.board = board
+        self._board_changed = True
 
     def get_board_position(self):
         """
@@ -289,6 +324,23 @@ class Layout(object):
         """
         return self.elements['board']['board_position']
 
+    def get_timeline_rect(self):
+        """
+        Get the rect of the timeline on the main surface, or None if the
+        layout has no timeline.
+        """
+        if not 'timeline' in self.elements:
+            return None
+        timeline = self.elements['timeline']
+        return pygame.Rect(timeline['timeline_position'],
+                           timeline['timeline_size'])
+
+    def get_background(self):
+        """
+        Get the static surface drawn under the rest of elements
+        """
+        return self._static_background
+
     def get_favicon(self):
         """
         Get the surface of the favicon
@@ -388,30 +440,78 @@ class Layout(object):
 
         return back_surface
 
-    def get_surface(self, mouse=None):
+    def _set_buttons_state(self, mouse=None):
         """
-        Return the entire pygame surface with all the display
+        Changes the state of the button under the mouse, or resets all the
+        buttons if there is no mouse.
         """
-        exit_position = self.elements['exit_button']['exit_button_position']
-        action_btns = self.elements['action_buttons']
-        buttons_position = action_btns['action_buttons_position']
-        board_position = self.elements['board']['board_position']
-
-        final_surface = pygame.Surface(self.elements['window_size'])
-
         if mouse:
             self.state[mouse[0]] = mouse[1]
         else:
             for index in self.state:
                 self.state[index] = 0
-        exit_button = self._draw_exit_button()
-        if not self.interaction:
-            buttons = self._draw_buttons()
 
-        final_surface.blit(self._static_background, (0, 0))
-        final_surface.blit(self.board, board_position)
-        final_surface.blit(exit_button, exit_position)
-        if not self.interaction:
-            final_surface.blit(buttons, buttons_position)
+    def _update_buttons(self):
+        """
+        Draws on the frame only the buttons whose state changed since the
+        last time they were drawn. Returns the list of rects of the frame
+        that have changed.
+        """
+        rects = []
+        for name, rect in self._buttons_rects.items():
+            image = self.buttons[name][self.state[name]]
+            drawn = self._drawn_buttons.get(name)
+            if drawn and drawn[0] is image:
+                continue
+            area = pygame.Rect(rect.topleft, image.get_size())
+            if drawn:
+                area.union_ip(drawn[1])
+            self._frame.blit(self._static_background, area, area)
+            self._frame.blit(image, rect.topleft)
+            self._drawn_buttons[name] = (image, area)
+            rects.append(area)
+
+        return rects
+
+    def _update_frame(self):
+        """
+        Brings the frame up to date, composing the board and the buttons over
+        the static background. Returns the list of rects of the frame that
+        have changed.
+        """
+        if self._frame == None:
+            self._frame = self._static_background.copy()
+            self._drawn_buttons = {}
+            self._board_changed = True
+        rects = self._update_buttons()
+        if self._board_changed:
+            rects.append(self._frame.blit(
+                    self.board, self.elements['board']['board_position']))
+            self._board_changed = False
+
+        return rects
+
+    def draw_buttons(self, screen, mouse=None):
+        """
+        Draws the buttons directly on the screen, with the same states as
+        get_surface, but only the ones whose state changed. Returns the list
+        of rects of the screen that have been drawn.
+        """
+        self._set_buttons_state(mouse)
+        if self._frame == None:
+            rects = self._update_frame()
+        else:
+            rects = self._update_buttons()
+        for rect in rects:
+            screen.blit(self._frame, rect, rect)
+
+        return rects
+
+    def get_surface(self, mouse=None):
+        """
+        Return the entire pygame surface with all the display
+        """
+        self._set_buttons_state(mouse)
+        self._update_frame()
 
-        return final_surface
+        return self._frame
@@ -242,6 +242,13 @@ def parse_label_button(node):
     return _parse_childs(node)
 
 
+def parse_label_timeline(node):
+    """
+    Parses the timeline of the turns
+    """
+    return _parse_childs(node)
+
+
 def parse_label_child_in_label(node):  # labels with the player's name
     """
     Parses the childs of a label
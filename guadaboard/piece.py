@@ -23,8 +23,8 @@ representation.
 """
 
 import pygame
-import pygame.font
 
+from guadaboard import sprites
 from resistencia import xdg
 
 
@@ -74,9 +74,11 @@ class Piece(object):
         """This method generate a surface drawdable with the piece and
         its value.
 
-        Return a pygame.surface with the complete piece draw.
+        Return a pygame.surface with the complete piece draw. The image
+        and the fonts are taken from the sprites cache, but the surface is
+        drawn on every call: use get_sprite to draw it only once.
         """
-        image = pygame.image.load(self.img_path).convert()
+        image = sprites.load_image(self.img_path)
         size = (self.size, ) * 2  # This gives a pair (self.size, self.size)
 
         surface = pygame.Surface(size).convert()
@@ -87,8 +89,8 @@ class Piece(object):
             color = (255, ) * 3  # White
             border_color = (0, ) * 3  # Black
 
-            border = pygame.font.Font(self.font, 34)
-            insider = pygame.font.Font(self.font, 32)
+            border = sprites.get_font(self.font, 34)
+            insider = sprites.get_font(self.font, 32)
 
             if self.covered == 0:
                 if not self.hidden:
@@ -111,3 +113,10 @@ class Piece(object):
                 surface.blit(insider_text, textpos)
 
         return surface
+
+    def get_sprite(self):
+        """
+        Returns a pair (surface, rect) with the area of the sprites atlas
+        where the piece is drawn, drawing it only the first time.
+        """
+        return sprites.get_piece(self)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides a lazy access to the turns of a game record. On open only the
+offsets of the turns are indexed, and every board is decoded when it is
+needed. The last decoded boards are kept on a small cache, and a background
+thread decodes in advance the neighbours of the turn shown, so moving
+through the turns doesn't wait for the file.
+"""
+
+import threading
+
+from libguadalete import file_parser
+
+#Number of boards kept decoded
+__default_cache_size__ = 64
+#Number of turns decoded in advance on both sides of the actual one
+__default_prefetch__ = 4
+
+
+class LRUCache(object):
+    """
+    A dictionary of limited size that forgets its least recently used keys
+    """
+    def __init__(self, size):
+        self.size = size
+        self._values = {}
+        self._order = []
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def get(self, key, default=None):
+        """
+        Returns the value of the key, marking it as the most recently used
+        """
+        if not key in self._values:
+            return default
+        self._order.remove(key)
+        self._order.append(key)
+        return self._values[key]
+
+    def put(self, key, value):
+        """
+        Adds a value to the cache, removing the least recently used one if
+        it is full
+        """
+        if key in self._values:
+            self._order.remove(key)
+        elif len(self._order) >= self.size:
+            del self._values[self._order.pop(0)]
+        self._values[key] = value
+        self._order.append(key)
+
+    def clear(self):
+        """
+        Empties the cache
+        """
+        self._values.clear()
+        del self._order[:]
+
+
+class RecordReader(object):
+    """
+    Sequence of the boards of a game record, decoded on demand
+    """
+    def __init__(self, src_file, cache_size=__default_cache_size__,
+                 prefetch=__default_prefetch__):
+        self.src_file = src_file
+        self.index = file_parser.index_file(src_file)
+        self.prefetch = prefetch
+
+        self._file = open(src_file, 'rb')
+        self._boards = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self._wanted = threading.Condition(threading.Lock())
+        self._next_turn = None
+        self._closed = False
+        self._thread = None
+        if prefetch > 0:
+            self._thread = threading.Thread(target=self._prefetch_loop)
+            self._thread.setDaemon(True)
+            self._thread.start()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, turn):
+        if turn < 0:
+            turn += len(self.index)
+        if turn < 0 or turn >= len(self.index):
+            raise IndexError('turn out of range')
+        board = self.get_board(turn)
+        self._request_prefetch(turn)
+        return board
+
+    def get_board(self, turn, cache=True):
+        """
+        Returns the board of a turn, decoding it if it isn't on the cache.
+        Unlike indexing the reader, its neighbours are not decoded in
+        advance, and the board can be left out of the cache.
+        """
+        self._lock.acquire()
+        try:
+            board = self._boards.get(turn)
+            if board == None:
+                board = file_parser.read_turn(self._file, self.index[turn])
+                if cache:
+                    self._boards.put(turn, board)
+            return board
+        finally:
+            self._lock.release()
+
+    def _request_prefetch(self, turn):
+        """
+        Asks the background thread to decode the neighbours of a turn
+        """
+        if self._thread == None:
+            return
+        self._wanted.acquire()
+        self._next_turn = turn
+        self._wanted.notify()
+        self._wanted.release()
+
+    def _prefetch_loop(self):
+        """
+        Body of the background thread
+        """
+        while True:
+            self._wanted.acquire()
+            while self._next_turn == None and not self._closed:
+                self._wanted.wait()
+            turn = self._next_turn
+            self._next_turn = None
+            self._wanted.release()
+            if self._closed:
+                return
+
+            for offset in range(1, self.prefetch + 1):
+                if not self._next_turn == None:
+                    break  # the turn shown changed meanwhile
+                for neighbour in (turn + offset, turn - offset):
+                    if 0 <= neighbour < len(self.index) and \
+                            not neighbour in self._boards:
+                        self.get_board(neighbour)
+
+    def get_winner(self):
+        """
+        Returns the result of the game, checking its last board
+        """
+        return file_parser.get_winner(self[-1])
+
+    def close(self):
+        """
+        Stops the background thread and closes the record
+        """
+        self._wanted.acquire()
+        self._closed = True
+        self._wanted.notify()
+        self._wanted.release()
+        if not self._thread == None:
+            self._thread.join()
+        self._file.close()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides a process-wide cache of the images, fonts and pieces drawn on the
+boards, so moving through the turns of a game doesn't load the images and
+the fonts from disk again.
+
+Every variant of a piece is rendered once and kept on an atlas: a single
+surface, one for every size of tile, where the pieces are placed on a
+grid. The boards are drawn blitting areas of the atlas.
+"""
+
+import pygame
+import pygame.font
+
+#Number of pieces on every row of an atlas
+_atlas_columns = 16
+
+_images = {}
+_fonts = {}
+_atlases = {}
+
+def load_image(path):
+    """
+    Returns the surface of an image, loading it only the first time
+    """
+    if not path in _images:
+        _images[path] = pygame.image.load(path).convert()
+    return _images[path]
+
+def get_font(path, size):
+    """
+    Returns a font, creating it only the first time
+    """
+    key = (path, size)
+    if not key in _fonts:
+        _fonts[key] = pygame.font.Font(path, size)
+    return _fonts[key]
+
+class SpriteAtlas(object):
+    """
+    Class that keeps the pieces of a size on a single surface
+    """
+    def __init__(self, size, columns=_atlas_columns):
+        self.size = size
+        self.columns = columns
+        self.surface = None
+        #Formed by key -> pygame.Rect of the piece on the surface
+        self.rects = {}
+
+    def _grow(self):
+        """
+        Adds a row to the surface, keeping the pieces already drawn
+        """
+        rows = 1
+        if not self.surface == None:
+            rows = self.surface.get_height() / self.size + 1
+        surface = pygame.Surface((self.columns * self.size,
+                                  rows * self.size)).convert()
+        if not self.surface == None:
+            surface.blit(self.surface, (0, 0))
+        self.surface = surface
+
+    def get(self, key, render):
+        """
+        Returns a pair (surface, rect) with the area of the atlas where the
+        piece is. If it's a new one, it's drawn with the function render,
+        that returns its surface.
+        """
+        if not key in self.rects:
+            slot = len(self.rects)
+            row, column = divmod(slot, self.columns)
+            if self.surface == None or \
+                    (row + 1) * self.size > self.surface.get_height():
+                self._grow()
+            rect = pygame.Rect(column * self.size, row * self.size,
+                               self.size, self.size)
+            self.surface.blit(render(), rect)
+            self.rects[key] = rect
+        return (self.surface, self.rects[key])
+
+def get_piece(piece):
+    """
+    Returns the pair (surface, rect) of the atlas where a piece.Piece is
+    drawn. The pieces are identified by their image, value, state and size.
+    """
+    size = piece.get_size()
+    if not size in _atlases:
+        _atlases[size] = SpriteAtlas(size)
+    key = (piece.img_path, piece.value, piece.covered, piece.hidden,
+           piece.font)
+    return _atlases[size].get(key, piece.get_surface)
+
+def clear():
+    """
+    Empties the cache, so the surfaces are converted again for a new
+    display
+    """
+    _images.clear()
+    _fonts.clear()
+    _atlases.clear()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the thumbnails of the final boards of the games, drawn with
+board.Board and scaled down. They are stored on the cache directory, named
+by the hash of the content of the record, so a thumbnail is drawn only once
+for every game.
+
+The thumbnails are drawn on a pool of processes with the hidden display of
+the export module, so the interface is never blocked by them.
+"""
+
+import os
+import multiprocessing
+
+import pygame
+
+from guadaboard import board, export
+from libguadalete import file_parser
+from resistencia import xdg
+from resistencia.xdg import get_data_path as xdg_data_path
+
+__default_thumbnails_dir__ = os.path.join(xdg.get_cache_dir(), 'thumbnails')
+__default_thumbnail_size__ = 64
+
+
+def get_thumbnail_file(record_hash,
+                       thumbnails_dir=__default_thumbnails_dir__):
+    """
+    Returns the path of the thumbnail of a record given the hash of its
+    content
+    """
+    return os.path.join(thumbnails_dir, record_hash + '.png')
+
+
+def render_thumbnail(src_file, thumbnail_file,
+                     size=__default_thumbnail_size__,
+                     team_a=xdg_data_path('images/piece-orange.png'),
+                     team_b=xdg_data_path('images/piece-violete.png'),
+                     path_piece_def=xdg_data_path('images/piece-default.png')):
+    """
+    Draws the final board of a record on a PNG file. The display must be
+    initialized with export.init_display. Returns the path of the file.
+    """
+    turns = file_parser.index_file(src_file)
+    f_record = open(src_file, 'rb')
+    last_board = file_parser.read_turn(f_record, turns[-1])
+    f_record.close()
+
+    final = board.Board(last_board, team_a, team_b, path_piece_def)
+    surface = pygame.transform.smoothscale(final.get_surface(), (size, size))
+    # other process could be drawing the same thumbnail
+    tmp_file = '%s.%d.png' % (thumbnail_file, os.getpid())
+    pygame.image.save(surface, tmp_file)
+    os.rename(tmp_file, thumbnail_file)
+    return thumbnail_file
+
+
+class ThumbnailPool(object):
+    """
+    Class that draws the thumbnails that are not on the cache on a pool of
+    processes
+    """
+    def __init__(self, processes=None,
+                 thumbnails_dir=__default_thumbnails_dir__,
+                 size=__default_thumbnail_size__):
+        self.thumbnails_dir = thumbnails_dir
+        self.size = size
+        if not os.path.exists(thumbnails_dir):
+            os.makedirs(thumbnails_dir)
+
+        self.pool = multiprocessing.Pool(processes, export.init_display)
+        #Formed by record hash -> multiprocessing.AsyncResult
+        self.pending = {}
+        self.failed = set()
+
+    def request(self, src_file, record_hash):
+        """
+        Returns the path of the thumbnail of a record if it's on the cache.
+        Otherwise it's drawn on the pool and None is returned.
+        """
+        thumbnail_file = get_thumbnail_file(record_hash, self.thumbnails_dir)
+        if os.path.exists(thumbnail_file):
+            return thumbnail_file
+        if not (record_hash in self.pending or record_hash in self.failed):
+            self.pending[record_hash] = self.pool.apply_async(
+                render_thumbnail, (src_file, thumbnail_file, self.size))
+        return None
+
+    def get_finished(self):
+        """
+        Returns the list of pairs (record hash, thumbnail path) of the
+        thumbnails drawn since the last call. The ones that failed are not
+        asked again.
+        """
+        finished = []
+        for record_hash, result in self.pending.items():
+            if result.ready():
+                del self.pending[record_hash]
+                if result.successful():
+                    finished.append((record_hash, result.get()))
+                else:
+                    self.failed.add(record_hash)
+        return finished
+
+    def terminate(self):
+        """
+        Stops the pool, discarding the thumbnails not drawn yet
+        """
+        self.pool.terminate()
+        self.pool.join()
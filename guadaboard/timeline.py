@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the timeline of the replay viewer: a slider that jumps to any turn
+of the game, and a preview of the turns while it is dragged.
+
+The previews come from a strip of small thumbnails of the game, with one
+thumbnail for every pixel of the slider at most, drawn on a background
+thread. The main loop is told when a thumbnail is ready with a
+THUMBNAIL_EVENT, so it never waits for them.
+"""
+
+import threading
+
+import pygame
+
+from guadaboard import board
+
+THUMBNAIL_EVENT = pygame.USEREVENT + 2
+
+#Colors of the slider
+_track_color = (90, 90, 90)
+_played_color = (200, 160, 60)
+_knob_color = (250, 250, 250)
+
+#Size of the previews and space between them and the slider
+__default_thumbnail_size__ = 80
+_preview_margin = 6
+
+
+class Timeline(object):
+    """
+    Class that draws the slider of the turns and its previews
+    """
+    def __init__(self, get_board, num_turns, rect, background,
+                 thumbnail_size=__default_thumbnail_size__):
+        """
+        Keywords arguments:
+        get_board -- Function that returns the board of a turn. It's
+        called from the background thread
+        num_turns -- Number of turns of the game
+        rect -- The pygame.Rect of the slider on the screen
+        background -- The surface drawn under the slider and the previews
+        thumbnail_size -- Width and height of the previews
+        """
+        self.get_board = get_board
+        self.num_turns = num_turns
+        self.rect = rect
+        self.background = background
+        self.thumbnail_size = thumbnail_size
+
+        self._slots = max(1, min(num_turns, rect.width))
+        self._thumbnails = [None] * self._slots
+        self._preview_rect = None
+
+        self._wanted = threading.Condition(threading.Lock())
+        self._next_slot = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._render_loop)
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+    def collide(self, point):
+        """
+        Checks if a point is on the slider
+        """
+        return self.rect.collidepoint(point)
+
+    def get_turn_at(self, x_pos):
+        """
+        Returns the turn at a horizontal position of the screen
+        """
+        if self.num_turns < 2 or self.rect.width < 2:
+            return 0
+        offset = min(max(x_pos - self.rect.left, 0), self.rect.width - 1)
+        return offset * (self.num_turns - 1) / (self.rect.width - 1)
+
+    def _get_x(self, turn):
+        """
+        Returns the horizontal position of a turn on the screen
+        """
+        if self.num_turns < 2:
+            return self.rect.left
+        return self.rect.left + \
+            turn * (self.rect.width - 1) / (self.num_turns - 1)
+
+    def _get_slot(self, turn):
+        """
+        Returns the thumbnail used to preview a turn
+        """
+        return turn * self._slots / self.num_turns
+
+    def _get_slot_turn(self, slot):
+        """
+        Returns the turn drawn on a thumbnail
+        """
+        return slot * self.num_turns / self._slots
+
+    def _render_loop(self):
+        """
+        Body of the background thread. It draws the thumbnails in order,
+        starting on the last one asked by get_thumbnail.
+        """
+        while True:
+            self._wanted.acquire()
+            while self._next_slot == None and not self._closed:
+                self._wanted.wait()
+            slot = self._next_slot
+            self._next_slot = None
+            self._wanted.release()
+            if self._closed:
+                return
+
+            for i in range(self._slots):
+                if not self._next_slot == None or self._closed:
+                    break  # other thumbnail was asked meanwhile
+                actual = (slot + i) % self._slots
+                if self._thumbnails[actual] == None:
+                    state = self.get_board(self._get_slot_turn(actual))
+                    self._thumbnails[actual] = board.get_thumbnail(
+                        state, self.thumbnail_size)
+                    if i == 0:
+                        pygame.event.post(pygame.event.Event(
+                                THUMBNAIL_EVENT, slot=actual))
+
+    def get_thumbnail(self, turn):
+        """
+        Returns the preview of a turn. If it isn't drawn yet, it's asked
+        to the background thread and None is returned.
+        """
+        slot = self._get_slot(turn)
+        thumbnail = self._thumbnails[slot]
+        if thumbnail == None:
+            self._wanted.acquire()
+            self._next_slot = slot
+            self._wanted.notify()
+            self._wanted.release()
+        return thumbnail
+
+    def draw(self, screen, turn, preview=False):
+        """
+        Draws the slider at a turn on the screen, and optionally its
+        preview over the slider. Returns the list of rects of the screen
+        that have been drawn.
+        """
+        rects = [self.rect]
+        if not self._preview_rect == None:
+            screen.blit(self.background, self._preview_rect,
+                        self._preview_rect)
+            rects.append(self._preview_rect)
+            self._preview_rect = None
+
+        screen.blit(self.background, self.rect, self.rect)
+        track = pygame.Rect(self.rect.left, self.rect.centery - 2,
+                            self.rect.width, 4)
+        screen.fill(_track_color, track)
+        knob_x = self._get_x(turn)
+        track.width = knob_x - self.rect.left
+        screen.fill(_played_color, track)
+        screen.fill(_knob_color, (knob_x - 3, self.rect.top, 6,
+                                  self.rect.height))
+
+        if preview:
+            thumbnail = self.get_thumbnail(turn)
+            if not thumbnail == None:
+                width, height = thumbnail.get_size()
+                left = min(max(knob_x - width / 2, 0),
+                           screen.get_width() - width)
+                top = self.rect.top - height - _preview_margin
+                self._preview_rect = screen.blit(thumbnail, (left, top))
+                rects.append(self._preview_rect)
+
+        return rects
+
+    def close(self):
+        """
+        Stops the background thread
+        """
+        self._wanted.acquire()
+        self._closed = True
+        self._wanted.notify()
+        self._wanted.release()
+        self._thread.join()
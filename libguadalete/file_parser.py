@@ -20,8 +20,14 @@
 
 import os
 
+import timing
+
 max_value = 6
 
+#Lines of the header of a record start with this mark, and are ignored
+#when the boards are parsed
+header_mark = '#'
+
 def __fill_matrix(x=8, y=8, value=0):
     """
     Simply fill a matrix with the same value.
@@ -66,6 +72,108 @@ def __define_winner(board):
     else:
         return -1
 
+def __put_piece(board, line):
+    """
+    Puts on the board the piece described by a line of a record.
+    """
+    pos_e = line.find("e")
+    pos_id = line.find("n")
+    pos_val = line.find("p")
+    pos_x = line.find("x")
+    pos_y = line.find("y")
+    pos_d = line.find("d")
+
+    e = line[pos_e+2:pos_id-1]
+    val = line[pos_val+2:pos_x-1]
+    x = line[pos_x+2:pos_y-1]
+    y = line[pos_y+2:pos_d-1]
+    d = line[pos_d+2:]
+
+    if e == 'A':
+        board[int(y) - 1][int(x) - 1] = int(val) + (int(d)*max_value)
+    else:
+        board[int(y) - 1][int(x) - 1] = int(val) - 2*int(val) - (int(d)*max_value)
+
+def get_winner(last_board):
+    """
+    Returns the result of a game given its last board: 0 if it's a draw,
+    1 if the first team won and -1 if the second team won.
+    """
+    return __define_winner(last_board)
+
+def index_file(src_file):
+    """
+    Returns the index of the turns of a record, without parsing them.
+    Every turn is a pair (start, end) with the offsets of its lines on the
+    file, so it can be read later with read_turn.
+    """
+    f = open(src_file, 'rb')
+
+    index = []
+    start = None
+    offset = 0
+    for line in f:
+        if (line == "tiempo\n" or line == "fin\n"):
+            if not start == None:
+                index.append((start, offset))
+            start = offset + len(line)
+        offset += len(line)
+
+    f.close()
+    return index
+
+def read_turn(f_record, span):
+    """
+    Returns the board of a turn of a record.
+
+    Keywords arguments:
+    f_record -- File object of the record, opened to read.
+    span -- The pair (start, end) of the turn, taken from index_file.
+    """
+    f_record.seek(span[0])
+    data = f_record.read(span[1] - span[0])
+
+    board = __fill_matrix()
+    for line in data.splitlines(True):
+        if line.startswith(header_mark):
+            continue
+        if (line != "\n" and len(line) > 5):
+            __put_piece(board, line)
+
+    return board
+
+def write_header(f_record, header):
+    """
+    Write the header of a game record.
+
+    Keywords arguments:
+    f_record -- File object of the record, opened to write.
+    header -- List of (key, value) pairs, like [('seed', 1234), ...]
+    """
+    for key, value in header:
+        f_record.write('%s %s %s\n' % (header_mark, key, value))
+
+def read_header(src_file):
+    """
+    Returns a dictionary with the header of a game record. Old records
+    have no header, so an empty dictionary is returned for them.
+    """
+    f = open(src_file)
+
+    header = {}
+    for line in f:
+        if not line.startswith(header_mark):
+            break
+        content = line[len(header_mark):].strip()
+        separator = content.find(' ')
+        if separator == -1:
+            header[content] = ''
+        else:
+            header[content[:separator]] = content[separator + 1:]
+
+    f.close()
+    return header
+
 def parse_temp_file(src_file):
     f = open(src_file)
 
@@ -75,6 +183,8 @@ def parse_temp_file(src_file):
     keys = []
 
     for line in f:
+        if line.startswith(header_mark):
+            continue
         if (line == "tiempo\n"):
             if len(board) == 0:
                 board = __fill_matrix()
@@ -133,11 +243,11 @@ def parse_file(src_file):
     are turn of the game. Second element is an integer that indicates the
     result of the game
     """
+    timing.start('parse')
     f = open(src_file)
     
     line = "0" #line value not null for the loop
     
-    values = {}
     entire_game = []
     counter = 0
     
@@ -152,29 +262,13 @@ def parse_file(src_file):
                 counter += 1
                 del board
                 board = __fill_matrix() #restart the board from 0
+        elif line.startswith(header_mark):
+            continue
         else:
             if (line != "\n" and len(line) > 5):
-                pos_e = line.find("e")
-                pos_id = line.find("n")
-                pos_val = line.find("p")
-                pos_x = line.find("x")
-                pos_y = line.find("y")
-                pos_d = line.find("d")
-                    
-                e = line[pos_e+2:pos_id-1]
-                id = line[pos_id+2:pos_val-1]
-                val = line[pos_val+2:pos_x-1]
-                x = line[pos_x+2:pos_y-1]
-                y = line[pos_y+2:pos_d-1]
-                d = line[pos_d+2:]
-                
-                values[id] = val
-                
-                if e == 'A':
-                    board[int(y) - 1][int(x) - 1] = int(val) + (int(d)*max_value)
-                else:
-                    board[int(y) - 1][int(x) - 1] = int(val) - 2*int(val) - (int(d)*max_value)
-                
+                __put_piece(board, line)
+
     f.close()
     winner = __define_winner(entire_game[len(entire_game)-1])
+    timing.stop('parse')
     return entire_game, winner
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides an index of the records of the games kept on a directory, with the
+teams, the result and the number of turns of every game, so they can be
+listed without parsing them. The index is stored on the cache directory,
+and only the records that are new or were modified since the last update
+are read again.
+"""
+
+import hashlib
+import json
+import os
+
+import file_parser
+
+from resistencia import filenames, xdg
+
+__default_index_file__ = os.path.join(xdg.get_cache_dir(),
+                                      'games_index.json')
+
+def get_record_hash(src_file):
+    """
+    Returns the SHA1 hash of the content of a record
+    """
+    sha = hashlib.sha1()
+    f_record = open(src_file, 'rb')
+    data = f_record.read(65536)
+    while data:
+        sha.update(data)
+        data = f_record.read(65536)
+    f_record.close()
+    return sha.hexdigest()
+
+def read_record(src_file):
+    """
+    Returns the entry of the index for a record, or None if it has no
+    turns. Only the last turn of the game is parsed.
+    """
+    turns = file_parser.index_file(src_file)
+    if len(turns) == 0:
+        return None
+    f_record = open(src_file, 'rb')
+    last_board = file_parser.read_turn(f_record, turns[-1])
+    f_record.close()
+
+    status = os.stat(src_file)
+    team_a, team_b = filenames.extract_names_from_file(src_file)
+    return {'mtime': status.st_mtime, 'size': status.st_size,
+            'hash': get_record_hash(src_file), 'team_a': team_a,
+            'team_b': team_b, 'winner': file_parser.get_winner(last_board),
+            'turns': len(turns)}
+
+class GamesIndex(object):
+    """
+    Class that keeps the entries of the records of a directory. Every entry
+    is a dictionary with the mtime and size of the record, the hash of its
+    content, the names of both teams, the winner and the number of turns.
+    """
+    def __init__(self, games_path, index_file=__default_index_file__):
+        self.games_path = games_path
+        self.index_file = index_file
+        #Formed by record path -> entry
+        self.entries = {}
+
+        if os.path.exists(self.index_file):
+            f_index = open(self.index_file, 'r')
+            try:
+                self.entries = json.load(f_index)['entries']
+            except (ValueError, KeyError):
+                self.entries = {}
+            f_index.close()
+
+    def update(self, callback=None):
+        """
+        Reads the records of the directory that are not on the index or
+        changed, and removes the ones that don't exist anymore. Returns
+        the number of records read.
+
+        Keywords arguments:
+        callback -- Function called with the path and the entry of every
+        record as soon as it is checked, the newest record first
+        """
+        records = []
+        for name in os.listdir(self.games_path):
+            if name.endswith('.txt'):
+                src_file = os.path.join(self.games_path, name)
+                records.append((os.stat(src_file), src_file))
+        records.sort(key=lambda record: record[0].st_mtime, reverse=True)
+
+        entries = {}
+        read = 0
+        for status, src_file in records:
+            entry = self.entries.get(src_file)
+            if entry == None or not entry['mtime'] == status.st_mtime or \
+                    not entry['size'] == status.st_size:
+                entry = read_record(src_file)
+                read = read + 1
+            if not entry == None:
+                entries[src_file] = entry
+                if not callback == None:
+                    callback(src_file, entry)
+        self.entries = entries
+        return read
+
+    def get_games(self):
+        """
+        Returns the list of pairs (record path, entry), the newest first
+        """
+        games = self.entries.items()
+        games.sort(key=lambda game: game[1]['mtime'], reverse=True)
+        return games
+
+    def save(self):
+        """
+        Write the index to disk. A temporal file is renamed over the old one,
+        so a reader never finds the file half written.
+        """
+        tmp_file = '%s.%d' % (self.index_file, os.getpid())
+        f_index = open(tmp_file, 'w')
+        json.dump({'entries': self.entries}, f_index)
+        f_index.close()
+        os.rename(tmp_file, self.index_file)
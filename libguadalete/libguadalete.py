@@ -18,18 +18,51 @@
 # Copyright(C) 2009,2010 Pablo Recio Quijano <pablo.recioquijano@alum.uca.es> #
 ###############################################################################
 
+import errno
+import hashlib
 import os
 import random
+import shutil
 import sys
+import time
 #sys.path.append("./libguadalete")
 
 import clips
 
 import funciones, f1, mover, texto, traducirF, traducirM, fA, fB, mirroring
+import file_parser
+import profiler
+import timing
 
 from resistencia import configure, filenames
 from resistencia.nls import gettext as _
 
+#Version of the simulation kernel. It must be increased whenever a change
+#can make a game end in a different way, so stored results are not reused.
+__engine_version__ = '1'
+
+#Greatest seed accepted by the clips random generator
+__max_seed__ = 2147483647
+
+def generate_seed():
+    """
+    Returns a new random seed for a game
+    """
+    return random.SystemRandom().randint(0, __max_seed__)
+
+def derive_seed(seed, *indexes):
+    """
+    Given the seed of a set of games (a round, a test suite...) and the
+    position of a game in it, returns the seed of that game. It's the same
+    on every run and platform, so the whole set can be reproduced from its
+    seed. If the seed is None, None is returned and every game will use a
+    random one.
+    """
+    if seed == None:
+        return None
+    key = '-'.join([str(seed)] + [str(i) for i in indexes])
+    return int(hashlib.sha1(key).hexdigest()[:8], 16) % (__max_seed__ + 1)
+
 class Error(Exception):
     """Base class for exceptions in this module."""
     pass
@@ -51,19 +84,27 @@ class LibGuadalete(object):
     simulation of 'La batalla del Guadalete', generating a file
     that can be parsered easily.
     """
-    def __init__(self, teamA, teamB, number_turns=100, teams_path = '../teams'):
+    def __init__(self, teamA, teamB, number_turns=100, teams_path = '../teams',
+                 seed=None, profile=None):
         """Class initializator.
 
         Keywords arguments:
         teamA -- Tuple with paths to the rule file and formation file for the A team.
         teamB -- Tuple with paths to the rule file and formation file for the B team.
         teams_path -- Path to the directory that teams are stored by default
+        seed -- Seed for the random strategy of clips. If it's None, a
+        random one is generated. It is written on the header of the record,
+        so the game can be reproduced.
+        profile -- If a profiler.Profile is given, the game is run with the
+        profiler, adding to it the rules fired.
         """
         self.teamA = teamA
         self.teamB = teamB
         self.teams_path = teams_path
         self.max_value = 6
         self.number_turns = number_turns
+        self.seed = seed
+        self.profile = profile
 
         if not os.path.exists(configure.__file_path__):
             configure.generate_configuration_file()
@@ -74,13 +115,17 @@ class LibGuadalete(object):
         This function loads differents modules and create an environment that provides
         the proper context where a game can be played.
         """
+        timing.start('clear')
         clips.Eval('(clear)')
         
         clips.EngineConfig.Strategy = clips.RANDOM_STRATEGY
 
-        random.seed()
-        clips.Eval("(seed " + str(random.randint(0,9999)) + ")") 
+        if self.seed == None:
+            self.seed = generate_seed()
+        clips.Eval("(seed " + str(self.seed) + ")") 
+        timing.stop('clear')
 
+        timing.start('functions')
         funciones.LoadFunctions(clips)
         f1.init_world(clips, self.number_turns)
         f1.LoadFunctions(clips)
@@ -88,9 +133,13 @@ class LibGuadalete(object):
         texto.LoadFunctions(clips)
         traducirF.LoadFunctions(clips)
         traducirM.LoadFunctions(clips)
+        timing.stop('functions')
 
         #print self.teams_path + "/equipo" + self.teamA + ".clp"
+        timing.start('mirroring')
         temp_team = mirroring.mirroring_team(self.teamB[1])
+        timing.stop('mirroring')
+        timing.start('load')
         print _('Loading ') + self.teamA[1]
         #create a temporally file that mirror the formation of B team,
         #because it's written thinking in A team
@@ -113,7 +162,11 @@ class LibGuadalete(object):
             clips.Load(self.teamA[0])
         except clips.ClipsError:
             raise FileError(_('Error parsing the file ') +  self.teamA[0])
+        timing.stop('load')
+        timing.start('mirroring')
         temp_rules = mirroring.mirroring_rules(self.teamB[0])
+        timing.stop('mirroring')
+        timing.start('load')
         #same thing that for the formation, but this time using the rules
         fB.LoadFunctions(clips)
         print _('Loading ') + self.teamB[0]
@@ -124,15 +177,25 @@ class LibGuadalete(object):
             raise FileError(_('Error parsing the file ') +  self.teamB[0])
         
         os.remove(temp_rules)
+        timing.stop('load')
 
+        timing.start('reset')
         clips.Reset() #restart the environment
+        timing.stop('reset')
 
-        clips.Run() #start the simulation
+        timing.start('run')
+        if self.profile == None:
+            clips.Run() #start the simulation
+        else:
+            profiler.run(clips, self.profile)
+        timing.stop('run')
+        timing.start('output')
         t = clips.StdoutStream.Read() #print the output
         f = clips.FactList()
 
         last_fact = f[len(f)-1].PPForm()
         prev_last_fact = f[len(f)-2].PPForm()
+        timing.stop('output')
 
         winner = self.__define_winner(last_fact, prev_last_fact)
 
@@ -145,24 +208,57 @@ class LibGuadalete(object):
 
         Return a string like 'game_YYYY-MM-DD_hh:mm:ss_teamA-vs-teamB.txt'
         """
-        des = filenames.generate_filename('game',
-                                          (self.teamA, self.teamB))
-
+        timing.start('config')
         base_path = configure.load_configuration()['games_path']
-
-        return base_path + '/' + des
+        timing.stop('config')
+
+        #The file is created here, so other simulation running at the same
+        #time can't take the same name: it waits for the next second instead
+        while True:
+            des = base_path + '/' + filenames.generate_filename(
+                'game', (self.teamA, self.teamB))
+            try:
+                os.close(os.open(des, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return des
+            except OSError as exc:
+                if not exc.errno == errno.EEXIST:
+                    raise
+                time.sleep(0.2)
 
     def __renameOutputFile(self,des):
         """
-        Simple function that rename the output file named 'resultado.txt'
-        to the proper filename with the date, names and so on.
+        Simple function that moves the output file named 'resultado.txt'
+        to the proper filename with the date, names and so on, writing
+        before the header with everything needed to reproduce the game.
         """
+        timing.start('rename')
         src = "resultado.txt"
-        f = open(src,"a")
-        f.write("fin\n")
         print "src: " + src
         print "des: " + des
-        os.rename(src, des)
+        f_src = open(src, "r")
+        f_des = open(des, "w")
+        file_parser.write_header(f_des, self.get_header())
+        shutil.copyfileobj(f_src, f_des)
+        f_des.write("fin\n")
+        f_des.close()
+        f_src.close()
+        os.remove(src)
+        timing.stop('rename')
+
+    def get_header(self):
+        """
+        Returns the list of (key, value) pairs written on the header of the
+        record of the game.
+        """
+        return [('seed', self.seed),
+                ('turns', self.number_turns),
+                ('engine', __engine_version__),
+                ('rules_a', self.teamA[0]),
+                ('formation_a', self.teamA[1]),
+                ('hash_a', filenames.get_team_hash(self.teamA)),
+                ('rules_b', self.teamB[0]),
+                ('formation_b', self.teamB[1]),
+                ('hash_b', filenames.get_team_hash(self.teamB))]
 
     def __define_winner(self, last_fact, prev_last_fact):
         """
@@ -197,3 +293,46 @@ class LibGuadalete(object):
         self.__renameOutputFile(des)
 
         return des, winner
+
+def replay_record(src_file):
+    """Simulates again the game stored on a record, using the teams, seed
+    and number of turns written on its header.
+
+    Returns a pair with a boolean that indicates if the same game was
+    generated, and the path to the record of the new simulation.
+    """
+    header = file_parser.read_header(src_file)
+    if not 'seed' in header:
+        raise FileError(_('The record has no seed, it can not be reproduced'))
+    for key in ('rules_a', 'formation_a', 'hash_a', 'rules_b', 'formation_b',
+                'hash_b', 'turns'):
+        if not key in header:
+            # human games only record the seed and the turns
+            raise FileError(_('The record cannot be reproduced, its header '
+                              'has no ') + key)
+
+    team_a = (header['rules_a'], header['formation_a'])
+    team_b = (header['rules_b'], header['formation_b'])
+    for team, key in ((team_a, 'hash_a'), (team_b, 'hash_b')):
+        if not filenames.get_team_hash(team) == header[key]:
+            raise FileError(_('The files of the team have changed ') +
+                            team[0])
+
+    lib = LibGuadalete(team_a, team_b, int(header['turns']),
+                       seed=int(header['seed']))
+    out_file, winner = lib.run_game()
+
+    recorded_game = file_parser.parse_file(src_file)
+    new_game = file_parser.parse_file(out_file)
+
+    return (recorded_game == new_game, out_file)
+
+def verify_record(src_file):
+    """
+    Checks that a record is reproduced exactly by the actual kernel. The
+    record of the new simulation is removed.
+    """
+    reproduced, out_file = replay_record(src_file)
+    os.remove(out_file)
+
+    return reproduced
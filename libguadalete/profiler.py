@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the profiler of the simulations, so the authors of the teams can
+see which of their rules fire, how many times and how much time they take.
+
+On a profiled game the kernel is run one rule at a time, watching the
+rules, so the rule fired on every step is read from the trace and the time
+of the step is added to it and to its module. The size of the agenda is
+taken at the beginning of every turn. The profiles of several games are
+added together to get the report.
+"""
+
+import os
+import re
+import time
+
+import libguadalete
+
+#Rule of the main module that fires once on every turn
+_turn_rule = 'control-y-tiempo'
+
+_fire_re = re.compile(r'FIRE\s+\d+\s+([^\s:]+(?:::[^\s:]+)?)')
+
+def _split_rule(rule):
+    """
+    Returns the module and the name of a rule, being MAIN the module of the
+    rules written without it
+    """
+    if '::' in rule:
+        return tuple(rule.split('::', 1))
+    return ('MAIN', rule)
+
+def _agenda_size(clips):
+    """
+    Returns the number of activations on the agenda of the actual module
+    """
+    size = 0
+    activation = clips.InitialActivation()
+    while not activation == None:
+        size = size + 1
+        activation = activation.Next()
+
+    return size
+
+class Profile(object):
+    """
+    Class that stores the firings, times and agenda sizes of one or more
+    games
+    """
+    def __init__(self):
+        #Formed by rule -> [firings, seconds]
+        self.rules = {}
+        #Formed by module -> seconds
+        self.modules = {}
+        self.agenda_sizes = []
+        self.games = 0
+        self.seconds = 0.0
+
+    def add_firing(self, rule, seconds):
+        """
+        Adds a firing of a rule and the time it took
+        """
+        entry = self.rules.setdefault(rule, [0, 0.0])
+        entry[0] = entry[0] + 1
+        entry[1] = entry[1] + seconds
+        module = _split_rule(rule)[0]
+        self.modules[module] = self.modules.get(module, 0.0) + seconds
+        self.seconds = self.seconds + seconds
+
+    def add_turn(self, agenda_size):
+        """
+        Adds the size of the agenda at the beginning of a turn
+        """
+        self.agenda_sizes.append(agenda_size)
+
+    def merge(self, profile):
+        """
+        Adds the data of other profile to this one
+        """
+        for rule in profile.rules:
+            entry = self.rules.setdefault(rule, [0, 0.0])
+            entry[0] = entry[0] + profile.rules[rule][0]
+            entry[1] = entry[1] + profile.rules[rule][1]
+        for module in profile.modules:
+            self.modules[module] = self.modules.get(module, 0.0) + \
+                profile.modules[module]
+        self.agenda_sizes.extend(profile.agenda_sizes)
+        self.games = self.games + profile.games
+        self.seconds = self.seconds + profile.seconds
+
+    def get_rules(self):
+        """
+        Returns a list of (rule, firings, seconds) sorted by the time spent
+        """
+        rules = []
+        for rule in self.rules:
+            rules.append((rule, self.rules[rule][0], self.rules[rule][1]))
+        rules.sort(key=lambda r: (-r[2], -r[1], r[0]))
+        return rules
+
+    def get_modules(self):
+        """
+        Returns a list of (module, seconds) sorted by the time spent
+        """
+        modules = self.modules.items()
+        modules.sort(key=lambda m: (-m[1], m[0]))
+        return modules
+
+    def get_report(self, max_rules=40):
+        """
+        Returns the text of the report of the profile, with the rules that
+        took more time first.
+        """
+        total = max(self.seconds, 0.000001)
+        lines = ['Games: %d, time on the rules: %.3fs' %
+                 (self.games, self.seconds), '',
+                 '%-50s %10s %10s %10s %7s' % ('Rule', 'Firings', 'Seconds',
+                                              'ms/firing', '%')]
+        for rule, firings, seconds in self.get_rules()[:max_rules]:
+            lines.append('%-50s %10d %10.3f %10.4f %6.1f%%' %
+                         (rule, firings, seconds, 1000.0 * seconds / firings,
+                          100.0 * seconds / total))
+        lines.append('')
+        lines.append('%-50s %10s %7s' % ('Module', 'Seconds', '%'))
+        for module, seconds in self.get_modules():
+            lines.append('%-50s %10.3f %6.1f%%' %
+                         (module, seconds, 100.0 * seconds / total))
+        if self.agenda_sizes:
+            lines.append('')
+            lines.append('Agenda at the beginning of a turn: '
+                         '%.1f activations on average, %d at most, '
+                         '%d turns' %
+                         (float(sum(self.agenda_sizes)) /
+                          len(self.agenda_sizes), max(self.agenda_sizes),
+                          len(self.agenda_sizes)))
+
+        return "\n".join(lines)
+
+def run(clips, profile):
+    """
+    Runs the simulation loaded on clips until it ends, one rule at a time,
+    adding the firings to the profile.
+    """
+    clips.DebugConfig.RulesWatched = True
+    clips.TraceStream.Read()
+    try:
+        while True:
+            start = time.time()
+            fired = clips.Run(1)
+            seconds = time.time() - start
+            if fired == 0:
+                break
+            trace = clips.TraceStream.Read() or ''
+            match = _fire_re.search(trace)
+            if match == None:
+                rule = 'unknown'
+            else:
+                rule = match.group(1)
+            profile.add_firing(rule, seconds)
+            if _split_rule(rule)[1] == _turn_rule:
+                profile.add_turn(_agenda_size(clips))
+    finally:
+        clips.DebugConfig.RulesWatched = False
+    profile.games = profile.games + 1
+
+def profile_games(team_a, team_b, games, number_turns=100):
+    """Plays several games between two teams with the profiler, and returns
+    the profile of all of them. The records of the games are removed.
+
+    Keywords arguments:
+    team_a -- Tuple with the rules and the formation of the team A.
+    team_b -- The same for the team B. Its rules appear on the module
+    EQUIPO-B, as they are mirrored.
+    games -- Number of games to play.
+    number_turns -- Number of turns of every game.
+    """
+    total = Profile()
+    for i in range(games):
+        profile = Profile()
+        lib = libguadalete.LibGuadalete(team_a, team_b, number_turns,
+                                        profile=profile)
+        out_file, winner = lib.run_game()
+        os.remove(out_file)
+        total.merge(profile)
+
+    return total
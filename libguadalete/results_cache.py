@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides a cache with the results of the simulated games.
+
+A game is only reproducible when its seed is known, so the results are
+stored by a key made from the content of the files of both teams, the seed,
+the number of turns and the version of the kernel. The cache is a SQLite
+database on the cache directory, so a result is looked up without reading
+the whole cache, and it is bounded, removing the least recently used
+results when it's full.
+
+Every process uses a single ResultsCache, given by get_cache. The new
+results and the games read are kept on memory and written at once by
+flush, on a single transaction. The workers of a pool don't write to the
+database: they hand their pending changes to the main process with
+take_pending, which adds them to its own cache with add_pending.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import libguadalete
+
+from resistencia import filenames, xdg
+
+__default_cache_file__ = os.path.join(xdg.get_cache_dir(), 'results.db')
+#Number of pending changes that are written at once
+__default_batch_size__ = 50
+
+def get_cache_key(team_a, team_b, seed, number_turns):
+    """Generates the key of a game on the cache.
+
+    Keywords arguments:
+    team_a -- Tuple with paths to the rule file and formation file for the
+    A team.
+    team_b -- The same for the B team.
+    seed -- Seed used on the simulation.
+    number_turns -- Number of turns of the game.
+    """
+    key = '%s-%s-%s-%s-%s' % (filenames.get_team_hash(team_a),
+                              filenames.get_team_hash(team_b),
+                              seed, number_turns,
+                              libguadalete.__engine_version__)
+    return hashlib.sha1(key).hexdigest()
+
+class ResultsCache(object):
+    """
+    Class that stores the results of the games, evicting the least recently
+    used ones when the maximum number of entries is exceeded.
+
+    Every entry is a dictionary with the winner, the stats of both teams as
+    returned by stats.get_game_stats, the winner if the game can't end on a
+    draw, and the path to the record of the game (None if it wasn't kept).
+    """
+    def __init__(self, cache_file=__default_cache_file__, max_entries=5000,
+                 batch_size=__default_batch_size__):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        #Formed by key -> entry, the results not written yet
+        self.new_entries = {}
+        #Formed by key -> time of the last use, the games read
+        self.used = {}
+
+        self.connection = sqlite3.connect(cache_file, timeout=30)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results '
+                                '(key TEXT PRIMARY KEY, entry TEXT, '
+                                'used REAL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_used '
+                                'ON results (used)')
+        self.connection.commit()
+
+    def contains(self, key):
+        """
+        Checks if there is an entry for a key, without marking it as used
+        """
+        if key in self.new_entries:
+            return True
+        cursor = self.connection.execute('SELECT 1 FROM results '
+                                         'WHERE key = ?', (key,))
+        return not cursor.fetchone() == None
+
+    def get(self, key):
+        """
+        Returns the entry stored for a key, or None if there is not
+        """
+        if key in self.new_entries:
+            return self.new_entries[key]
+        cursor = self.connection.execute('SELECT entry FROM results '
+                                         'WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        if row == None:
+            return None
+        self.used[key] = time.time()
+        self._check_batch()
+        return json.loads(row[0])
+
+    def put(self, key, winner, stats, cant_draw_winner, record=None):
+        """
+        Stores the result of a game
+        """
+        self.new_entries[key] = {'winner': winner, 'stats': stats,
+                                 'cant_draw_winner': cant_draw_winner,
+                                 'record': record}
+        self.used[key] = time.time()
+        self._check_batch()
+
+    def take_pending(self):
+        """
+        Returns the changes not written yet as a tuple (new entries, used
+        keys), forgetting them
+        """
+        pending = (self.new_entries, self.used)
+        self.new_entries = {}
+        self.used = {}
+        return pending
+
+    def add_pending(self, pending):
+        """
+        Adds the changes returned by take_pending on other process
+        """
+        new_entries, used = pending
+        self.new_entries.update(new_entries)
+        for key in used:
+            self.used[key] = max(used[key], self.used.get(key, 0))
+        self._check_batch()
+
+    def _check_batch(self):
+        if len(self.used) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the pending changes on a single transaction, evicting a
+        quarter of the cache if it's full, so the eviction is not repeated
+        on every new entry
+        """
+        if not self.used:
+            return
+        new_entries, used = self.take_pending()
+        cursor = self.connection.cursor()
+        for key in new_entries:
+            cursor.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                           (key, json.dumps(new_entries[key]), used[key]))
+        for key in used:
+            if not key in new_entries:
+                cursor.execute('UPDATE results SET used = ? WHERE key = ?',
+                               (used[key], key))
+        cursor.execute('SELECT COUNT(*) FROM results')
+        num_entries = cursor.fetchone()[0]
+        if num_entries > self.max_entries:
+            cursor.execute('DELETE FROM results WHERE key IN '
+                           '(SELECT key FROM results ORDER BY used LIMIT ?)',
+                           (num_entries - (self.max_entries * 3) / 4,))
+        self.connection.commit()
+
+_cache = None
+
+def get_cache():
+    """
+    Returns the cache of this process. A forked process gets its own one,
+    the connection of its parent is not used.
+    """
+    global _cache
+    if _cache == None or not _cache[0] == os.getpid():
+        _cache = (os.getpid(), ResultsCache())
+    return _cache[1]
+
+def _flush_cache():
+    if not _cache == None and _cache[0] == os.getpid():
+        _cache[1].flush()
+
+atexit.register(_flush_cache)
@@ -19,9 +19,18 @@
 ###############################################################################
 
 import file_parser
+import timing
 
 def get_game_file_stats(filename):
     game, winner = file_parser.parse_file(filename)
+    return get_game_stats(game, winner)
+
+def get_game_stats(game, winner):
+    """
+    Returns a pair with the stats of both teams, given the list of boards
+    of a game already parsed and its result.
+    """
+    timing.start('stats')
     game = _normalize_game(game)
     num_turns = len(game)
     final_board = game[num_turns -1]
@@ -59,6 +68,7 @@ def get_game_file_stats(filename):
     
     stats_teamA['max_death'], stats_teamB['max_death'] = _check_death(6, game)
     
+    timing.stop('stats')
     return (stats_teamA, stats_teamB)
 
 def _find_element_matrix(board, e):
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the timing of the phases of every game (reading the configuration,
+mirroring the teams, loading them on clips, running the simulation, parsing
+the record...) and their histograms, exported periodically as a Prometheus
+text file and as JSON, so a drop of the games per second can be noticed.
+
+A game is timed between begin_game and end_game; the phases started and
+stopped meanwhile are added to it. Out of a game, the phases are ignored.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import time
+
+from resistencia import xdg
+
+__default_prometheus_file__ = os.path.join(xdg.get_cache_dir(),
+                                           'metrics.prom')
+__default_json_file__ = os.path.join(xdg.get_cache_dir(), 'metrics.json')
+
+#Upper bounds of the buckets of the histograms, in seconds
+_buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+            60.0)
+_write_interval = 10.0
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+def _get_monotonic_clock():
+    """
+    Returns a function that reads the monotonic clock of the system, or
+    time.time if it's not available
+    """
+    try:
+        librt = ctypes.CDLL(ctypes.util.find_library('rt') or 'librt.so.1')
+        clock_gettime = librt.clock_gettime
+    except (OSError, AttributeError):
+        return time.time
+    timespec = _Timespec()
+    def monotonic():
+        clock_gettime(1, ctypes.byref(timespec)) #CLOCK_MONOTONIC
+        return timespec.tv_sec + timespec.tv_nsec * 1e-9
+    return monotonic
+
+clock = _get_monotonic_clock()
+
+class GameTiming(object):
+    """
+    Class that stores the time spent on every phase of a game
+    """
+    def __init__(self):
+        self.begin = clock()
+        self.phases = {}
+        self.started = {}
+
+    def start(self, phase):
+        self.started[phase] = clock()
+
+    def stop(self, phase):
+        if phase in self.started:
+            elapsed = clock() - self.started.pop(phase)
+            self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+
+    def finish(self):
+        """
+        Returns the dictionary of phase -> seconds, with the whole game as
+        the phase 'game'
+        """
+        self.phases['game'] = clock() - self.begin
+        return self.phases
+
+class Histogram(object):
+    """
+    Class that counts the observed values on cumulative buckets, as the
+    Prometheus histograms
+    """
+    def __init__(self):
+        self.counts = [0] * len(_buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i in range(len(_buckets)):
+            if value <= _buckets[i]:
+                self.counts[i] = self.counts[i] + 1
+        self.count = self.count + 1
+        self.sum = self.sum + value
+
+class Metrics(object):
+    """
+    Class that aggregates the timing of the games
+    """
+    def __init__(self):
+        #Formed by phase -> Histogram
+        self.histograms = {}
+        self.games = 0
+        self.start = clock()
+        self.last_game = None
+
+    def add_game(self, phases):
+        """
+        Adds the dictionary of phase -> seconds of a game
+        """
+        for phase in phases:
+            if not phase in self.histograms:
+                self.histograms[phase] = Histogram()
+            self.histograms[phase].observe(phases[phase])
+        self.games = self.games + 1
+        self.last_game = phases
+
+    def get_games_per_second(self):
+        elapsed = clock() - self.start
+        if elapsed <= 0:
+            return 0.0
+        return self.games / elapsed
+
+    def get_json(self):
+        """
+        Returns the metrics as a JSON string
+        """
+        phases = {}
+        for phase in self.histograms:
+            histogram = self.histograms[phase]
+            phases[phase] = {'count': histogram.count, 'sum': histogram.sum,
+                             'buckets': dict(zip([str(b) for b in _buckets],
+                                                 histogram.counts))}
+        return json.dumps({'games': self.games,
+                           'games_per_second': self.get_games_per_second(),
+                           'last_game': self.last_game, 'phases': phases},
+                          sort_keys=True)
+
+    def get_prometheus(self):
+        """
+        Returns the metrics on the Prometheus text format
+        """
+        lines = ['# HELP resistencia_games_total Games simulated.',
+                 '# TYPE resistencia_games_total counter',
+                 'resistencia_games_total %d' % self.games,
+                 '# HELP resistencia_games_per_second Games simulated per '
+                 'second since the start.',
+                 '# TYPE resistencia_games_per_second gauge',
+                 'resistencia_games_per_second %r' %
+                 self.get_games_per_second(),
+                 '# HELP resistencia_phase_seconds Time spent on every phase '
+                 'of a game.',
+                 '# TYPE resistencia_phase_seconds histogram']
+        phases = self.histograms.keys()
+        phases.sort()
+        for phase in phases:
+            histogram = self.histograms[phase]
+            for i in range(len(_buckets)):
+                lines.append('resistencia_phase_seconds_bucket'
+                             '{phase="%s",le="%r"} %d' %
+                             (phase, _buckets[i], histogram.counts[i]))
+            lines.append('resistencia_phase_seconds_bucket'
+                         '{phase="%s",le="+Inf"} %d' %
+                         (phase, histogram.count))
+            lines.append('resistencia_phase_seconds_sum{phase="%s"} %r' %
+                         (phase, histogram.sum))
+            lines.append('resistencia_phase_seconds_count{phase="%s"} %d' %
+                         (phase, histogram.count))
+
+        return "\n".join(lines) + "\n"
+
+def _write_file(filename, content):
+    """
+    Writes a file replacing it at once, so it's never read half written
+    """
+    temp_file = filename + '.tmp'
+    f_metrics = open(temp_file, 'w')
+    f_metrics.write(content)
+    f_metrics.close()
+    os.rename(temp_file, filename)
+
+_metrics = Metrics()
+_current = None
+_exporting = True
+_last_write = 0.0
+
+def begin_game():
+    """
+    Starts the timing of a game
+    """
+    global _current
+    _current = GameTiming()
+
+def start(phase):
+    if not _current == None:
+        _current.start(phase)
+
+def stop(phase):
+    if not _current == None:
+        _current.stop(phase)
+
+def end_game():
+    """
+    Ends the timing of a game and adds it to the metrics. Returns its
+    dictionary of phase -> seconds.
+    """
+    global _current
+    if _current == None:
+        return None
+    phases = _current.finish()
+    _current = None
+    add_game(phases)
+    return phases
+
+def get_last_game():
+    """
+    Returns the phases of the last game timed on this process
+    """
+    return _metrics.last_game
+
+def add_game(phases):
+    """
+    Adds the timing of a game, that may have been played on other process,
+    writing the metrics if they were not written recently
+    """
+    _metrics.add_game(phases)
+    if clock() - _last_write >= _write_interval:
+        write_metrics()
+
+def set_exporting(exporting):
+    """
+    Enables or disables the writing of the metrics files. The workers of a
+    pool don't write them, as their games are added on the main process.
+    """
+    global _exporting
+    _exporting = exporting
+
+def get_metrics():
+    return _metrics
+
+def write_metrics(prometheus_file=__default_prometheus_file__,
+                  json_file=__default_json_file__):
+    """
+    Writes the metrics as a Prometheus text file and as JSON
+    """
+    global _last_write
+    if not _exporting:
+        return
+    _last_write = clock()
+    _write_file(prometheus_file, _metrics.get_prometheus())
+    _write_file(json_file, _metrics.get_json())
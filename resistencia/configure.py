@@ -31,6 +31,7 @@ from resistencia import xdg
 
 __config_base_path__ = xdg.get_config_dir() + '/'
 __file_path__ = __config_base_path__ + 'configuration.xml'
+__default_autoplay_speed__ = '2'
 
 def generate_configuration_file():
     """
@@ -72,10 +73,14 @@ def generate_configuration_file():
     active_music = config_xml.createElement('music_active')
     active_music.setAttribute('value', '1')
 
+    autoplay_speed = config_xml.createElement('autoplay_speed')
+    autoplay_speed.setAttribute('value', __default_autoplay_speed__)
+
     top_element.appendChild(se_path)
     top_element.appendChild(games_path)
     top_element.appendChild(language)
     top_element.appendChild(active_music)
+    top_element.appendChild(autoplay_speed)
 
     file_xml = open(__file_path__,"w")
 
@@ -104,8 +109,28 @@ def load_configuration():
     music_active = config_xml.getElementsByTagName('music_active')
     params['music_active'] = music_active[0].getAttribute('value')
 
+    autoplay_speed = config_xml.getElementsByTagName('autoplay_speed')
+    if autoplay_speed:
+        params['autoplay_speed'] = autoplay_speed[0].getAttribute('value')
+    else:
+        params['autoplay_speed'] = __default_autoplay_speed__
+
     return params
 
+def get_autoplay_speed(config):
+    """
+    Returns the turns per second of the auto-play from a configuration
+    returned by load_configuration, or the default one if the stored value
+    is not a positive number
+    """
+    try:
+        speed = float(config['autoplay_speed'])
+    except ValueError:
+        speed = 0
+    if speed <= 0:
+        speed = float(__default_autoplay_speed__)
+    return speed
+
 def set_se_path(new_path):
     """
     Set a new 'System Expert Path'
@@ -165,3 +190,22 @@ def set_active_music(new_music_active):
 
     file_xml.write(config_xml.toprettyxml())
     file_xml.close()
+
+def set_autoplay_speed(new_autoplay_speed):
+    """
+    Set the number of turns per second shown on the auto-play mode
+    """
+    config_xml = minidom.parse(__file_path__)
+    autoplay_speed = config_xml.getElementsByTagName('autoplay_speed')
+    if autoplay_speed:
+        autoplay_speed = autoplay_speed[0]
+        autoplay_speed.removeAttribute('value')
+    else:
+        autoplay_speed = config_xml.createElement('autoplay_speed')
+        config_xml.documentElement.appendChild(autoplay_speed)
+    autoplay_speed.setAttribute('value', str(new_autoplay_speed))
+
+    file_xml = open(__file_path__,"w")
+
+    file_xml.write(config_xml.toprettyxml())
+    file_xml.close()
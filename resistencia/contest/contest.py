@@ -31,7 +31,7 @@ def generate_key_names(teams):
 
 def merge_puntuations(punt1, punt2):
     for index in punt1:
-        punt1[index] = punt1[index] + punt2[index]
+        punt1[index] = punt1[index] + punt2.get(index, 0)
 
 def puntuations_compare(p1, p2):
     if p1[1] > p2[1]:
@@ -54,5 +54,5 @@ class Contest(object):
     def get_round(self, round_number):
         raise NotImplementedError('Base class. Method not implemented')
 
-    def play_round(self, fast=False):
+    def play_round(self, progress=None, fast=False, pool=None):
         raise NotImplementedError('Base class. Method not implemented')
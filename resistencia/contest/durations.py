@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the history of the duration of the games of every team, used to
+schedule the games of a round on a pool of workers: the longest expected
+games are sent first, so the short ones fill the gaps at the end instead of
+leaving a long game running alone.
+"""
+
+import csv
+import heapq
+import os
+
+from resistencia import configure, filenames
+
+#Expected duration, in seconds, when there is no history at all
+_default_seconds = 1.0
+
+def predict_makespan(durations, processes):
+    """
+    Returns the time that a pool of processes takes to play some games,
+    given their expected durations in the order they are sent: every game
+    goes to the first worker that becomes idle.
+    """
+    workers = [0.0] * max(processes, 1)
+    for duration in durations:
+        heapq.heappush(workers, heapq.heappop(workers) + duration)
+
+    return max(workers)
+
+class DurationHistory(object):
+    """
+    Class that stores the number of games, total simulation time and total
+    number of turns of every team.
+    """
+    def __init__(self, history_file=None):
+        """Init method for the class DurationHistory
+
+        Keywords arguments:
+        history_file -- CSV file where the history is stored. By default,
+        'durations.csv' on the games path.
+        """
+        if history_file == None:
+            base_path = configure.load_configuration()['games_path']
+            history_file = os.path.join(base_path, 'durations.csv')
+        self.history_file = history_file
+
+        #Formed by hash -> [name, games, seconds, turns]
+        self.history = {}
+        self.hashes = {}
+
+        self._load()
+
+    def _load(self):
+        """
+        Load the history file, if exists
+        """
+        if not os.path.exists(self.history_file):
+            return
+        history_reader = csv.reader(open(self.history_file, 'r'),
+                                    delimiter=',')
+        for row in history_reader:
+            if len(row) == 5 and not row[0] == 'hash':
+                self.history[row[0]] = [row[1], int(row[2]), float(row[3]),
+                                        int(row[4])]
+
+    def save(self):
+        """
+        Write the history to the history file
+        """
+        f_history = open(self.history_file, 'w')
+        history_writer = csv.writer(f_history, delimiter=',')
+        history_writer.writerow(['hash', 'name', 'games', 'seconds', 'turns'])
+        for team_hash in self.history:
+            name, games, seconds, turns = self.history[team_hash]
+            history_writer.writerow([team_hash, name, games, repr(seconds),
+                                     turns])
+        f_history.close()
+
+    def _get_key(self, team):
+        """
+        Returns the hash of a team
+        """
+        if not team in self.hashes:
+            self.hashes[team] = filenames.get_team_hash(team)
+        return self.hashes[team]
+
+    def add_game(self, team_a, team_b, seconds, turns):
+        """Add a simulated game to the history of both teams.
+
+        Keywords arguments:
+        team_a -- Tuple with the paths to the rules and formation files of
+        the team A.
+        team_b -- The same for the team B.
+        seconds -- Time spent on the simulation.
+        turns -- Number of turns that the game lasted.
+        """
+        for team in (team_a, team_b):
+            team_hash = self._get_key(team)
+            if not team_hash in self.history:
+                self.history[team_hash] = [
+                    filenames.extract_name_expert_system(team), 0, 0.0, 0]
+            entry = self.history[team_hash]
+            entry[1] = entry[1] + 1
+            entry[2] = entry[2] + seconds
+            entry[3] = entry[3] + turns
+
+    def get_average(self, team):
+        """
+        Returns a pair with the average seconds and turns of the games of a
+        team, or None if it has not played any game.
+        """
+        entry = self.history.get(self._get_key(team))
+        if entry == None or entry[1] == 0:
+            return None
+        return (entry[2] / entry[1], float(entry[3]) / entry[1])
+
+    def _get_global_seconds(self):
+        """
+        Returns the average seconds of a game among all the teams
+        """
+        games = 0
+        seconds = 0.0
+        for entry in self.history.values():
+            games = games + entry[1]
+            seconds = seconds + entry[2]
+        if games == 0:
+            return _default_seconds
+        return seconds / games
+
+    def get_expected_seconds(self, team_a, team_b):
+        """
+        Returns the expected duration of a game between two teams: the mean
+        of the averages of both teams. The teams without history take the
+        average of all the games.
+        """
+        expected = []
+        for team in (team_a, team_b):
+            average = self.get_average(team)
+            if average == None:
+                expected.append(self._get_global_seconds())
+            else:
+                expected.append(average[0])
+
+        return (expected[0] + expected[1]) / 2
+
+    def sort_longest_first(self, games):
+        """
+        Sorts a list of (tag, job) of workers.make_job by the expected
+        duration of their games, the longest first. Returns the sorted list
+        and the list of expected durations, in the same order.
+        """
+        expected = []
+        for tag, job in games:
+            expected.append((self.get_expected_seconds(job['team_a'][0],
+                                                       job['team_b'][0]),
+                             tag, job))
+        expected.sort(key=lambda e: e[0], reverse=True)
+
+        sorted_games = []
+        durations = []
+        for seconds, tag, job in expected:
+            sorted_games.append((tag, job))
+            durations.append(seconds)
+
+        return (sorted_games, durations)
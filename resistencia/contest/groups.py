@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the group stage contest: the teams are divided on groups seeded by
+their ratings, every group plays a league, and the best teams of each group
+go through to a knockout tournament.
+
+The rounds of the groups are played at the same time, so on fast mode all
+the games of a round can be simulated in parallel.
+"""
+
+import random
+
+from libguadalete import libguadalete
+from resistencia import configure, filenames
+
+import contest
+import journal
+import league
+import pairing
+import ratings
+import round
+import standings
+
+_group_names = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+def get_number_of_groups(num_teams, qualified=2):
+    """
+    Returns the number of groups used by default, making groups of four
+    teams, but at least one more team than the qualified ones by group.
+    """
+    num_groups = max(1, int(num_teams / 4.0 + 0.5))
+    while num_groups > 1 and num_teams / num_groups <= qualified:
+        num_groups = num_groups - 1
+
+    return num_groups
+
+def seed_groups(translator, num_groups, engine):
+    """
+    Divides the teams on groups. The teams are sorted by their ratings on
+    the given ratings.RatingEngine and dealt in a snake order (A, B, C, C,
+    B, A...), so the strongest teams are spread among the groups. Teams with
+    the same rating are shuffled.
+    """
+    keys = translator.keys()
+    random.shuffle(keys)
+    keys.sort(key=lambda k: engine.get_rating(translator[k])[0],
+              reverse=True)
+
+    groups = []
+    for i in range(num_groups):
+        groups.append([])
+    for i in range(len(keys)):
+        row, column = divmod(i, num_groups)
+        if row % 2 == 1:
+            column = num_groups - column - 1
+        groups[column].append(keys[i])
+
+    return groups
+
+class Groups(league.League):
+    """
+    The group stage of the contest. It's played like a league where every
+    round contains the games of that round of all the groups.
+    """
+    def __init__(self, teams, num_turns, back_round=False, num_groups=None,
+                 qualified=2, seed=None):
+        """Init method for the class Groups
+
+        Keywords arguments:
+        teams -- List of teams, tuples with their rules and formation.
+        num_turns -- Number of turns of every game.
+        back_round -- Plays a second leg on every group.
+        num_groups -- Number of groups. By default, groups of four teams.
+        qualified -- Number of teams of every group that go through.
+        seed -- Seed of the contest, to make it reproducible.
+        """
+        self.teams = teams
+        self.seed = seed
+        self.translator = contest.generate_key_names(teams)
+        self.num_turns = num_turns
+        self.qualified = qualified
+
+        if num_groups == None:
+            num_groups = get_number_of_groups(len(teams), qualified)
+        #The ratings are updated after every round, and saved by the caller
+        #with self.rating_engine.save()
+        self.rating_engine = ratings.RatingEngine()
+        self.groups = seed_groups(self.translator, num_groups,
+                                  self.rating_engine)
+
+        self.keys = []
+        groups_matchs = []
+        for group in self.groups:
+            group_keys = list(group)
+            groups_matchs.append(pairing.make_pairings(group_keys,
+                                                       back_round))
+            for key in group_keys:
+                if not key in self.keys:
+                    self.keys.append(key)
+
+        #Groups with an odd number of teams have one more round
+        self.matchs = []
+        for i in range(max([len(m) for m in groups_matchs])):
+            jorn = []
+            for group_matchs in groups_matchs:
+                if i < len(group_matchs):
+                    jorn.extend(group_matchs[i])
+            self.matchs.append(jorn)
+
+        self.rounds = []
+        base_path = configure.load_configuration()['games_path'] + '/'
+        self.tournament_file_name = base_path + filenames.generate_filename('groups')
+        print self.tournament_file_name
+        self.journal = journal.Journal(
+            journal.get_journal_filename(self.tournament_file_name),
+            self.tournament_file_name)
+
+        for jorn in self.matchs:
+            round_seed = libguadalete.derive_seed(self.seed, len(self.rounds))
+            self.rounds.append(round.Round(jorn, self.translator,
+                                           self.tournament_file_name,
+                                           self.num_turns, round_seed))
+
+        self.puntuations_by_round = []
+        self.puntuations = {}
+        for key in self.keys:
+            self.puntuations[key] = 0
+        self.standings = standings.Standings(self.keys)
+
+        self.number_of_rounds = len(self.rounds)
+        self.actual_round = 0
+        self.league_completed = False
+
+    def get_groups(self):
+        """
+        Returns a list with the keys of the teams of every group
+        """
+        return self.groups
+
+    def get_group_puntuations(self, number_group):
+        """
+        Returns the classification of a group, as a list of (key, points)
+        with the ties broken as explained on the standings module.
+        """
+        return self.standings.get_standings(self.groups[number_group])
+
+    def get_actual_puntuations(self):
+        """
+        Returns the classifications of all the groups, one after another, with
+        the name of the group before the names of the teams.
+        """
+        clasification = []
+        for i in range(len(self.groups)):
+            for key, punt in self.get_group_puntuations(i):
+                clasification.append((_group_names[i % 26] + ': ' + key,
+                                      punt))
+
+        return clasification
+
+    def print_actual_puntuations(self):
+        for name, punt in self.get_actual_puntuations():
+            num_sep = 29 - len(name)
+            print name + ' ' + '-'*num_sep + ' ' + str(punt)
+
+    def get_knockout_pairings(self):
+        """
+        Returns the games of the first round of the knockout stage, as pairs
+        of teams. The team on a position of a group plays against the one on
+        the mirrored position of the next group (with two qualified teams,
+        the winner of the group A against the second one of the group B), so
+        two teams of the same group or two winners of groups don't meet on
+        it. With an odd number of qualified teams, the teams on the middle
+        position play among them.
+        """
+        num_groups = len(self.groups)
+        classifications = []
+        for i in range(num_groups):
+            classifications.append(self.get_group_puntuations(i))
+
+        pairings = []
+        for position in range(self.qualified / 2):
+            mirrored = self.qualified - position - 1
+            for i in range(num_groups):
+                next_group = classifications[(i + 1) % num_groups]
+                pairings.append((classifications[i][position][0],
+                                 next_group[mirrored][0]))
+        if self.qualified % 2 == 1:
+            middle = []
+            for clasification in classifications:
+                middle.append(clasification[self.qualified / 2][0])
+            if len(middle) % 2 == 1:
+                middle.append('aux_ghost_team')
+            for i in range(0, len(middle), 2):
+                pairings.append((middle[i], middle[i + 1]))
+
+        translator = dict(self.translator)
+        translator['aux_ghost_team'] = 'aux_ghost_team'
+        return [(translator[key_a], translator[key_b])
+                for key_a, key_b in pairings]
+
+    def get_qualified(self):
+        """
+        Returns the teams that go through to the knockout stage: the winners
+        of the groups first, then the second ones, and so on.
+        """
+        qualified = []
+        classifications = []
+        for i in range(len(self.groups)):
+            classifications.append(self.get_group_puntuations(i))
+        for position in range(self.qualified):
+            for clasification in classifications:
+                if position < len(clasification):
+                    qualified.append(self.translator[clasification[position][0]])
+
+        return qualified
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the journal of the contests and the test suites: a file with a JSON
+object per line for every game and every round, so other tools can follow
+the results as they are written without parsing the text logs.
+
+The records are kept on memory and written in batches, at the end of every
+round or when enough games are waiting. The text log of the contests is
+rendered from the same records.
+"""
+
+import json
+import os
+
+_batch_size = 32
+
+def get_journal_filename(log_file):
+    """
+    Returns the name of the journal that goes along with a log file
+    """
+    return os.path.splitext(log_file)[0] + '.jsonl'
+
+def read_journal(journal_file):
+    """
+    Returns the list of records of a journal
+    """
+    records = []
+    f_journal = open(journal_file, 'r')
+    for line in f_journal:
+        if line.strip():
+            records.append(json.loads(line))
+    f_journal.close()
+
+    return records
+
+def _render_result(result):
+    if result == 0:
+        return 'X'
+    elif result == 1:
+        return '1'
+    else: #result == -1
+        return '2'
+
+def render_round(round_number, games):
+    """
+    Returns the text log of a round, given its game records
+    """
+    text = 'Ronda ' + str(round_number + 1) + ":\n"
+    for game in games:
+        s = game['team_a'] + ' - ' + game['team_b']
+        n = 50 - len(s)
+        text = text + s + ' ' + '-'*n + '-' + _render_result(game['result'])
+        text = text + "\n"
+    text = text + '-------------------------------' + "\n"
+
+    return text
+
+def render_text(journal_file):
+    """
+    Returns the text log of all the rounds of a journal
+    """
+    text = ''
+    games = []
+    for record in read_journal(journal_file):
+        if record['type'] == 'game':
+            games.append(record)
+        elif record['type'] == 'round':
+            text = text + render_round(record['round'], games)
+            games = []
+
+    return text
+
+class Journal(object):
+    """
+    Class that writes the records of the games and rounds on a journal.
+    """
+    def __init__(self, journal_file, text_file=None, batch_size=_batch_size):
+        """Init method for the class Journal
+
+        Keywords arguments:
+        journal_file -- File where the records are written.
+        text_file -- If given, the text log of every round is added to it.
+        batch_size -- Number of records kept on memory before writing them.
+        """
+        self.journal_file = journal_file
+        self.text_file = text_file
+        self.batch_size = batch_size
+        self.buffer = []
+        self.round_games = []
+
+    def write(self, record):
+        """
+        Adds a record to the journal
+        """
+        self.buffer.append(json.dumps(record, sort_keys=True))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def write_game(self, round_number, id_game, match, result, seed=None,
+                   info=None):
+        """Adds the record of a game.
+
+        Keywords arguments:
+        round_number -- Number of the round of the game.
+        id_game -- Position of the game on its round.
+        match -- Pair with the keys of the teams.
+        result -- 1 if the team A won, -1 if the team B won, 0 on a draw.
+        seed -- Seed of the game, if it is reproducible.
+        info -- Dictionary with the extra data of the game, like 'seconds',
+        'turns', 'stats' or 'timing'.
+        """
+        record = {'type': 'game', 'round': round_number, 'game': id_game,
+                  'team_a': match[0], 'team_b': match[1], 'result': result,
+                  'seed': seed}
+        if not info == None:
+            for key in ('seconds', 'turns', 'stats', 'timing'):
+                if key in info:
+                    record[key] = info[key]
+        self.round_games.append(record)
+        self.write(record)
+
+    def write_round(self, round_number, **data):
+        """
+        Adds the record of the end of a round, with any extra data given as
+        keywords arguments, and writes the journal and the text log.
+        """
+        record = {'type': 'round', 'round': round_number,
+                  'games': len(self.round_games)}
+        record.update(data)
+        self.write(record)
+        self.flush()
+
+        if not self.text_file == None:
+            f_log = open(self.text_file, 'a')
+            f_log.write(render_round(round_number, self.round_games))
+            f_log.close()
+        self.round_games = []
+
+    def flush(self):
+        """
+        Writes the records kept on memory
+        """
+        if self.buffer:
+            f_journal = open(self.journal_file, 'a')
+            f_journal.write("\n".join(self.buffer) + "\n")
+            f_journal.close()
+            self.buffer = []
+
+    def close(self):
+        self.flush()
@@ -22,18 +22,21 @@ import sys
 import time
 
 import os
-import gtk
-
+from libguadalete import libguadalete
 from resistencia import configure, filenames
 
 import pairing
 import contest
+import journal
+import ratings
 import round
+import standings
 
 class League(contest.Contest):
     
-    def __init__(self, teams, num_turns, back_round=False):
+    def __init__(self, teams, num_turns, back_round=False, seed=None):
         self.teams = teams
+        self.seed = seed
         self.translator = contest.generate_key_names(teams)
         self.keys = []
         self.num_turns = num_turns
@@ -42,21 +45,29 @@ class League(contest.Contest):
             self.keys.append(t)
 
         self.matchs = pairing.make_pairings(self.keys, back_round)
+        #The ratings are updated after every round, and saved by the caller
+        #with self.rating_engine.save()
+        self.rating_engine = ratings.RatingEngine()
 
         self.rounds = []
         base_path = configure.load_configuration()['games_path'] + '/'
         self.tournament_file_name = base_path + filenames.generate_filename('league')
         print self.tournament_file_name
+        self.journal = journal.Journal(
+            journal.get_journal_filename(self.tournament_file_name),
+            self.tournament_file_name)
         
         for jorn in self.matchs:
+            round_seed = libguadalete.derive_seed(self.seed, len(self.rounds))
             self.rounds.append(round.Round(jorn, self.translator,
                                            self.tournament_file_name,
-                                           self.num_turns))
+                                           self.num_turns, round_seed))
 
         self.puntuations_by_round = []
         self.puntuations = {}
         for key in self.keys:
             self.puntuations[key] = 0
+        self.standings = standings.Standings(self.keys)
 
         self.number_of_rounds = len(self.rounds)
         self.actual_round = 0
@@ -74,44 +85,60 @@ class League(contest.Contest):
     def get_round(self, round_number):
         return self.rounds[round_number]
 
-    def play_round(self, progress_bar, fast=False):
+    def play_round(self, progress=None, fast=False, pool=None):
+        """
+        Plays the next round. If a executor.Progress is given, the start and
+        the result of every game are published on it, and the round stops
+        raising executor.Cancelled if it is cancelled. If a workers.GamePool
+        is given, the games are played at the same time on it.
+        """
         if not self.league_completed:
             r = self.rounds[self.actual_round]
             n = r.get_number_of_games()
 
-            for i in range(n):
-                if fast:
-                    progress_bar.pulse()
-                    while gtk.events_pending():
-                        gtk.main_iteration(False)
-                r.play_match(fast)
+            if pool == None:
+                for i in range(n):
+                    if not progress == None:
+                        progress.check_cancelled()
+                        progress.game_started(r.get_next_match())
+                    match, result = r.play_match(fast)
+                    self._add_game_result(r, r.next_game - 1)
+                    if not progress == None:
+                        progress.game_finished(match, result)
+            else:
+                round.play_rounds([r], pool, progress,
+                                  on_result=self._add_game_result)
 
             p = r.get_puntuation()
             self.puntuations_by_round.append(p)
             contest.merge_puntuations(self.puntuations, p)
+            self.rating_engine.add_results(r.get_rating_results())
+            self.rating_engine.update()
 
-            f_log = open(self.tournament_file_name, 'a')
-            f_log.write('Ronda ' + str(self.actual_round+1) + ":\n")
-            f_log.close()
-            r.log_tournament(True)
-            f_log = open(self.tournament_file_name, 'a')
-            f_log.write('-------------------------------' + "\n")
-            f_log.close()
+            r.log_games(self.journal, self.actual_round)
+            self.journal.write_round(self.actual_round, puntuations=p,
+                                     makespan=r.makespan)
 
             self.actual_round = self.actual_round + 1
             self.league_completed = (self.actual_round == self.number_of_rounds)
 
-    def get_actual_puntuations(self):
-        clasification = self.puntuations.items()
-        clasification.sort(contest.puntuations_compare)
-        clasification.reverse()
+    def _add_game_result(self, r, id_game):
+        """
+        Adds the result of a game of a round to the standings
+        """
+        match, result = r.get_game_result(id_game)
+        self.standings.add_result(match, result,
+                                  r.get_game_info(id_game).get('stats'))
 
-        return clasification
+    def get_actual_puntuations(self):
+        """
+        Returns the standings as a list of (key, points), with the ties
+        broken as explained on the standings module.
+        """
+        return self.standings.get_standings()
 
     def print_actual_puntuations(self):
-        clasification = self.puntuations.items()
-        clasification.sort(contest.puntuations_compare)
-        clasification.reverse()
+        clasification = self.get_actual_puntuations()
 
         for i in clasification:
             name = i[0]
@@ -23,6 +23,7 @@ import types
 
 import gtk
 
+from libguadalete import libguadalete
 from resistencia import configure, filenames, xdg
 from resistencia.gui import round_results
 from resistencia.gui import progress_bar_dialog as pbs
@@ -31,132 +32,225 @@ from resistencia.nls import gettext as _
 
 import league
 import contest
+import groups
 import tournament
 import round
+import workers
 
 def init_contest(contest_format, teams, fast=False, back_round=False,
-                 num_turns=120):
+                 num_turns=120, seed=None):
+    """
+    Plays a contest. If a seed is given, the seed of every game is derived
+    from it, so the whole contest can be reproduced.
+    """
     if contest_format == 'league':
-        _init_league(_clean_dictionary(teams), fast, num_turns, back_round)
+        _init_league(_clean_dictionary(teams), fast, num_turns, back_round,
+                     seed)
     elif contest_format == 'cup':
-        _init_tournament(_clean_dictionary(teams), num_turns, fast)
+        _init_tournament(_clean_dictionary(teams), num_turns, fast,
+                         seed=seed)
     elif contest_format == 'playoff':
-        _init_playoff(_clean_dictionary(teams), fast, num_turns, back_round)
+        _init_playoff(_clean_dictionary(teams), fast, num_turns, back_round,
+                      seed)
+    elif contest_format == 'groups':
+        _init_groups(_clean_dictionary(teams), fast, num_turns, back_round,
+                     seed)
         
 
-def _init_league(teams, fast, num_turns, back_round):
-    l = league.League(teams, num_turns, back_round)
+def _init_league(teams, fast, num_turns, back_round, seed=None):
+    """
+    Plays a league. On fast mode, the games of every round are played at
+    the same time on a pool of processes.
+    """
+    l = league.League(teams, num_turns, back_round, seed)
+    pool = None
+    if fast:
+        pool = workers.GamePool()
 
     band = False
     
-    while not l.league_completed and not band:
-        i = l.get_round_number()
-        progress_bar = None
-        if fast:
-            progress_bar = pbs.ProgressBarDialog(None,
-                                                 _('Running the contest'))
-            progress_bar_dialog = progress_bar.progress_bar_dialog
-            progress_bar.set_num_elements(l.get_round(i).number_games)
-            progress_bar_dialog.show()
+    try:
+        while not l.league_completed and not band:
+            i = l.get_round_number()
+            if not _play_round(l, fast, pool):
+                band = True
+                break
+            r = l.get_round(i)
+
+            classifications = l.get_actual_puntuations()
+            results = r.get_round_results()
+
+            R = round_results.roundResults(classifications, results,
+                                           l.get_prev_round_number() + 1,
+                                           l.get_number_of_rounds())
+            button_pressed = R.result_dialog.run()
+
             while gtk.events_pending():
                 gtk.main_iteration(False)
-        l.play_round(progress_bar, fast)
-        r = l.get_round(i)
-        
-        classifications = l.get_actual_puntuations()
-        results = r.get_round_results()
-        
-        R = round_results.roundResults(classifications, results,
-                                       l.get_prev_round_number() + 1,
-                                       l.get_number_of_rounds())
-        if fast:
-            progress_bar_dialog.hide()
-        button_pressed = R.result_dialog.run()
-        
-        while gtk.events_pending():
-            gtk.main_iteration(False)
-            
-        if button_pressed == -4 or button_pressed == 0:
-            band = True
 
-def _init_tournament(teams, num_turns, fast):
-    t = tournament.Tournament(teams, num_turns)
+            if button_pressed == -4 or button_pressed == 0:
+                band = True
+    finally:
+        l.rating_engine.save()
+        if not pool == None:
+            pool.terminate()
+
+def _init_tournament(teams, num_turns, fast, pool=None, seed=None,
+                     rating_engine=None, pairings_done=False):
+    """
+    Plays an elimination cup. On fast mode, the games are played on a pool
+    of processes, so the games of the next round can be played ahead of time
+    by the idle workers. The ratings are saved at the end, unless the
+    ratings.RatingEngine of a previous stage is given. If pairings_done,
+    teams are the pairs of teams of the first round, instead of being
+    paired at random.
+    """
+    own_pool = fast and pool == None
+    if own_pool:
+        pool = workers.GamePool()
+
+    t = tournament.Tournament(teams, num_turns, pairings_done, seed=seed,
+                              rating_engine=rating_engine)
     band = False
     
-    while not t.tournament_completed and not band:
-        i = t.get_round_number()
-        progress_bar = None
-        if fast:
-            progress_bar = pbs.ProgressBarDialog(None,
-                                                 _('Running the contest'))
-            progress_bar_dialog = progress_bar.progress_bar_dialog
-            progress_bar.set_num_elements(t.get_round(i).number_games)
-            progress_bar_dialog.show()
-            while gtk.events_pending():
-                gtk.main_iteration(False)
-        t.play_round(progress_bar, fast)
-        r = t.get_round(i)
+    try:
+        while not t.tournament_completed and not band:
+            i = t.get_round_number()
+            if not _play_round(t, fast, pool):
+                band = True
+                break
+            r = t.get_round(i)
 
-        classifications = []
-        results = r.get_round_results()
+            classifications = []
+            results = r.get_round_results()
         
-        R = round_results.roundResults(classifications, results,
-                                       t.get_prev_round_number() + 1,
-                                       t.get_number_of_rounds(),
-                                       show_classifications=False)
-        if fast:
-            progress_bar_dialog.hide()
-        button_pressed = R.result_dialog.run()
+            R = round_results.roundResults(classifications, results,
+                                           t.get_prev_round_number() + 1,
+                                           t.get_number_of_rounds(),
+                                           show_classifications=False)
+            button_pressed = R.result_dialog.run()
         
-        while gtk.events_pending():
-            gtk.main_iteration(False)
+            while gtk.events_pending():
+                gtk.main_iteration(False)
             
-        if button_pressed == -4 or button_pressed == 0:
-            band = True
+            if button_pressed == -4 or button_pressed == 0:
+                band = True
+    finally:
+        if rating_engine == None:
+            t.rating_engine.save()
+        if own_pool:
+            pool.terminate()
     print teams
 
 
-def _init_playoff(teams, fast, num_turns, back_round):
-    l = league.League(teams, num_turns, back_round)
+def _init_playoff(teams, fast, num_turns, back_round, seed=None):
+    """
+    Plays a league and then the knockout tournament with the best teams of
+    it. On fast mode, the games of every round are played at the same time
+    on a pool of processes.
+    """
+    l = league.League(teams, num_turns, back_round, seed)
+    pool = None
+    if fast:
+        pool = workers.GamePool()
 
     band = False
     
-    while not l.league_completed and not band:
-        i = l.get_round_number()
-        progress_bar = None
-        if fast:
-            progress_bar = pbs.ProgressBarDialog(None,
-                                                 _('Running the contest'))
-            progress_bar_dialog = progress_bar.progress_bar_dialog
-            progress_bar.set_num_elements(l.get_round(i).number_games)
-            progress_bar_dialog.show()
+    try:
+        while not l.league_completed and not band:
+            i = l.get_round_number()
+            if not _play_round(l, fast, pool):
+                band = True
+                break
+            r = l.get_round(i)
+
+            classifications = l.get_actual_puntuations()
+            results = r.get_round_results()
+
+            R = round_results.roundResults(classifications, results,
+                                           l.get_prev_round_number() + 1,
+                                           l.get_number_of_rounds(),
+                                           show_top_teams=True)
+            button_pressed = R.result_dialog.run()
+
             while gtk.events_pending():
                 gtk.main_iteration(False)
-        l.play_round(progress_bar, fast)
-        r = l.get_round(i)
-        
-        classifications = l.get_actual_puntuations()
-        results = r.get_round_results()
-        
-        R = round_results.roundResults(classifications, results,
-                                       l.get_prev_round_number() + 1,
-                                       l.get_number_of_rounds(),
-                                       show_top_teams=True)
-        if fast:
-            progress_bar_dialog.hide()
-        button_pressed = R.result_dialog.run()
-        
-        while gtk.events_pending():
-            gtk.main_iteration(False)
-            
-        if button_pressed == -4 or button_pressed == 0:
-            band = True
-    if not band:
-        band = False
-        teams = _get_teams_next_round(teams, _extract_classifications(classifications))
-        _init_tournament(teams, num_turns, fast)
+
+            if button_pressed == -4 or button_pressed == 0:
+                band = True
+        if not band:
+            teams = _get_teams_next_round(teams,
+                                          _extract_classifications(classifications))
+            _init_tournament(teams, num_turns, fast, pool,
+                             libguadalete.derive_seed(seed, 'knockout'),
+                             l.rating_engine)
+    finally:
+        l.rating_engine.save()
+        if not pool == None:
+            pool.terminate()
         
+def _init_groups(teams, fast, num_turns, back_round, seed=None):
+    """
+    Plays the group stage and then the knockout tournament with the best
+    teams of every group. On fast mode, the games of every round are played
+    at the same time on a pool of processes.
+    """
+    g = groups.Groups(teams, num_turns, back_round, seed=seed)
+    pool = None
+    if fast:
+        pool = workers.GamePool()
+
+    band = False
+
+    try:
+        while not g.league_completed and not band:
+            i = g.get_round_number()
+            if not _play_round(g, fast, pool):
+                band = True
+                break
+            r = g.get_round(i)
+
+            classifications = g.get_actual_puntuations()
+            results = r.get_round_results()
+
+            R = round_results.roundResults(classifications, results,
+                                           g.get_prev_round_number() + 1,
+                                           g.get_number_of_rounds())
+            button_pressed = R.result_dialog.run()
+
+            while gtk.events_pending():
+                gtk.main_iteration(False)
+
+            if button_pressed == -4 or button_pressed == 0:
+                band = True
+        if not band:
+            _init_tournament(g.get_knockout_pairings(), num_turns, fast,
+                             pool, libguadalete.derive_seed(seed, 'knockout'),
+                             g.rating_engine, pairings_done=True)
+    finally:
+        g.rating_engine.save()
+        if not pool == None:
+            pool.terminate()
+
+def _play_round(actual_contest, fast, pool=None):
+    """
+    Plays the next round of a contest. On fast mode, the round is played on
+    background while a progress dialog is shown, so it can be cancelled.
+    If a workers.GamePool is given, the games are played on it.
+    Returns False if the round was cancelled.
+    """
+    if not fast:
+        actual_contest.play_round(None, fast)
+        return True
+
+    num_games = actual_contest.get_round(
+        actual_contest.get_round_number()).get_number_of_games()
+    progress_bar = pbs.ProgressBarDialog(None, _('Running the contest'))
+    task = progress_bar.run_task(
+        lambda progress: actual_contest.play_round(progress, fast, pool),
+        num_games)
 
+    return not task.cancelled
 
 def _clean_dictionary(d):
     if type(d) == types.ListType:
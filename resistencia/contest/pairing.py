@@ -20,93 +20,80 @@
 
 import random
 
-def _right_displacement(elements):
-    """
-    Function that do a circle displacement to the right. If elements is
-    something like [1, 2, 3, 4], this function will return [4, 1, 2, 3]
-    """
-    n = len(elements)
-    var_aux = elements[0]
-    for i in range(n-1):
-        elements[i+1], var_aux = var_aux, elements[i+1]
+_ghost_team = 'aux_ghost_team'
 
-    elements[0] = var_aux
-    return elements
+def round_robin(teams, back_round=False):
+    """Generator that yields the rounds of a round-robin contest.
 
-def _rotate_less_first(elements):
-    """
-    This function do a circle displacement to the right, except the first
-    element of the list. If elements is a list like [1, 2, 3, 4], this
-    function will return [1, 4, 2, 3]
-    """
-    first = elements[0]
-    rest = elements[1:]
-    _right_displacement(rest)
-
-    elements = rest
-    elements.insert(0,first)
-    return elements
+    Keywords arguments:
+    teams -- list of teams names that participate on the contest
+    back_round -- Boolean value that indicates if it's a two round contest
 
-def _get_pairing(elements):
+    Every round is yielded as a list of matchs, computed with the circle
+    method arithmetic: the first element stays fixed and the rest rotate
+    one place to the right every round, so the element on a position can be
+    computed directly instead of rotating the list. Only one round is kept
+    in memory at a time. The list given is not modified. If it has an odd
+    number of teams, a ghost team is used to give a rest to one team every
+    round.
+
+    If we recive a list [1, 2, 3, 4], the rounds will be
+    [(1, 4), (2, 3)], [(1, 3), (4, 2)], [(1, 2), (3, 4)], and if it has back
+    round, the same rounds again with the teams inverted.
     """
-    Given an even list of elements, we return a list with the pairings of that
-    list, using round-robin.
+    elements = list(teams)
+    if len(elements) % 2 == 1:
+        elements.append(_ghost_team)
 
-    If we recive a list [1, 2, 3, 4, 5, 6], the return list will be
-    [(1, 6), (2, 5), (3, 4)]. This way prevents to repeat matchs on a contest
-    """
     n = len(elements)
-
-    pairing = []
-    for i in range(n/2):
-        pairing.append((elements[i],elements[n-i-1]))
-
-    return pairing
-
-def _generate_back_round(elements):
-    """
-    This function returns a list of reversed matchs. If a contest has the
-    rounds assigned like [(1, 6), (2, 5), (3, 4)], will generete the reverse
-    round as [(6, 1), (5, 2), (4, 3)]
-    """
-    matchs = []
-    x = len(elements)
-    y = len(elements[0])
-    for i in range(x):
-        aux = []
-        for j in range(y):
-            element = elements[i][j]
-            aux.append((element[1], element[0]))
-        matchs.append(aux)
-    return matchs
+    rest = n - 1
+    legs = 1
+    if back_round:
+        legs = 2
+
+    for leg in range(legs):
+        for round_number in range(rest):
+            matchs = []
+            for i in range(n / 2):
+                if i == 0:
+                    team_a = elements[0]
+                else:
+                    team_a = elements[1 + (i - 1 - round_number) % rest]
+                team_b = elements[1 + (n - i - 2 - round_number) % rest]
+                if leg == 0:
+                    matchs.append((team_a, team_b))
+                else:
+                    matchs.append((team_b, team_a))
+            yield matchs
 
 def correct_pairing(matchs, back_round=False):
     """This function verifies the correction of a pairing.
 
-    A pairing is not correct if two teams plays more than one time
-    if it has no back round, or more than two times if it has back round.
+    A pairing is not correct if a team plays more than one time on the same
+    round, or if two teams plays more than one time if it has no back round,
+    or more than two times if it has back round (once on each field).
+
+    It works on any iterable of rounds, visiting every match only once.
     """
-    x = len(matchs)
-    y = len(matchs[0])
-    band = True
-    for i in range(x):
-        for j in range(y):
-            element = matchs[i][j]
-            aux_list = [element]
+    played = set()
+    for round_matchs in matchs:
+        playing = set()
+        for match in round_matchs:
+            team_a, team_b = match
+            if team_a == team_b or team_a in playing or team_b in playing:
+                return False
+            playing.add(team_a)
+            playing.add(team_b)
+
             if back_round:
-                element_i = element[1], element[0]
-                aux_list.append(element_i)
-            aux_set = set(aux_list)
-            for k in range(x):
-                s = set(matchs[k])
-                res = s.intersection(aux_set)
-                maxi = 0
-                if i == k:
-                    maxi = 1 
-                if len(res) > maxi:
-                    band = False
-
-    return band
+                key = match
+            else:
+                key = (min(team_a, team_b), max(team_a, team_b))
+            if key in played:
+                return False
+            played.add(key)
+
+    return True
 
 def make_pairings(teams, back_round=False):
     """This functions do the pairings using round-robin algorithm.
@@ -115,6 +102,9 @@ def make_pairings(teams, back_round=False):
     teams -- list of teams names that participate on the contest
     back_round -- Boolean value that indicates if it's a two round contest
 
+    The teams list is shuffled, and if it has an odd number of teams the
+    ghost team is added to it.
+
     Returns a list that contains lists of matchs, something like that:
     [[(a,d), (b,c)], [(a,c), (d,b)], [(a,b), (c,d)] 
     """
@@ -122,24 +112,9 @@ def make_pairings(teams, back_round=False):
     
     #If has an odd number of teams, we have to add a ghost team
     if len(teams) % 2 == 1:
-        teams.append('aux_ghost_team')
+        teams.append(_ghost_team)
 
-    first_order = teams
-    elements = teams
-    matchs = []
-
-    finish = False #flag to control if we make the entire round
-
-    while not finish:
-        matchs.append(_get_pairing(elements))
-        elements = _rotate_less_first(elements)
-        if elements == first_order:
-            finish = True
-
-    if back_round: #the back round is the same but teams inverts
-        matchs = matchs + _generate_back_round(matchs)
-
-    return matchs
+    return list(round_robin(teams, back_round))
 
 def test_pairing(main_team, teams, team_id = 0):
     random.shuffle(teams)
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides a persistent rating of the teams, using the Glicko-2 system.
+
+Every result from contests, laboratory tests and quick games is added to
+the engine, and the ratings are updated in batches: all the results added
+since the last update form a rating period. A contest or a test suite keeps
+a single engine, updated after every round and saved once when it ends. The
+teams are identified by the hash of their files, so a team keeps its rating
+while its files don't change.
+
+The records of the games played before can be imported at once, as a single
+rating period, with import_records.
+"""
+
+import csv
+import math
+import os
+
+from libguadalete import file_parser
+from resistencia import configure, filenames
+
+_scale = 173.7178
+_default_rating = 1500.0
+_default_rd = 350.0
+_default_volatility = 0.06
+_default_tau = 0.5
+_epsilon = 0.000001
+
+def _g(phi):
+    return 1.0 / math.sqrt(1.0 + 3.0 * phi * phi / (math.pi * math.pi))
+
+def _expected(mu, mu_opponent, g_opponent):
+    return 1.0 / (1.0 + math.exp(-g_opponent * (mu - mu_opponent)))
+
+def _new_volatility(phi, sigma, v, delta, tau):
+    """
+    Computes the new volatility of a team, using the Illinois algorithm
+    described on the Glicko-2 paper.
+    """
+    a = math.log(sigma * sigma)
+    phi2 = phi * phi
+    delta2 = delta * delta
+
+    def f(x):
+        e_x = math.exp(x)
+        aux = phi2 + v + e_x
+        return (e_x * (delta2 - phi2 - v - e_x) / (2.0 * aux * aux) -
+                (x - a) / (tau * tau))
+
+    big_a = a
+    if delta2 > phi2 + v:
+        big_b = math.log(delta2 - phi2 - v)
+    else:
+        k = 1
+        while f(a - k * tau) < 0:
+            k = k + 1
+        big_b = a - k * tau
+
+    f_a = f(big_a)
+    f_b = f(big_b)
+    while abs(big_b - big_a) > _epsilon:
+        big_c = big_a + (big_a - big_b) * f_a / (f_b - f_a)
+        f_c = f(big_c)
+        if f_c * f_b < 0:
+            big_a = big_b
+            f_a = f_b
+        else:
+            f_a = f_a / 2.0
+        big_b = big_c
+        f_b = f_c
+
+    return math.exp(big_a / 2.0)
+
+def _score(result):
+    """
+    Converts the result of a game to the score of the team A
+    """
+    if result == 1:
+        return 1.0
+    elif result == -1:
+        return 0.0
+    else:
+        return 0.5
+
+class RatingEngine(object):
+    """
+    Class that stores the ratings of the teams and updates them with the
+    results of the games.
+    """
+    def __init__(self, ratings_file=None, tau=_default_tau):
+        """Init method for the class RatingEngine
+
+        Keywords arguments:
+        ratings_file -- CSV file where the ratings are stored. By default,
+        'ratings.csv' on the games path.
+        tau -- Glicko-2 system constant, that constrains the change of the
+        volatility over time.
+        """
+        if ratings_file == None:
+            base_path = configure.load_configuration()['games_path']
+            ratings_file = os.path.join(base_path, 'ratings.csv')
+        self.ratings_file = ratings_file
+        #The records already imported are listed on this file
+        self.imported_file = os.path.splitext(ratings_file)[0] + \
+                             '-imported.txt'
+        self.tau = tau
+
+        #Formed by hash -> [name, mu, phi, volatility, games]
+        self.ratings = {}
+        self.pending = []
+        self.hashes = {}
+
+        self._load()
+
+    def _load(self):
+        """
+        Load the ratings file, if exists
+        """
+        if not os.path.exists(self.ratings_file):
+            return
+        with open(self.ratings_file, 'r') as f_ratings:
+            for row in csv.reader(f_ratings, delimiter=','):
+                if len(row) == 6 and not row[0] == 'hash':
+                    self.ratings[row[0]] = [row[1],
+                                            (float(row[2]) - _default_rating) /
+                                            _scale,
+                                            float(row[3]) / _scale,
+                                            float(row[4]), int(row[5])]
+
+    def save(self):
+        """
+        Write the ratings to the ratings file
+        """
+        f_ratings = open(self.ratings_file, 'w')
+        ratings_writer = csv.writer(f_ratings, delimiter=',')
+        ratings_writer.writerow(['hash', 'name', 'rating', 'rd',
+                                 'volatility', 'games'])
+        for team_hash in self.ratings:
+            name, mu, phi, sigma, games = self.ratings[team_hash]
+            ratings_writer.writerow([team_hash, name,
+                                     repr(mu * _scale + _default_rating),
+                                     repr(phi * _scale), repr(sigma), games])
+        f_ratings.close()
+
+    def _get_key(self, team):
+        """
+        Returns the hash of a team, registering it if it is a new one
+        """
+        if not team in self.hashes:
+            self.hashes[team] = filenames.get_team_hash(team)
+        team_hash = self.hashes[team]
+        self._register(team_hash, filenames.extract_name_expert_system(team))
+        return team_hash
+
+    def _register(self, team_hash, name):
+        if not team_hash in self.ratings:
+            self.ratings[team_hash] = [name, 0.0, _default_rd / _scale,
+                                       _default_volatility, 0]
+
+    def add_result(self, team_a, team_b, result):
+        """Add the result of a game to the actual rating period.
+
+        Keywords arguments:
+        team_a -- Tuple with the paths to the rules and formation files of
+        the team A.
+        team_b -- The same for the team B.
+        result -- 1 if the team A won, -1 if the team B won and 0 if it was
+        a draw.
+        """
+        self.pending.append((self._get_key(team_a), self._get_key(team_b),
+                             _score(result)))
+
+    def add_results(self, results):
+        """
+        Add a list of (team_a, team_b, result) to the actual rating period
+        """
+        for team_a, team_b, result in results:
+            self.add_result(team_a, team_b, result)
+
+    def import_records(self, records):
+        """
+        Adds the results of the records of several games to the actual
+        rating period, skipping the ones imported before and the ones whose
+        header has not the hashes of the teams. The games already rated when
+        they were played should not be imported. Returns the number of
+        games added.
+        """
+        imported = set()
+        if os.path.exists(self.imported_file):
+            with open(self.imported_file, 'r') as f_imported:
+                for line in f_imported:
+                    imported.add(line.strip())
+
+        added = []
+        for record in records:
+            name = os.path.basename(record)
+            if name in imported:
+                continue
+            result = _read_record_result(record)
+            if not result == None:
+                hash_a, name_a, hash_b, name_b, winner = result
+                self._register(hash_a, name_a)
+                self._register(hash_b, name_b)
+                self.pending.append((hash_a, hash_b, _score(winner)))
+                added.append(name)
+
+        with open(self.imported_file, 'a') as f_imported:
+            for name in added:
+                f_imported.write(name + '\n')
+        return len(added)
+
+    def update(self):
+        """
+        Closes the actual rating period, updating the ratings of the teams
+        that played on it. Every game is computed with the ratings that the
+        teams had at the beginning of the period, so the order of the
+        games does not matter. The deviation of the teams that did not play
+        is not increased, as the periods may be as short as a single game.
+        """
+        #Formed by hash -> [sum of g^2 * E * (1 - E), sum of g * (s - E),
+        #                   number of games]
+        accumulated = {}
+        g_values = {}
+        for team_hash_a, team_hash_b, score_a in self.pending:
+            for team_hash, opponent_hash, score in \
+                    ((team_hash_a, team_hash_b, score_a),
+                     (team_hash_b, team_hash_a, 1.0 - score_a)):
+                mu = self.ratings[team_hash][1]
+                mu_opponent = self.ratings[opponent_hash][1]
+                if not opponent_hash in g_values:
+                    g_values[opponent_hash] = _g(
+                        self.ratings[opponent_hash][2])
+                g_opponent = g_values[opponent_hash]
+                expected = _expected(mu, mu_opponent, g_opponent)
+
+                if not team_hash in accumulated:
+                    accumulated[team_hash] = [0.0, 0.0, 0]
+                acc = accumulated[team_hash]
+                acc[0] = acc[0] + g_opponent * g_opponent * expected * \
+                         (1.0 - expected)
+                acc[1] = acc[1] + g_opponent * (score - expected)
+                acc[2] = acc[2] + 1
+
+        for team_hash in accumulated:
+            rating = self.ratings[team_hash]
+            mu, phi, sigma = rating[1], rating[2], rating[3]
+            v = 1.0 / accumulated[team_hash][0]
+            delta = v * accumulated[team_hash][1]
+
+            sigma = _new_volatility(phi, sigma, v, delta, self.tau)
+            phi_star = math.sqrt(phi * phi + sigma * sigma)
+            phi = 1.0 / math.sqrt(1.0 / (phi_star * phi_star) + 1.0 / v)
+            mu = mu + phi * phi * accumulated[team_hash][1]
+
+            rating[1], rating[2], rating[3] = mu, phi, sigma
+            rating[4] = rating[4] + accumulated[team_hash][2]
+
+        self.pending = []
+
+    def get_rating(self, team):
+        """
+        Returns a pair with the rating and the rating deviation of a team
+        """
+        rating = self.ratings[self._get_key(team)]
+        return (rating[1] * _scale + _default_rating, rating[2] * _scale)
+
+    def get_ranking(self, z=1.96):
+        """
+        Returns a list of (name, rating, lower bound, upper bound, games)
+        sorted by rating, being the bounds the confidence interval given by
+        z times the rating deviation (95% by default).
+        """
+        ranking = []
+        for team_hash in self.ratings:
+            name, mu, phi, sigma, games = self.ratings[team_hash]
+            rating = mu * _scale + _default_rating
+            deviation = z * phi * _scale
+            ranking.append((name, rating, rating - deviation,
+                            rating + deviation, games))
+        ranking.sort(key=lambda element: element[1], reverse=True)
+
+        return ranking
+
+def _read_record_result(src_file):
+    """
+    Returns a tuple (hash of team A, name of team A, hash of team B, name of
+    team B, winner) with the result of a record, or None if its header has
+    not the hashes of the teams or it has no turns
+    """
+    header = file_parser.read_header(src_file)
+    if not ('hash_a' in header and 'hash_b' in header):
+        return None
+    turns = file_parser.index_file(src_file)
+    if len(turns) == 0:
+        return None
+    f_record = open(src_file, 'rb')
+    last_board = file_parser.read_turn(f_record, turns[-1])
+    f_record.close()
+    name_a, name_b = filenames.extract_names_from_file(src_file)
+    return (header['hash_a'], name_a, header['hash_b'], name_b,
+            file_parser.get_winner(last_board))
+
+def record_results(results):
+    """
+    Adds the results of a list of (team_a, team_b, result) to the stored
+    ratings as a new rating period. It reads and writes the ratings file,
+    so it's only meant for single games: contests and test suites keep
+    their own RatingEngine.
+    """
+    if len(results) == 0:
+        return
+    engine = RatingEngine()
+    engine.add_results(results)
+    engine.update()
+    engine.save()
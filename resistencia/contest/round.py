@@ -18,8 +18,12 @@
 # Copyright (C) 2010, Pablo Recio Quijano
 #----------------------------------------------------------------------
 
+import time
+
 from guadaboard import guada_board
+from libguadalete import libguadalete
 from resistencia import xdg
+from resistencia.contest import workers
 _pieceA = xdg.get_data_path('images/piece-orange.png')
 _pieceB = xdg.get_data_path('images/piece-violete.png')
 
@@ -37,29 +41,133 @@ class RoundError(Error):
     def __init__(self, msg):
         self.msg = msg
 
+def ghost_result(teamA_key, teamB_key):
+    """
+    Returns the result of a game against the ghost team, that always loses,
+    or None if both teams are real.
+    """
+    if teamA_key == 'aux_ghost_team':
+        return -1
+    elif teamB_key == 'aux_ghost_team':
+        return 1
+    return None
+
+def play_rounds(rounds, pool, progress=None, cant_draw=False,
+                on_result=None):
+    """Plays all the pending games of several rounds at the same time, on a
+    workers.GamePool. The results are stored on their rounds as they finish.
+
+    Keywords arguments:
+    rounds -- List of rounds to be played.
+    pool -- workers.GamePool where the games are run.
+    progress -- executor.Progress where the start and the result of every
+    game are published. If it's cancelled, the games being played are
+    discarded and executor.Cancelled is raised.
+    cant_draw -- Breaks the draws, as on the tournaments.
+    on_result -- Function called with the round and the identifier of every
+    game as soon as its result is stored.
+    """
+    games = []
+    for index in range(len(rounds)):
+        actual_round = rounds[index]
+        for id_game in actual_round.get_pending_games():
+            job = actual_round.get_game_job(id_game, cant_draw)
+            match = actual_round.round[id_game][0]
+            if job == None:
+                actual_round.set_game_result(id_game,
+                                             ghost_result(match[0], match[1]))
+                if not on_result == None:
+                    on_result(actual_round, id_game)
+            else:
+                if not progress == None:
+                    progress.game_started(match)
+                games.append(((index, id_game), job))
+        actual_round.next_game = actual_round.number_games
+
+    start = time.time()
+    predicted = pool.submit_all(games)
+
+    pending = len(games)
+    while pending > 0:
+        if not progress == None and progress.is_cancelled():
+            pool.terminate()
+            progress.check_cancelled()
+        finished = pool.get_result(0.5)
+        if not finished == None:
+            (index, id_game), result, info = finished
+            rounds[index].set_game_result(id_game, result, info)
+            pending = pending - 1
+            if not on_result == None:
+                on_result(rounds[index], id_game)
+            if not progress == None:
+                progress.game_finished(rounds[index].round[id_game][0],
+                                       result)
+
+    pool.save_history()
+    report_makespan(predicted, time.time() - start, progress, rounds)
+
+def report_makespan(predicted, actual, progress=None, rounds=None):
+    """
+    Prints the predicted and the actual time spent playing the games of
+    some rounds on a pool, and publishes them as the 'makespan' event. They
+    are also stored on the attribute makespan of the given rounds, so they
+    are written on the journal with the round.
+    """
+    print 'Makespan of the round: %.1fs predicted, %.1fs actual' % \
+        (predicted, actual)
+    if not rounds == None:
+        for played_round in rounds:
+            played_round.makespan = {'predicted': predicted,
+                                     'actual': actual}
+    if not progress == None:
+        progress.publish('makespan', predicted, actual)
+
 class Round(object):
 
-    def __init__(self, matchs, translator, log_file, num_turns = 150):
+    def __init__(self, matchs, translator, log_file, num_turns = 150,
+                 seed=None):
+        """
+        If a seed is given, the seed of every game is derived from it and
+        its position on the round, so the whole round can be reproduced.
+        """
         self.round = [] #Formed by tuples ((teamA, teamB), played, result)
+        self.games_info = {} #Seconds, turns or stats of the games played
+        #Predicted and actual seconds if the round was played on a pool
+        self.makespan = None
         for match in matchs:
             self.round.append((match, False, 0))
 
         self.completed = False
         self.log_file = log_file
         self.next_game = 0
+        self.resolved_games = 0 #Games played or skipped
         self.number_games = len(self.round)
         self.translator = translator
         self.num_turns = num_turns
+        self.seed = seed
 
     def get_number_of_games(self):
         return self.number_games
 
+    def get_game_seed(self, id_game):
+        """
+        Returns the seed of a game of the round, or None if it's random
+        """
+        return libguadalete.derive_seed(self.seed, id_game)
+
     def get_game_result(self, id_game):
         if self.round[id_game][1] == True:
             return (self.round[id_game][0], self.round[id_game][2])
         else:
             raise RoundError('The game ' + str(id_game) + ' has not been played yet')
 
+    def get_game_info(self, id_game):
+        """
+        Returns the dictionary with the extra data of a game, empty if there
+        is nothing known
+        """
+        return self.games_info.get(id_game, {})
+
     def get_round_results(self):
         results = []
         if self.completed:
@@ -84,6 +192,23 @@ class Round(object):
         else:
             raise RoundError('Not all games played')
 
+    def get_rating_results(self):
+        """
+        Returns a list of (team_a, team_b, result) with the files of the teams
+        of every game played, to be added to the ratings. The rests of the
+        ghost team are not included.
+        """
+        results = []
+        for match in self.round:
+            team_a_key = match[0][0]
+            team_b_key = match[0][1]
+            if match[1] and not team_a_key == 'aux_ghost_team' and \
+                    not team_b_key == 'aux_ghost_team':
+                results.append((self.translator[team_a_key],
+                                self.translator[team_b_key], match[2]))
+
+        return results
+
     def get_puntuation(self):
         results = {}
         if self.completed:
@@ -104,48 +229,45 @@ class Round(object):
         else:
             raise RoundError('Not all games played')
 
-    def log_tournament(self, full=False):
-        if self.completed:
-            f_log = open(self.log_file, 'a')
-            for match in self.round:
-                teamA = match[0][0]
-                teamB = match[0][1]
-                s = teamA + ' - ' + teamB
-                n = 50 - len(s)
-                res = ''
-                if match[2] == 0:
-                    res = 'X'
-                elif match[2] == 1:
-                    res = '1'
-                else: #match[2] == -1:
-                    res = '2'
-
-                f_log.write(s + ' ' + '-'*n + '-' + res + "\n")
-            f_log.close()
-        else:
-            raise RoundError('Not all games played')
+    def log_games(self, journal, round_number):
+        """
+        Adds the games played of the round to a journal.Journal
+        """
+        for id_game in range(self.number_games):
+            match, played, result = self.round[id_game]
+            if played:
+                journal.write_game(round_number, id_game, match, result,
+                                   self.get_game_seed(id_game),
+                                   self.games_info.get(id_game))
 
     def play_match(self, fast=False, cant_draw=False):
         teamA_key = self.round[self.next_game][0][0]
         teamB_key = self.round[self.next_game][0][1]
-        teamA = None
-        teamB = None
-        
-        result = 0
-        if (not teamA_key == 'aux_ghost_team') and (not teamB_key == 'aux_ghost_team'):
+
+        info = None
+        result = ghost_result(teamA_key, teamB_key)
+        if result == None:
+            start = time.time()
             teamA = (self.translator[teamA_key], _pieceA)
             teamB = (self.translator[teamB_key], _pieceB)
-            result = guada_board.run(teamA, teamB, fast=fast,
-                                     hidden=True,
-                                     number_turns=self.num_turns,
-                                     cant_draw=cant_draw)
-            
-        else:
-            if teamA_key == 'aux_ghost_team':
-                result = -1
-            else: #teamB_key == 'aux_ghost_team':
-                result = 1
+            result, stats = guada_board.run(
+                teamA, teamB, fast=fast, hidden=True,
+                number_turns=self.num_turns, cant_draw=cant_draw,
+                get_stats=True, seed=self.get_game_seed(self.next_game))
+            info = {'seconds': time.time() - start, 'stats': stats}
 
+        self.set_game_result(self.next_game, result, info)
+        self.next_game = self.next_game + 1
+
+        return (self.round[self.next_game-1][0], self.round[self.next_game-1][2])
+
+    def set_game_result(self, id_game, result, info=None):
+        """
+        Stores the result of a game of the round, that may have been played
+        out of order, along with a dictionary of extra data of the game.
+        """
+        teamA_key = self.round[id_game][0][0]
+        teamB_key = self.round[id_game][0][1]
         print "The result of the game '" + teamA_key + "' - '"+ teamB_key + "' was:"
         if result == 0:
             print 'Draw'
@@ -154,15 +276,49 @@ class Round(object):
         elif result == -1:
             print teamB_key + ' won'
 
-        self.round[self.next_game] = (self.round[self.next_game][0], True, result)
-        
-        #self.round[self.next_game][1] = True
-        #self.round[self.next_game][2] = result
+        if not self.round[id_game][1]:
+            self.resolved_games = self.resolved_games + 1
+        self.round[id_game] = (self.round[id_game][0], True, result)
+        if not info == None:
+            self.games_info[id_game] = info
+        self.completed = (self.resolved_games == self.number_games)
 
-        self.next_game = self.next_game + 1
-        self.completed = (self.next_game == self.number_games)
+    def get_pending_games(self):
+        """
+        Returns the identifiers of the games not played nor skipped yet
+        """
+        return range(self.next_game, self.number_games)
 
-        return (self.round[self.next_game-1][0], self.round[self.next_game-1][2])
+    def get_game_job(self, id_game, cant_draw=False):
+        """
+        Returns the description of a game of the round to be played on a
+        workers.GamePool, or None if it's a rest of the ghost team.
+        """
+        teamA_key, teamB_key = self.round[id_game][0]
+        if not ghost_result(teamA_key, teamB_key) == None:
+            return None
+        return workers.make_job(self.translator[teamA_key],
+                                self.translator[teamB_key],
+                                number_turns=self.num_turns,
+                                cant_draw=cant_draw,
+                                seed=self.get_game_seed(id_game))
+
+    def get_next_match(self):
+        """
+        Returns the pair of teams keys of the next game to be played
+        """
+        return self.round[self.next_game][0]
+
+    def skip_match(self, id_game=None):
+        """
+        Skips the next game of the round, or the given one if the games are
+        being sent to a pool. It's kept as not played, so it's not included
+        on the ratings nor on the results of the games.
+        """
+        if id_game == None:
+            self.next_game = self.next_game + 1
+        self.resolved_games = self.resolved_games + 1
+        self.completed = (self.resolved_games == self.number_games)
 
     def is_complete(self):
         return self.completed
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the standings of the leagues, updated after every game.
+
+The teams are kept on a sorted list, so a result only moves the two teams
+involved instead of sorting all of them again. They are found by binary
+search, but removing and inserting them on the list still costs O(n) per
+result, which is negligible for the number of teams of a contest.
+get_standings walks the whole list and sorts every group of teams tied on
+points by their head-to-head points, so it costs O(n log n) in the worst
+case, when all the teams are tied.
+
+The order of the teams is given by these criteria, in this order:
+
+ 1. Points: 3 for a win, 1 for a draw.
+ 2. Head-to-head: points got on the games among the tied teams.
+ 3. Number of wins.
+ 4. Number of pieces left at the end of the games.
+ 5. Value of the pieces left at the end of the games.
+ 6. Name of the team, so the order is always the same.
+"""
+
+import bisect
+
+_ghost_team = 'aux_ghost_team'
+
+class Standings(object):
+    """
+    Class that keeps the record of every team and their order.
+    """
+    def __init__(self, keys):
+        """Init method for the class Standings
+
+        Keywords arguments:
+        keys -- Keys of the teams. The ghost team is left out.
+        """
+        #Formed by key -> {'points', 'wins', 'draws', 'looses', 'pieces',
+        #'value', 'head_to_head': {opponent -> points}}
+        self.records = {}
+        self.sort_keys = {}
+        self.order = []
+        for key in keys:
+            if not key == _ghost_team:
+                self.records[key] = {'points': 0, 'wins': 0, 'draws': 0,
+                                     'looses': 0, 'pieces': 0, 'value': 0,
+                                     'head_to_head': {}}
+                self.sort_keys[key] = self._get_sort_key(key)
+                self.order.append(self.sort_keys[key])
+        self.order.sort()
+
+    def _get_sort_key(self, key):
+        record = self.records[key]
+        return (-record['points'], -record['wins'], -record['pieces'],
+                -record['value'], key)
+
+    def _update(self, key, points, stats):
+        """
+        Adds the points of a game to a team, and moves it to its new place
+        """
+        record = self.records[key]
+        record['points'] = record['points'] + points
+        if points == 3:
+            record['wins'] = record['wins'] + 1
+        elif points == 1:
+            record['draws'] = record['draws'] + 1
+        else:
+            record['looses'] = record['looses'] + 1
+        if not stats == None:
+            record['pieces'] = record['pieces'] + stats['num_pieces']
+            record['value'] = record['value'] + stats['val_pieces']
+
+        del self.order[bisect.bisect_left(self.order, self.sort_keys[key])]
+        self.sort_keys[key] = self._get_sort_key(key)
+        bisect.insort(self.order, self.sort_keys[key])
+
+    def add_result(self, match, result, stats=None):
+        """Adds the result of a game.
+
+        Keywords arguments:
+        match -- Pair with the keys of the teams.
+        result -- 1 if the team A won, -1 if the team B won, 0 on a draw.
+        stats -- Pair with the stats of both teams, as given by
+        libguadalete.stats, if they are known.
+        """
+        if result == 1:
+            points = (3, 0)
+        elif result == -1:
+            points = (0, 3)
+        else:
+            points = (1, 1)
+
+        for i in range(2):
+            key = match[i]
+            opponent = match[1 - i]
+            if key == _ghost_team:
+                continue
+            team_stats = None
+            if not stats == None:
+                team_stats = stats[i]
+            self._update(key, points[i], team_stats)
+            if not opponent == _ghost_team:
+                head_to_head = self.records[key]['head_to_head']
+                head_to_head[opponent] = head_to_head.get(opponent, 0) + \
+                    points[i]
+
+    def get_record(self, key):
+        """
+        Returns the record of a team
+        """
+        return self.records[key]
+
+    def _break_ties(self, tied):
+        """
+        Sorts a list of teams with the same points by the head-to-head
+        points among them, and then by the rest of the criteria.
+        """
+        if len(tied) == 1:
+            return tied
+        sort_keys = []
+        for key in tied:
+            head_to_head = self.records[key]['head_to_head']
+            points = 0
+            for opponent in tied:
+                points = points + head_to_head.get(opponent, 0)
+            sort_keys.append((-points,) + self.sort_keys[key][1:])
+        sort_keys.sort()
+
+        return [k[-1] for k in sort_keys]
+
+    def get_standings(self, keys=None):
+        """
+        Returns the standings as a list of (key, points). If a list of keys
+        is given, only those teams are included, as on the groups.
+        """
+        selected = None
+        if not keys == None:
+            selected = set(keys)
+
+        standings = []
+        tied = []
+        for sort_key in self.order:
+            key = sort_key[-1]
+            if not selected == None and not key in selected:
+                continue
+            if tied and not self.records[tied[0]]['points'] == \
+                    self.records[key]['points']:
+                standings.extend(self._break_ties(tied))
+                tied = []
+            tied.append(key)
+        standings.extend(self._break_ties(tied))
+
+        return [(key, self.records[key]['points']) for key in standings]
@@ -20,13 +20,17 @@
 
 import math
 import random
+import time
+import types
 
-import gtk
-
+from libguadalete import libguadalete
 from resistencia import configure, filenames
 
 import contest
+import journal
+import ratings
 import round
+import workers
 
 def _auto_pairings(elements):
     if len(elements) % 2 == 1:
@@ -41,21 +45,54 @@ def _auto_pairings(elements):
 
     return pairing
 
+def _bracket_pairings(winners):
+    """
+    Pairs the winners of the previous round following the bracket: the
+    winners of the games 2k and 2k+1 meet on the game k, so every game of
+    the next round is known as soon as both games before it finish.
+    """
+    elements = list(winners)
+    if len(elements) % 2 == 1:
+        elements.append('aux_ghost_team')
+
+    pairing = []
+    for i in range(0, len(elements), 2):
+        pairing.append((elements[i], elements[i+1]))
+
+    return pairing
+
 def _extract_teams_from_pairing(elements):
     teams = []
     for i in elements:
-        teams.append(i[0])
-        teams.append(i[1])
+        for team in i:
+            if not team == 'aux_ghost_team':
+                teams.append(team)
+
+    return teams
+
+def _get_key(team):
+    """
+    Returns the key of a team on the translator of the tournament
+    """
+    if team == 'aux_ghost_team':
+        return team
+    return filenames.extract_name_expert_system(team)
     
 class Tournament(contest.Contest):
-    def __init__(self, teams, num_turns, pairings_done=False):
+    def __init__(self, teams, num_turns, pairings_done=False, seed=None,
+                 rating_engine=None):
+        self.seed = seed
+        #The ratings are updated after every round, and saved by the caller
+        #with self.rating_engine.save()
+        if rating_engine == None:
+            rating_engine = ratings.RatingEngine()
+        self.rating_engine = rating_engine
         self.matchs = []
         self.teams = []
         self.round_winners = []
         self.num_turns = num_turns
         if pairings_done:
-            self.matchs.append(teams)
-            self.teams = _extract_teams_from_pairing(self.matchs)
+            self.teams = _extract_teams_from_pairing(teams)
         else:
             self.teams = teams
 
@@ -65,7 +102,10 @@ class Tournament(contest.Contest):
         for t in self.translator:
             self.keys.append(t)
 
-        if not pairings_done:
+        if pairings_done:
+            self.matchs.append([(_get_key(team_a), _get_key(team_b))
+                                for team_a, team_b in teams])
+        else:
             self.matchs.append(_auto_pairings(self.keys))
 
         self.round_number = 0
@@ -73,14 +113,21 @@ class Tournament(contest.Contest):
         
         base_path = configure.load_configuration()['games_path'] + '/'
         self.tournament_file_name = base_path + filenames.generate_filename('tournament')
+        self.journal = journal.Journal(
+            journal.get_journal_filename(self.tournament_file_name),
+            self.tournament_file_name)
         
         self.rounds.append(round.Round(self.matchs[self.round_number],
                                        self.translator,
                                        self.tournament_file_name,
-                                       self.num_turns))
+                                       self.num_turns,
+                                       libguadalete.derive_seed(self.seed, 0)))
 
         self.number_of_rounds = int(math.ceil(math.log(len(self.teams),2)))
         self.tournament_completed = False
+        #Games sent to a pool, by (round, game, team A, team B), with their
+        #result or None while they are being played
+        self.pool_games = {}
     
     def get_round_number(self):
         return self.round_number
@@ -94,37 +141,168 @@ class Tournament(contest.Contest):
     def get_round(self, round_number):
         return self.rounds[round_number]
 
-    def play_round(self, progress_bar, fast=False):
+    def play_round(self, progress=None, fast=False, pool=None):
+        """
+        Plays the next round. If a executor.Progress is given, the start and
+        the result of every game are published on it, and the round stops
+        raising executor.Cancelled if it is cancelled. If a workers.GamePool
+        is given, the games are played at the same time on it.
+        """
         if not self.tournament_completed:
             r = self.rounds[self.round_number]
             n = r.get_number_of_games()
             
-            for i in range(n):
-                if fast:
-                    progress_bar.pulse()
-                    while gtk.events_pending():
-                        gtk.main_iteration(False)
-                r.play_match(fast, True)
+            if pool == None:
+                for i in range(n):
+                    if not progress == None:
+                        progress.check_cancelled()
+                        progress.game_started(r.get_next_match())
+                    match, result = r.play_match(fast, True)
+                    if not progress == None:
+                        progress.game_finished(match, result)
+            else:
+                self._play_round_on_pool(r, pool, progress)
 
             winners = r.get_winners()
             self.round_winners.append(winners)
+            self.rating_engine.add_results(r.get_rating_results())
+            self.rating_engine.update()
             
-            f_log = open(self.tournament_file_name, 'a')
-            f_log.write('Ronda ' + str(self.round_number+1) + ":\n")
-            f_log.close()
-            r.log_tournament(True)
-            f_log = open(self.tournament_file_name, 'a')
-            f_log.write('-------------------------------' + "\n")
-            f_log.close()
+            r.log_games(self.journal, self.round_number)
+            self.journal.write_round(self.round_number, winners=winners,
+                                     makespan=r.makespan)
             
             self.round_number = self.round_number + 1
-            self.league_completed = (self.round_number == self.number_of_rounds)
+            self.tournament_completed = (self.round_number ==
+                                         self.number_of_rounds)
 
-            if not self.league_completed:
-                self.matchs.append(_auto_pairings(winners))
+            if not self.tournament_completed:
+                self.matchs.append(_bracket_pairings(winners))
+                round_seed = libguadalete.derive_seed(self.seed,
+                                                      self.round_number)
                 self.rounds.append(round.Round(self.matchs[self.round_number],
                                                self.translator,
-                                               self.tournament_file_name))
+                                               self.tournament_file_name,
+                                               self.num_turns, round_seed))
+
+    def _get_game_job(self, key):
+        """
+        Returns the job of a game of any round, with the same seed that it
+        has on its round.
+        """
+        round_number, id_game, team_a, team_b = key
+        round_seed = libguadalete.derive_seed(self.seed, round_number)
+        return workers.make_job(self.translator[team_a],
+                                self.translator[team_b],
+                                number_turns=self.num_turns, cant_draw=True,
+                                seed=libguadalete.derive_seed(round_seed,
+                                                              id_game))
+
+    def _get_speculative_games(self, r):
+        """
+        Returns the keys of the games of the next round that can be played
+        ahead of time. The games whose teams are both known go first, then
+        the candidates of the games with only one team known: it plays
+        against both teams of the game still running, and the result of the
+        wrong one is discarded.
+        """
+        next_round = self.round_number + 1
+        if next_round == self.number_of_rounds:
+            return []
+
+        winners = []
+        for id_game in range(r.get_number_of_games()):
+            match, played, result = r.round[id_game]
+            if not played:
+                winners.append(match)
+            elif result == 1:
+                winners.append(match[0])
+            else:
+                winners.append(match[1])
+
+        known = []
+        candidates = []
+        for i in range(0, len(winners) - 1, 2):
+            team_a, team_b = winners[i], winners[i+1]
+            a_known = not type(team_a) == types.TupleType
+            b_known = not type(team_b) == types.TupleType
+            if a_known and b_known:
+                known.append((next_round, i / 2, team_a, team_b))
+            elif a_known:
+                for team in team_b:
+                    candidates.append((next_round, i / 2, team_a, team))
+            elif b_known:
+                for team in team_a:
+                    candidates.append((next_round, i / 2, team, team_b))
+
+        games = []
+        for key in known + candidates:
+            if not key in self.pool_games and not 'aux_ghost_team' in key:
+                games.append(key)
+        return games
+
+    def _play_round_on_pool(self, r, pool, progress):
+        """
+        Plays the games of a round on a workers.GamePool. While some workers
+        are idle, the games of the next round that may happen are played
+        ahead of time, so the next round starts with some games finished.
+        """
+        games = []
+        for id_game in r.get_pending_games():
+            match = r.round[id_game][0]
+            key = (self.round_number, id_game) + match
+            if not progress == None:
+                progress.game_started(match)
+            if not round.ghost_result(match[0], match[1]) == None:
+                r.set_game_result(id_game,
+                                  round.ghost_result(match[0], match[1]))
+            elif not key in self.pool_games:
+                games.append((key, r.get_game_job(id_game, True)))
+                self.pool_games[key] = None
+            elif not self.pool_games[key] == None:
+                print 'Speculated game used: ' + match[0] + ' - ' + match[1]
+                r.set_game_result(id_game, self.pool_games[key][0],
+                                  self.pool_games[key][1])
+            else:
+                continue
+            if not progress == None and r.round[id_game][1]:
+                progress.game_finished(match, r.round[id_game][2])
+        r.next_game = r.number_games
+
+        start = time.time()
+        predicted = pool.submit_all(games)
+
+        while not r.is_complete():
+            for key in self._get_speculative_games(r):
+                if pool.get_idle_workers() == 0:
+                    break
+                pool.submit(key, self._get_game_job(key))
+                self.pool_games[key] = None
+
+            if not progress == None and progress.is_cancelled():
+                pool.terminate()
+                self.pool_games = {}
+                progress.check_cancelled()
+            finished = pool.get_result(0.5)
+            if not finished == None:
+                key, result, info = finished
+                self.pool_games[key] = (result, info)
+                round_number, id_game = key[0], key[1]
+                if round_number == self.round_number and \
+                        r.round[id_game][0] == key[2:] and \
+                        not r.round[id_game][1]:
+                    r.set_game_result(id_game, result, info)
+                    if not progress == None:
+                        progress.game_finished(key[2:], result)
+
+        pool.save_history()
+        round.report_makespan(predicted, time.time() - start, progress,
+                              [r])
+
+        for key in self.pool_games.keys():
+            if key[0] <= self.round_number and \
+                    not self.pool_games[key] == None:
+                del self.pool_games[key]
 
     def get_results_by_now(self):
         return self.round_winners
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides a pool of processes to simulate several games at the same time.
+
+The kernel uses a single global CLIPS environment and writes its temporal
+files on the working directory, so the games can't be run on threads: every
+worker is a process with its own private working directory.
+"""
+
+import multiprocessing
+import os
+import Queue
+import shutil
+import tempfile
+import time
+
+from guadaboard import guada_board
+from libguadalete import results_cache, timing
+
+import durations
+
+def _init_worker(pool_dir):
+    """
+    Moves the worker to a private directory inside the one of the pool, so
+    the temporal files of the kernel don't collide with the ones of the
+    other workers.
+    """
+    os.chdir(tempfile.mkdtemp(prefix='worker-', dir=pool_dir))
+    timing.set_exporting(False)
+
+def _is_cached(job):
+    """
+    Checks if the result of a game is already on the results cache, so it
+    won't be simulated
+    """
+    options = job['options']
+    if options.get('seed') == None:
+        return False
+    key = results_cache.get_cache_key(job['team_a'][0], job['team_b'][0],
+                                      options['seed'],
+                                      options.get('number_turns', 100))
+    return results_cache.get_cache().contains(key)
+
+def _run_game(job):
+    """
+    Runs a game on a worker. The errors are returned instead of raised, so
+    they can be reported on the main process. Along with the result, it
+    returns the time spent, the number of turns and if it was simulated.
+    """
+    options = dict(job['options'])
+    get_stats = options.get('get_stats', False)
+    options['get_stats'] = True
+    simulated = not _is_cached(job)
+    start = time.time()
+    try:
+        winner, stats = guada_board.run(job['team_a'], job['team_b'],
+                                        fast=True, hidden=True, **options)
+    except guada_board.GuadaFileError as exc:
+        return (None, exc.msg, None)
+    except Exception as exc:
+        return (None, str(exc), None)
+
+    turns = stats[0]['turns_winning'] + stats[0]['turns_losing']
+    if winner == 0 or turns == 0:
+        turns = options.get('number_turns', 100)
+    # the results cache is written by the main process
+    info = {'seconds': time.time() - start, 'turns': turns,
+            'simulated': simulated, 'stats': stats,
+            'timing': timing.get_last_game(),
+            'cache': results_cache.get_cache().take_pending()}
+
+    if get_stats:
+        return ((winner, stats), None, info)
+    return (winner, None, info)
+
+def make_job(team_a, team_b, **options):
+    """Makes the description of a game to be run on the pool.
+
+    Keywords arguments:
+    team_a -- Tuple with the rules and the formation of the first team.
+    team_b -- Tuple with the rules and the formation of the second team.
+    options -- Extra arguments given to guada_board.run, like number_turns,
+    cant_draw, seed or get_stats.
+    """
+    return {'team_a': (team_a,), 'team_b': (team_b,), 'options': options}
+
+class GamePool(object):
+    """
+    Class that runs games on several processes, returning their results in
+    the order they finish.
+    """
+    def __init__(self, processes=None, history=None):
+        """Init method for the class GamePool
+
+        Keywords arguments:
+        processes -- Number of workers, by default the number of processors.
+        history -- durations.DurationHistory where the duration of the games
+        simulated is added, and used to schedule them.
+        """
+        if processes == None:
+            processes = multiprocessing.cpu_count()
+        if history == None:
+            history = durations.DurationHistory()
+        self.processes = processes
+        self.history = history
+        self.jobs = {}
+        #The directories of the workers, removed when the pool is stopped
+        #as the workers may be killed
+        self.pool_dir = tempfile.mkdtemp(prefix='resistencia-pool-')
+        self.pool = multiprocessing.Pool(processes, _init_worker,
+                                         (self.pool_dir,))
+        self.results = Queue.Queue()
+        self.running = 0
+        self.closed = False
+
+    def submit(self, tag, job):
+        """
+        Sends a game to the pool. The tag is returned along with its result,
+        to identify the game.
+        """
+        self.running = self.running + 1
+        self.jobs[tag] = job
+        self.pool.apply_async(_run_game, (job,),
+                              callback=lambda game: self.results.put((tag,
+                                                                      game)))
+
+    def submit_all(self, games):
+        """
+        Sends a list of (tag, job) to the pool, the longest expected games
+        first. Returns the predicted time to play all of them.
+        """
+        games, expected = self.history.sort_longest_first(games)
+        for tag, job in games:
+            self.submit(tag, job)
+
+        return durations.predict_makespan(expected, self.processes)
+
+    def save_history(self):
+        """
+        Writes the duration of the games played to the history file, the
+        timing metrics and the results of the games to the results cache
+        """
+        self.history.save()
+        timing.write_metrics()
+        results_cache.get_cache().flush()
+
+    def get_running(self):
+        """
+        Returns the number of games sent whose result has not been got yet
+        """
+        return self.running
+
+    def get_idle_workers(self):
+        """
+        Returns the number of workers that are not playing any game
+        """
+        return max(self.processes - self.running, 0)
+
+    def get_result(self, timeout=None):
+        """
+        Waits for the next game to finish and returns a tuple (tag, result,
+        info), being info a dictionary with the 'seconds' spent, the 'turns'
+        and the 'stats' of the game.
+
+        Raises guada_board.GuadaFileError if the game could not be played, or
+        returns None if the timeout expires before any game finishes.
+        """
+        try:
+            tag, game = self.results.get(True, timeout)
+        except Queue.Empty:
+            return None
+        self.running = self.running - 1
+        job = self.jobs.pop(tag)
+        result, error, info = game
+        if not info == None:
+            timing.add_game(info['timing'])
+            results_cache.get_cache().add_pending(info['cache'])
+            if info['simulated']:
+                self.history.add_game(job['team_a'][0], job['team_b'][0],
+                                      info['seconds'], info['turns'])
+        if not error == None:
+            raise guada_board.GuadaFileError(error)
+
+        return (tag, result, info)
+
+    def terminate(self):
+        """
+        Stops the workers right now, discarding the games being played
+        """
+        if not self.closed:
+            self.pool.terminate()
+            self.pool.join()
+            shutil.rmtree(self.pool_dir, True)
+            self.closed = True
+
+    def close(self):
+        """
+        Waits for the games being played and stops the workers
+        """
+        if not self.closed:
+            self.pool.close()
+            self.pool.join()
+            shutil.rmtree(self.pool_dir, True)
+            self.closed = True
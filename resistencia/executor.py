@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Provides the classes needed to run the simulations out of the main thread,
+so the interface keeps responding while the games are played.
+
+The task running on background receives a Progress object, where it
+publishes its events ('game_started', 'game_finished', 'eta' and 'finished')
+and checks if it was cancelled. The subscribers are called through a
+dispatcher: gobject.idle_add runs them on the main loop of the interface.
+"""
+
+import sys
+import threading
+import time
+import traceback
+
+class Cancelled(Exception):
+    """Exception raised by a task when it has been cancelled"""
+    pass
+
+def _direct_dispatcher(callback, *args):
+    """
+    Dispatcher that calls the subscribers on the same thread
+    """
+    callback(*args)
+
+class Progress(object):
+    """
+    Class that publishes the progress of a task to its subscribers.
+    """
+    def __init__(self, num_games=0, dispatcher=_direct_dispatcher):
+        """Init method for the class Progress
+
+        Keywords arguments:
+        num_games -- Number of games that the task is going to play, used
+        to estimate the remaining time.
+        dispatcher -- Function that calls a subscriber with its arguments.
+        """
+        self.num_games = num_games
+        self.dispatcher = dispatcher
+        self.subscribers = {}
+        self.games_finished = 0
+        self.start_time = time.time()
+        self.cancelled = threading.Event()
+
+    def subscribe(self, event, callback):
+        """
+        Subscribes a function to an event
+        """
+        if not event in self.subscribers:
+            self.subscribers[event] = []
+        self.subscribers[event].append(callback)
+
+    def _call(self, callback, args):
+        callback(*args)
+        return False # so gobject does not call it again
+
+    def publish(self, event, *args):
+        """
+        Calls the subscribers of an event with the given arguments
+        """
+        for callback in self.subscribers.get(event, []):
+            self.dispatcher(self._call, callback, args)
+
+    def game_started(self, match):
+        """
+        Publishes that a game between a pair of teams keys has started
+        """
+        self.publish('game_started', match)
+
+    def game_finished(self, match, result):
+        """
+        Publishes the result of a game, and the estimated time to finish
+        the task
+        """
+        self.games_finished = self.games_finished + 1
+        self.publish('game_finished', match, result)
+        if self.num_games > 0:
+            elapsed = time.time() - self.start_time
+            remaining = self.num_games - self.games_finished
+            eta = elapsed / self.games_finished * max(remaining, 0)
+            self.publish('eta', self.games_finished, self.num_games, eta)
+
+    def cancel(self):
+        """
+        Asks the task to stop as soon as the actual game finishes
+        """
+        self.cancelled.set()
+
+    def is_cancelled(self):
+        """
+        Checks if the task has been cancelled
+        """
+        return self.cancelled.isSet()
+
+    def check_cancelled(self):
+        """
+        Raises Cancelled if the task has been cancelled
+        """
+        if self.is_cancelled():
+            raise Cancelled()
+
+class BackgroundExecutor(object):
+    """
+    Class that runs a task on a background thread. The task is a function
+    that receives the Progress object, and its returned value is stored on
+    the attribute result. When it ends, 'finished' is published.
+    """
+    def __init__(self, task, progress):
+        self.task = task
+        self.progress = progress
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.thread = threading.Thread(target=self._run)
+        self.thread.setDaemon(True)
+
+    def _run(self):
+        try:
+            self.result = self.task(self.progress)
+        except Cancelled:
+            self.cancelled = True
+        except Exception:
+            self.error = sys.exc_info()[1]
+            traceback.print_exc()
+        self.progress.publish('finished')
+
+    def start(self):
+        """
+        Starts the task
+        """
+        self.thread.start()
+
+    def is_alive(self):
+        """
+        Checks if the task is still running
+        """
+        return self.thread.isAlive()
@@ -24,6 +24,7 @@ This file provides some functions commonly used in all the application.
 
 from os import path
 import datetime
+import hashlib
 import types
 
 def extract_simple_name_es (team):
@@ -59,6 +60,28 @@ def extract_name_expert_system(team):
     
     return (team[0])[i_1+7:j_1] + (team[1])[i_2+7:j_2]
 
+def get_team_hash(team):
+    """Reciving a 2 elements tuple, returns a SHA-1 hex digest of the content
+    of the rules and formation files. It identifies a team even if its files
+    are renamed or copied, and changes whenever one of them is edited.
+
+    Keywords arguments:
+    team -- Tuple with the names of the rules and formation files.
+    """
+    if not (type(team) == types.TupleType) or not (len(team) == 2):
+        str_error = 'Variable must be a pair '
+        raise ValueError(str_error)
+
+    digest = hashlib.sha1()
+    for filename in team:
+        _file = open(filename, 'rb')
+        content = _file.read()
+        _file.close()
+        digest.update(str(len(content)) + "\n")
+        digest.update(content)
+
+    return digest.hexdigest()
+
 def extract_names_from_file (filename):
     """
     Given the name of a game's log, extract names of the players
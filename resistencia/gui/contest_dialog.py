@@ -130,6 +130,7 @@ class contestDialog:
         self.spin_turns.set_range(50,300)
         self.spin_turns.set_increments(2,10)
         self.spin_turns.set_value(self.num_turns)
+        self.entry_seed = builder.get_object('entry_seed')
         
         builder.connect_signals(self)
 
@@ -178,11 +179,14 @@ class contestDialog:
     def on_btn_start_clicked(self, widget, data=None):
         if self.all_teams:
             self.teams = selection.get_installed_teams()
+        # the same seed replays the same games, an empty one makes them random
+        seed = self.entry_seed.get_text().strip() or None
         self.contest_dialog.destroy()
         while gtk.events_pending():
             gtk.main_iteration(False)
         contest.init_contest(self.format_contest, self.teams,
-                             self.fast, self.back_round, self.num_turns)
+                             self.fast, self.back_round, self.num_turns,
+                             seed)
 
     # ---- Radio button
 
@@ -198,8 +202,11 @@ class contestDialog:
             self.format_contest = 'cup'
 
     def on_radio_groups_toggled(self, widget, data=None):
-        if self.radio_group.get_active():
-            self.format_contest = 'group'
+        if self.radio_groups.get_active():
+            self.check_backround.set_sensitive(True)
+            self.format_contest = 'groups'
+        else:
+            self.check_backround.set_sensitive(False)
             
     def on_radio_playoff_toggled(self, widget, data=None):
         if self.radio_playoff.get_active():
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+
+import gobject
+import gtk
+
+from guadaboard import guada_board, thumbnails
+from libguadalete import games_index
+from resistencia import configure, executor, xdg
+from resistencia.nls import gettext as _
+
+#Period of the check of the thumbnails drawn, in milliseconds
+_poll_period = 100
+#Number of games added to the list at once while the index is updated
+_chunk_size = 50
+
+class gamesBrowser:
+    """
+    Dialog that lists the records of the games path, with the teams, the
+    result, the number of turns and a thumbnail of the final board of every
+    game. The games index is updated on background, adding the games to the
+    list as they are read, and the thumbnails of the visible rows are drawn
+    on demand.
+    """
+    def add_column(self, title, column_id, width):
+        # all the columns have a fixed size, so the tree view can show many
+        # rows without measuring all of them
+        if column_id == self.cThumbnail:
+            renderer = gtk.CellRendererPixbuf()
+            renderer.set_fixed_size(-1,
+                                    thumbnails.__default_thumbnail_size__ + 4)
+            column = gtk.TreeViewColumn(title, renderer, pixbuf=column_id)
+        else:
+            column = gtk.TreeViewColumn(title, gtk.CellRendererText(),
+                                        text=column_id)
+        column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
+        column.set_fixed_width(width)
+        self.list_view_games.append_column(column)
+
+    def fill_games(self):
+        #Formed by record hash -> list of rows with that record
+        self.rows = {}
+        self.progress = executor.Progress(0, gobject.idle_add)
+        self.progress.subscribe('games_read', self.add_games)
+        self.indexer = executor.BackgroundExecutor(self.update_index,
+                                                   self.progress)
+        self.indexer.start()
+
+    def update_index(self, progress):
+        index = games_index.GamesIndex(
+            configure.load_configuration()['games_path'])
+        games = []
+        def add_game(record, entry):
+            progress.check_cancelled()
+            games.append((record, entry))
+            if len(games) == _chunk_size:
+                progress.publish('games_read', list(games))
+                del games[:]
+        index.update(add_game)
+        progress.publish('games_read', games)
+        index.save()
+
+    def add_games(self, games):
+        if self.closed:
+            return
+        for record, entry in games:
+            if entry['winner'] == 0:
+                result = _('Draw')
+            elif entry['winner'] == 1:
+                result = entry['team_a']
+            else:
+                result = entry['team_b']
+            self.rows.setdefault(entry['hash'], []).append(
+                len(self.list_store_games))
+            self.list_store_games.append((None, entry['team_a'],
+                                          entry['team_b'], result,
+                                          entry['turns'], record,
+                                          entry['hash']))
+        self.request_visible_thumbnails()
+
+    def request_visible_thumbnails(self, *args):
+        if self.closed:
+            return False
+        visible = self.list_view_games.get_visible_range()
+        if visible == None:
+            return False
+        if self.pool == None:
+            self.pool = thumbnails.ThumbnailPool()
+        for i in range(visible[0][0], visible[1][0] + 1):
+            row = self.list_store_games[i]
+            if row[self.cThumbnail] == None:
+                thumbnail = self.pool.request(row[self.cRecord],
+                                              row[self.cHash])
+                if not thumbnail == None:
+                    self.set_thumbnail(row[self.cHash], thumbnail)
+        if self.pool.pending and not self.polling:
+            self.polling = True
+            gobject.timeout_add(_poll_period, self.poll_thumbnails)
+        return False
+
+    def poll_thumbnails(self):
+        if self.pool == None:  # the dialog was closed
+            self.polling = False
+            return False
+        for record_hash, thumbnail in self.pool.get_finished():
+            self.set_thumbnail(record_hash, thumbnail)
+        self.polling = len(self.pool.pending) > 0
+        return self.polling
+
+    def set_thumbnail(self, record_hash, thumbnail):
+        pixbuf = gtk.gdk.pixbuf_new_from_file(thumbnail)
+        for i in self.rows[record_hash]:
+            self.list_store_games[i][self.cThumbnail] = pixbuf
+
+    def __init__(self, parent, open_other=None):
+        builder = gtk.Builder()
+        builder.add_from_file(xdg.get_data_path('glade/gamesBrowser.glade'))
+
+        self.open_other = open_other
+        self.pool = None
+        self.polling = False
+        self.closed = False
+
+        self.browser_dialog = builder.get_object('dlg_games_browser')
+        self.browser_dialog.set_transient_for(parent)
+        self.list_view_games = builder.get_object('treeview_games')
+        self.list_store_games = builder.get_object('list_games')
+
+        self.cThumbnail = 0
+        self.cTeamA = 1
+        self.cTeamB = 2
+        self.cResult = 3
+        self.cTurns = 4
+        self.cRecord = 5
+        self.cHash = 6
+
+        size = thumbnails.__default_thumbnail_size__
+        self.add_column('', self.cThumbnail, size + 8)
+        self.add_column(_('Team A'), self.cTeamA, 150)
+        self.add_column(_('Team B'), self.cTeamB, 150)
+        self.add_column(_('Winner'), self.cResult, 150)
+        self.add_column(_('Turns'), self.cTurns, 60)
+
+        self.fill_games()
+
+        scrolled = builder.get_object('scrolled_games')
+        scrolled.get_vadjustment().connect('value-changed',
+                                           self.request_visible_thumbnails)
+        self.list_view_games.connect('size-allocate',
+                                     self.request_visible_thumbnails)
+
+        builder.connect_signals(self)
+
+    def open_selected(self):
+        model, selected = self.list_view_games.get_selection().get_selected()
+        if not selected == None:
+            record = model.get_value(selected, self.cRecord)
+            guada_board.run_from_file(record)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.progress.cancel()
+        if not self.pool == None:
+            self.pool.terminate()
+            self.pool = None
+        self.browser_dialog.destroy()
+
+    def on_treeview_games_row_activated(self, widget, path, column):
+        self.open_selected()
+
+    def on_btn_browser_open_clicked(self, widget):
+        self.open_selected()
+
+    def on_btn_browser_other_clicked(self, widget):
+        self.close()
+        if not self.open_other == None:
+            self.open_other()
+
+    def on_btn_browser_close_clicked(self, widget):
+        self.close()
+
+    def on_dlg_games_browser_close(self, widget, data=None):
+        self.close()
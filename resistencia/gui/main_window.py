@@ -31,6 +31,7 @@ import quick_game_dialog
 import contest_dialog
 import tests_dialog
 import human_game_dialog
+import games_browser
 
 class Resistencia:
     """
@@ -68,12 +69,19 @@ class Resistencia:
         human_es_game = human_game_dialog.humanGameDialog(self.window)
         human_es_game.human_ia_dialog.run()
 
-    def on_btn_previous_games_clicked(self, widget):
+    def show_previous_games_chooser(self):
         self.previous_games_chooser.connect('response', lambda d, r: d.hide())
                                             #self.previous_games_file_chooser_handler)
         self.previous_games_chooser.set_transient_for(self.window)
         self.previous_games_chooser.show()
 
+    def on_btn_previous_games_clicked(self, widget):
+        browser = games_browser.gamesBrowser(self.window,
+                                             self.show_previous_games_chooser)
+        browser.browser_dialog.run()
+        # the dialog can also be closed by the window manager
+        browser.close()
+
     def on_btn_laboratory_clicked(self, widget):
         testing_dialog = tests_dialog.testDialog(self.window)
         testing_dialog.tests_dialog.run()
@@ -18,9 +18,11 @@
 # Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
 ###############################################################################
 
+import gobject
 import gtk
 
-from resistencia import xdg
+from resistencia import executor, xdg
+from resistencia.nls import gettext as _
 
 class ProgressBarDialog:
     def __init__(self, parent, str_content):
@@ -36,6 +38,8 @@ class ProgressBarDialog:
         lbl_content.set_text(str_content)
 
         self.progress_bar = builder.get_object('progress_bar')
+        self.progress_bar_dialog.add_button(gtk.STOCK_CANCEL,
+                                            gtk.RESPONSE_CANCEL)
 
     def set_num_elements(self, num_elements):
         self.progress_bar.set_pulse_step(1 / float(num_elements))
@@ -45,3 +49,45 @@ class ProgressBarDialog:
         pulse_step = self.progress_bar.get_pulse_step()
         frac = self.progress_bar.get_fraction() + pulse_step
         self.progress_bar.set_fraction(frac)
+
+    def show_eta(self, games_finished, num_games, eta):
+        eta = int(eta)
+        text = '%d/%d - %d:%02d' % (games_finished, num_games,
+                                    eta / 60, eta % 60)
+        self.progress_bar.set_text(text)
+
+    def run_task(self, task, num_elements):
+        """
+        Runs a task on background while the dialog is shown, updating the
+        progress bar with the events published by the task. If the user
+        cancels, the task stops when its actual game finishes.
+
+        Returns the executor of the task, with its result.
+        """
+        self.set_num_elements(num_elements)
+        progress = executor.Progress(num_elements, gobject.idle_add)
+        progress.subscribe('game_finished',
+                           lambda match, result: self.pulse())
+        progress.subscribe('eta', self.show_eta)
+        progress.subscribe('finished', lambda:
+                           self.progress_bar_dialog.response(gtk.RESPONSE_OK))
+
+        task_executor = executor.BackgroundExecutor(task, progress)
+        task_executor.start()
+        response = self.progress_bar_dialog.run()
+
+        if not response == gtk.RESPONSE_OK:
+            progress.cancel()
+            self.progress_bar.set_text(_('Cancelling'))
+            self.progress_bar_dialog.show()
+            while task_executor.is_alive():
+                while gtk.events_pending():
+                    gtk.main_iteration(False)
+                task_executor.thread.join(0.1)
+        self.progress_bar_dialog.hide()
+
+        if not task_executor.error == None:
+            raise task_executor.error
+
+        return task_executor
+
@@ -25,6 +25,7 @@ import gtk
 
 from guadaboard import guada_board
 from resistencia import configure, xdg, filenames
+from resistencia.contest import ratings
 from resistencia.nls import gettext as _
 
 import notify_result
@@ -171,6 +172,10 @@ class quickGameDialog:
                                      self.hidde_values, str(int(self.num_turns)))
         except guada_board.GuadaFileError as e:
             raise guada_board.GuadaFileError(e.msg)
+
+        ratings.record_results([((self.es_team_a, self.team_team_a),
+                                 (self.es_team_b, self.team_team_b),
+                                 winner)])
             
         if self.fast_game:
             teamA = (self.es_team_a, self.team_team_a)
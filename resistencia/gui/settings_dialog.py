@@ -36,6 +36,10 @@ class settingsDialog:
         self.file_chooser_games = builder.get_object("file_chs_prev_games")
         self.file_chooser_teams = builder.get_object("file_chs_se")
         self.check_active_music = builder.get_object("check_active_music")
+        self.spin_autoplay_speed = builder.get_object("spin_autoplay_speed")
+        self.spin_autoplay_speed.set_digits(1)
+        self.spin_autoplay_speed.set_range(0.5, 20)
+        self.spin_autoplay_speed.set_increments(0.5, 1)
 
         config_vars = configure.load_configuration()
 
@@ -51,6 +55,8 @@ class settingsDialog:
         if config_vars['music_active'] == '1':
             active = True
         self.check_active_music.set_active(active)
+        self.spin_autoplay_speed.set_value(
+            configure.get_autoplay_speed(config_vars))
         
         builder.connect_signals(self)
         
@@ -79,5 +85,9 @@ class settingsDialog:
             configure.set_se_path(current_teams_path)
         if current_active_music != config_vars['music_active']:
             configure.set_active_music(current_active_music)
+        current_autoplay_speed = self.spin_autoplay_speed.get_value()
+        if current_autoplay_speed != \
+                configure.get_autoplay_speed(config_vars):
+            configure.set_autoplay_speed(current_autoplay_speed)
             
         self.settings.hide()
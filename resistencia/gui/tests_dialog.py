@@ -27,6 +27,7 @@ import types
 
 from guadaboard import guada_board
 from resistencia import configure, xdg, filenames
+from resistencia.contest import workers
 from resistencia.tests import tests, selection
 from resistencia.nls import gettext as _
 from resistencia.gui import progress_bar_dialog as pbs
@@ -117,8 +118,10 @@ class testDialog:
         self.spin_turns.set_range(50,300)
         self.spin_turns.set_increments(2,10)
         self.spin_turns.set_value(self.num_turns)
+        self.entry_seed = builder.get_object('entry_seed')
 
         self.all_teams = False
+        self.adaptive = False
         self.frame_selection_teams = builder.get_object('frame_es_selection')
 
         self.start_button = builder.get_object('btn_apply')
@@ -199,6 +202,9 @@ class testDialog:
                 self.start_button.set_sensitive(False)
             
 
+    def on_check_adaptive_toggled(self, widget, data=None):
+        self.adaptive = widget.get_active()
+
     def on_list_es_view_cursor_changed(self, widget, data=None):
         self.treeiter = self.list_store.get_iter(widget.get_cursor()[0])        
 
@@ -253,17 +259,23 @@ class testDialog:
             if self.all_teams:
                 self.teams = selection.get_installed_teams()
 
-            self.progress_bar.set_num_elements(self.num_rounds * len(self.teams))
+            # the same seed replays the same games, an empty one makes them
+            # random
+            seed = self.entry_seed.get_text().strip() or None
             t = tests.TestSuite(main_team, _clean_dictionary(self.teams),
-                                self.num_rounds, self.num_turns)
-            self.progress_bar_dialog.show()
-            while gtk.events_pending():
-                gtk.main_iteration(False)
-            t.run_test_suite(self.progress_bar)
-            team = filenames.extract_name_expert_system(main_team)
-
-            test = tests_result.testResult(t.get_test_stats(), team)
-            self.progress_bar_dialog.hide()
-            test.test_result.run()
+                                self.num_rounds, self.num_turns, seed=seed,
+                                adaptive=self.adaptive)
+            pool = workers.GamePool()
+            try:
+                task = self.progress_bar.run_task(
+                    lambda progress: t.run_test_suite(progress, pool),
+                    self.num_rounds * len(self.teams))
+            finally:
+                pool.terminate()
+            if not task.cancelled:
+                team = filenames.extract_name_expert_system(main_team)
+
+                test = tests_result.testResult(t.get_test_stats(), team)
+                test.test_result.run()
             self.tests_dialog.destroy()
 
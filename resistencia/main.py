@@ -24,6 +24,7 @@ the environment
 
 import locale
 import gettext
+import gobject
 import gtk
 import gtk.glade
 APP = 'resistencia1812'
@@ -34,6 +35,10 @@ gettext.bindtextdomain(APP, DIR)
 gtk.glade.textdomain(APP)
 gtk.glade.bindtextdomain(APP, DIR)
 
+# the simulations run on background threads, publishing its progress
+# through gobject.idle_add
+gobject.threads_init()
+
 
 # set the locale to LANG, or the user's default
 locale.setlocale(locale.LC_ALL, '')
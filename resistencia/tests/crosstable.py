@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Contains the cross table benchmark: every team plays against every other
+team a number of games, half of them on each side, and the score of every
+pair is shown with its confidence interval as a CSV file or a HTML heatmap.
+
+The results of every pair are stored by the hashes of both teams, so when a
+team changes only the games of its row and column are played again.
+"""
+
+import cgi
+import csv
+import json
+import os
+import time
+
+from libguadalete import libguadalete
+from resistencia import configure, filenames
+from resistencia.contest import round as contest_round
+from resistencia.contest import workers
+
+import resistencia.tests.significance as significance
+
+class CrossTable(object):
+    """
+    Class that plays and stores the games of the cross table
+    """
+    def __init__(self, teams, games_per_cell=10, num_turns=150,
+                 store_file=None, seed=None):
+        """Init method for the class CrossTable
+
+        Keywords arguments:
+        teams -- List of teams, tuples with their rules and formation.
+        games_per_cell -- Number of games played between every pair.
+        num_turns -- Number of turns of every game.
+        store_file -- JSON file where the results of the pairs are kept. By
+        default, 'crosstable.json' on the games path.
+        seed -- Seed of the benchmark, to make the games reproducible.
+        """
+        if store_file == None:
+            base_path = configure.load_configuration()['games_path']
+            store_file = os.path.join(base_path, 'crosstable.json')
+        self.store_file = store_file
+        self.teams = sorted(teams)
+        self.games_per_cell = games_per_cell
+        self.num_turns = num_turns
+        self.seed = seed
+
+        self.names = []
+        self.hashes = []
+        for team in self.teams:
+            self.names.append(filenames.extract_name_expert_system(team))
+            self.hashes.append(filenames.get_team_hash(team))
+
+        #Formed by cell key -> {'results': [wins, draws, looses] of the first
+        #team, 'played': list of the indexes of the games already played}
+        self.cells = {}
+        self._load()
+
+    def _load(self):
+        """
+        Load the stored results, if exists
+        """
+        if os.path.exists(self.store_file):
+            f_store = open(self.store_file, 'r')
+            self.cells = json.load(f_store)
+            f_store.close()
+            for key, cell in self.cells.items():
+                if isinstance(cell, list):
+                    # old stores only kept the results, of the first games
+                    self.cells[key] = {'results': cell,
+                                       'played': range(sum(cell))}
+
+    def save(self):
+        """
+        Write the stored results, replacing the file at once
+        """
+        temp_file = self.store_file + '.tmp'
+        f_store = open(temp_file, 'w')
+        json.dump(self.cells, f_store)
+        f_store.close()
+        os.rename(temp_file, self.store_file)
+
+    def _get_cell_key(self, i, j):
+        """
+        Returns the key of the pair of teams i and j, and if the team i is
+        the first one on it. The key includes the number of turns and the
+        version of the kernel, as they change the results.
+        """
+        first = self.hashes[i] <= self.hashes[j]
+        if first:
+            pair = (self.hashes[i], self.hashes[j])
+        else:
+            pair = (self.hashes[j], self.hashes[i])
+        key = '%s-%s-%d-%s' % (pair[0], pair[1], self.num_turns,
+                               libguadalete.__engine_version__)
+        return (key, first)
+
+    def _get_pairs(self):
+        """
+        Returns the list of (i, j) of every pair of teams, with i < j
+        """
+        pairs = []
+        for i in range(len(self.teams)):
+            for j in range(i + 1, len(self.teams)):
+                pairs.append((i, j))
+        return pairs
+
+    def _get_cell_data(self, key):
+        """
+        Returns the stored data of a cell, adding it if it's new
+        """
+        return self.cells.setdefault(key, {'results': [0, 0, 0],
+                                           'played': []})
+
+    def get_missing_games(self):
+        """
+        Returns the list of (tag, job) of the games not stored yet. The
+        teams swap sides on every game of a pair. The games of a pair are
+        numbered, and only the numbers not played are returned, as the
+        results of a cancelled run arrive in any order.
+        """
+        games = []
+        for i, j in self._get_pairs():
+            key, first = self._get_cell_key(i, j)
+            if not first:
+                i, j = j, i
+            played = set()
+            if key in self.cells:
+                played = set(self.cells[key]['played'])
+            for k in range(self.games_per_cell):
+                if k in played:
+                    continue
+                seed = libguadalete.derive_seed(self.seed, key, k)
+                if k % 2 == 0:
+                    job = workers.make_job(self.teams[i], self.teams[j],
+                                           number_turns=self.num_turns,
+                                           dont_log=True, seed=seed)
+                else:
+                    job = workers.make_job(self.teams[j], self.teams[i],
+                                           number_turns=self.num_turns,
+                                           dont_log=True, seed=seed)
+                games.append(((key, k), job))
+        return games
+
+    def run(self, pool, progress=None):
+        """
+        Plays the games not stored yet on a workers.GamePool. The results
+        are stored even if it's cancelled, so it goes on from there.
+        """
+        games = self.get_missing_games()
+        if not progress == None:
+            progress.num_games = len(games)
+        predicted = pool.submit_all(games)
+        start = time.time()
+        try:
+            for n in range(len(games)):
+                finished = None
+                while finished == None:
+                    if not progress == None and progress.is_cancelled():
+                        pool.terminate()
+                        progress.check_cancelled()
+                    finished = pool.get_result(0.5)
+                (key, k), result, info = finished
+                #On the odd games the first team of the pair is the team B
+                if k % 2 == 1:
+                    result = -result
+                cell = self._get_cell_data(key)
+                cell['results'][1 - result] += 1
+                cell['played'].append(k)
+                if not progress == None:
+                    progress.game_finished(key, result)
+        finally:
+            self.save()
+        pool.save_history()
+        contest_round.report_makespan(predicted, time.time() - start,
+                                      progress)
+
+    def get_cell(self, i, j):
+        """
+        Returns the (wins, draws, looses) of the team i against the team j
+        """
+        key, first = self._get_cell_key(i, j)
+        wins, draws, looses = (0, 0, 0)
+        if key in self.cells:
+            wins, draws, looses = self.cells[key]['results']
+        if first:
+            return (wins, draws, looses)
+        return (looses, draws, wins)
+
+    def get_score(self, i, j, confidence=0.95):
+        """
+        Returns the score of the team i against the team j (a draw is half
+        a win), with the lower and upper bounds of its confidence interval.
+        Returns None if they have not played.
+        """
+        wins, draws, looses = self.get_cell(i, j)
+        games = wins + draws + looses
+        if games == 0:
+            return None
+        score = wins + draws / 2.0
+        lower, upper = significance.wilson_interval(
+            score, games, significance.z_value(confidence))
+        return (score / games, lower, upper)
+
+    def write_csv(self, filename, confidence=0.95):
+        """
+        Writes the cross table on a CSV file. Every cell has the score of
+        the team of the row and its confidence interval.
+        """
+        f_csv = open(filename, 'w')
+        writer = csv.writer(f_csv, delimiter=',')
+        writer.writerow([''] + self.names)
+        for i in range(len(self.teams)):
+            row = [self.names[i]]
+            for j in range(len(self.teams)):
+                score = None
+                if not i == j:
+                    score = self.get_score(i, j, confidence)
+                if score == None:
+                    row.append('')
+                else:
+                    row.append('%.3f [%.3f-%.3f]' % score)
+            writer.writerow(row)
+        f_csv.close()
+
+    def write_html(self, filename, confidence=0.95):
+        """
+        Writes the cross table as a HTML heatmap, from red (the team of the
+        row always loses) to green (it always wins).
+        """
+        lines = ['<html><head><meta charset="utf-8">',
+                 '<title>Cross table</title></head><body>',
+                 '<table border="1" cellspacing="0" cellpadding="4">',
+                 '<tr><th></th>']
+        for name in self.names:
+            lines.append('<th>%s</th>' % cgi.escape(name))
+        lines.append('</tr>')
+        for i in range(len(self.teams)):
+            lines.append('<tr><th>%s</th>' % cgi.escape(self.names[i]))
+            for j in range(len(self.teams)):
+                score = None
+                if not i == j:
+                    score = self.get_score(i, j, confidence)
+                if score == None:
+                    lines.append('<td></td>')
+                else:
+                    title = '%d / %d / %d' % self.get_cell(i, j)
+                    lines.append('<td style="background-color: '
+                                 'hsl(%d, 70%%, 60%%)" title="%s">'
+                                 '%.2f<br/><small>%.2f-%.2f</small></td>' %
+                                 ((int(score[0] * 120), title) + score))
+            lines.append('</tr>')
+        lines.append('</table></body></html>')
+
+        f_html = open(filename, 'w')
+        f_html.write("\n".join(lines) + "\n")
+        f_html.close()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+# This file is part of Resistencia en Cadiz: 1812.                            #
+#                                                                             #
+# This program is free software: you can redistribute it and/or modify        #
+# it under the terms of the GNU General Public License as published by        #
+# the Free Software Foundation, either version 3 of the License, or           #
+# any later version.                                                          #
+#                                                                             #
+# This program is distributed in the hope that it will be useful,             #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of              #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the               #
+# GNU General Public License for more details.                                #
+#                                                                             #
+# You should have received a copy of the GNU General Public License           #
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.       #
+#                                                                             #
+# Copyright (C) 2010, Pablo Recio Quijano, <pablo.recioquijano@alum.uca.es>   #
+###############################################################################
+"""
+Contains the statistic functions used to decide when the result of a series
+of games between two teams is already significant.
+"""
+
+import math
+
+def z_value(confidence):
+    """
+    Returns the value of the standard normal distribution that leaves the
+    given two-sided confidence between -z and z. It uses the rational
+    approximation of Abramowitz and Stegun (error below 0.00045). The
+    confidence must be between 0 and 1, both excluded.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError('The confidence must be between 0 and 1, both '
+                         'excluded: %r' % confidence)
+    p = (1.0 - confidence) / 2.0
+    t = math.sqrt(-2.0 * math.log(p))
+    return t - ((2.515517 + 0.802853 * t + 0.010328 * t * t) /
+                (1.0 + 1.432788 * t + 0.189269 * t * t +
+                 0.001308 * t * t * t))
+
+def wilson_interval(successes, trials, z=1.96):
+    """
+    Returns the (lower, upper) Wilson score interval for a proportion. The
+    successes may be fractional, so a draw can count as half a win.
+    """
+    if trials == 0:
+        return (0.0, 1.0)
+
+    p = float(successes) / trials
+    z2 = z * z
+    center = p + z2 / (2.0 * trials)
+    margin = z * math.sqrt(p * (1.0 - p) / trials +
+                           z2 / (4.0 * trials * trials))
+    denominator = 1.0 + z2 / trials
+
+    return ((center - margin) / denominator, (center + margin) / denominator)
+
+def decide(wins, draws, looses, confidence=0.95):
+    """Decides the result of a series of games, if it is significant.
+
+    Returns 'win' if the score of the team (a draw is half a win) is over
+    the half with the confidence given, 'loss' if it is under the half,
+    'draw' if more than half of the games are draws, and None if the series
+    is not decided yet.
+    """
+    games = wins + draws + looses
+    if games == 0:
+        return None
+
+    z = z_value(confidence)
+    lower, upper = wilson_interval(wins + draws / 2.0, games, z)
+    if lower > 0.5:
+        return 'win'
+    if upper < 0.5:
+        return 'loss'
+    if wilson_interval(draws, games, z)[0] > 0.5:
+        return 'draw'
+
+    return None
@@ -22,12 +22,13 @@ Contains the class that specializes the round class of the competition, to
 be used on the tests.
 """
 
-import csv
+import time
 
 from guadaboard import guada_board
 #from resistencia import xdg
 
 from resistencia.contest import round as contest_round
+from resistencia.contest import workers
 
 class TestRound(contest_round.Round):
     """
@@ -38,11 +39,13 @@ class TestRound(contest_round.Round):
     the real team
     """
     def __init__ (self, teams, num_turns = 150,
-                  log_file=None, player = 0):
+                  log_file=None, player = 0, seed=None, stats_writer=None):
         #player must be 0 or 1
+        #stats_writer is the csv writer where the stats of every game go
         contest_round.Round.__init__(self, teams[0], teams[1],
-                                     log_file, num_turns)
+                                     log_file, num_turns, seed)
         self.player_team = player
+        self.stats_writer = stats_writer
 
         self.round_stats = {}
         self.round_stats['wins'] = 0
@@ -81,13 +84,42 @@ class TestRound(contest_round.Round):
         team_a = (self.translator[teams_keys['a']],)
         team_b = (self.translator[teams_keys['b']],)
 
+        seed = self.get_game_seed(self.next_game)
+        start = time.time()
         result, stats = guada_board.run(team_a, team_b, fast=True,
                                         get_stats=True,
                                         number_turns=self.num_turns,
-                                        dont_log=True)
+                                        dont_log=True, seed=seed)
+        seconds = time.time() - start
+
+        self.add_game_result(self.next_game, result, stats, seconds)
+        self.next_game = self.next_game + 1
+
+        return (self.round[self.next_game-1][0],
+                self.round[self.next_game-1][2])
+
+    def get_game_job(self, id_game, cant_draw=None):
+        """
+        Returns the description of a game of the round to be played on a
+        workers.GamePool, that gives back its stats too
+        """
+        teams_keys = self.round[id_game][0]
+        return workers.make_job(self.translator[teams_keys[0]],
+                                self.translator[teams_keys[1]],
+                                number_turns=self.num_turns, get_stats=True,
+                                dont_log=True,
+                                seed=self.get_game_seed(id_game))
+
+    def add_game_result(self, id_game, result, stats, seconds):
+        """
+        Stores the result and the stats of a game, writing them on the stats
+        file. The games must be added in order, so the file is the same
+        whether they were played one by one or on a pool.
+        """
+        teams_keys = {}
+        teams_keys['a'] = self.round[id_game][0][0]
+        teams_keys['b'] = self.round[id_game][0][1]
 
-        stats_writer = csv.writer(open(self.log_file, 'a'), delimiter=',')#,
-                                  #quotechar='|', quoting=csv.QUOTE_MINIMAL)
         key_result = ''
         player_stats = stats[self.player_team]
         number_of_turns = 0
@@ -122,17 +154,12 @@ class TestRound(contest_round.Round):
                          player_stats['max_death']]
         print write_results
 
-        stats_writer.writerow(write_results)
-                             
-        self.round[self.next_game] = (self.round[self.next_game][0],
-                                      True, result)
+        if not self.stats_writer == None:
+            self.stats_writer.writerow(write_results)
 
-        self.next_game = self.next_game + 1
-        self.completed = (self.next_game == self.number_games)
+        info = {'seconds': seconds, 'turns': number_of_turns, 'stats': stats}
+        self.set_game_result(id_game, result, info)
 
         self._merge_stats(stats[self.player_team])
-
-        return (self.round[self.next_game-1][0],
-                self.round[self.next_game-1][2])
         
     
@@ -22,15 +22,17 @@ Contains the main function to the execution of tests suites
 """
 
 import csv
+import time
 
-import gtk
-
+from libguadalete import libguadalete
 from resistencia import configure, filenames
-from resistencia.contest import pairing
+from resistencia.contest import journal, pairing, ratings
+from resistencia.contest import round as contest_round
 
 from resistencia.nls import gettext as _
 
 import resistencia.tests.test_round as test_round
+import resistencia.tests.significance as significance
 
 def _generate_key_names(teams):
     """
@@ -48,7 +50,17 @@ class TestSuite:
     """
     Class that encapsulates the elements of a test suite
     """
-    def __init__(self, main_team, teams, rounds_number, num_turns):
+    def __init__(self, main_team, teams, rounds_number, num_turns, seed=None,
+                 adaptive=False, confidence=0.95):
+        """
+        If a seed is given, every round gets a seed derived from it, so the
+        whole test suite can be reproduced.
+
+        On adaptive mode, the games against an opponent stop as soon as the
+        win, loss or draw against it is significant with the given
+        confidence, so the remaining rounds are only played against the
+        opponents not decided yet.
+        """
         self.main_team = main_team
         self.teams = teams
         self.num_turns = num_turns
@@ -60,6 +72,12 @@ class TestSuite:
         self.key_main_team = []
 
         self.rounds_number = rounds_number
+        self.seed = seed
+        #The ratings are updated after every round and saved when the suite
+        #stops
+        self.rating_engine = ratings.RatingEngine()
+        self.adaptive = adaptive
+        self.confidence = confidence
 
         base_path = configure.load_configuration()['games_path'] + '/'
         self.filename = base_path + filenames.generate_filename('stats',
@@ -76,20 +94,18 @@ class TestSuite:
             self.translator[k] = self.translator_main_team[k]
 
         self.rounds = []
-        stats_writer = csv.writer(open(self.filename, 'w'), delimiter=',',
-                                  quotechar='|', quoting=csv.QUOTE_MINIMAL)
-        stats_writer.writerow([_('Opponent'), _('As team'),
-                               _('Result'), _("Number of turns"),
-                               _('Number of pieces'), _("Value of the pieces"),
-                               _('Turn when max value piece died')])
         for i in range(self.rounds_number):
             round_games = pairing.test_pairing(self.key_main_team[0],
                                                self.keys_teams, i%2)
+            round_seed = libguadalete.derive_seed(seed, i)
             self.rounds.append(test_round.TestRound((round_games,
                                                     self.translator),
                                                     num_turns = self.num_turns,
                                                     log_file=self.filename,
-                                                    player=i%2))
+                                                    player=i%2,
+                                                    seed=round_seed))
+        self.journal = journal.Journal(
+            journal.get_journal_filename(self.filename))
 
         self.total_stats = {}
         self.total_stats['wins'] = 0
@@ -101,6 +117,11 @@ class TestSuite:
         self.total_stats['val_pieces'] = 0
         self.total_stats['max_death'] = 0
 
+        #Formed by opponent key -> [wins, draws, looses, decision]
+        self.opponents_results = {}
+        for _team in self.keys_teams:
+            self.opponents_results[_team] = [0, 0, 0, None]
+
     
     def _merge_stats(self, round_stats):
         """
@@ -109,21 +130,178 @@ class TestSuite:
         for k in self.total_stats:
             self.total_stats[k] = self.total_stats[k] + round_stats[k]
 
-    def run_test_suite(self, progress_bar):
+    def _opponent_key(self, match):
+        """
+        Returns the key of the opponent of the main team on a match
+        """
+        if match[0] == self.key_main_team[0]:
+            return match[1]
+        else:
+            return match[0]
+
+    def _add_opponent_result(self, match, result):
+        """
+        Add the result of a game to the series against an opponent, deciding
+        it if it's already significant.
+        """
+        opponent_results = self.opponents_results[self._opponent_key(match)]
+        if match[0] == self.key_main_team[0]:
+            main_result = result
+        else:
+            main_result = -result
+
+        if main_result == 1:
+            opponent_results[0] = opponent_results[0] + 1
+        elif main_result == 0:
+            opponent_results[1] = opponent_results[1] + 1
+        else:
+            opponent_results[2] = opponent_results[2] + 1
+
+        if self.adaptive:
+            opponent_results[3] = significance.decide(opponent_results[0],
+                                                      opponent_results[1],
+                                                      opponent_results[2],
+                                                      self.confidence)
+
+    def _is_decided(self, match):
+        """
+        Checks if the series against the opponent of a match is decided
+        """
+        opponent_key = self._opponent_key(match)
+        return not self.opponents_results[opponent_key][3] == None
+
+    def run_test_suite(self, progress=None, pool=None):
         """
-        Executes a test suite
+        Executes a test suite. If a executor.Progress is given, the start and
+        the result of every game are published on it (a skipped game
+        finishes with None as result), and the suite stops raising
+        executor.Cancelled if it is cancelled. If a workers.GamePool is
+        given, the games are played at the same time on it.
         """
+        stats_file = open(self.filename, 'w')
+        try:
+            stats_writer = csv.writer(stats_file, delimiter=',',
+                                      quotechar='|', quoting=csv.QUOTE_MINIMAL)
+            stats_writer.writerow([_('Opponent'), _('As team'),
+                                   _('Result'), _("Number of turns"),
+                                   _('Number of pieces'),
+                                   _("Value of the pieces"),
+                                   _('Turn when max value piece died')])
+            for _round in self.rounds:
+                _round.stats_writer = stats_writer
+
+            if pool == None:
+                self._run_rounds(progress)
+            else:
+                self._run_rounds_on_pool(progress, pool)
+        finally:
+            for _round in self.rounds:
+                _round.stats_writer = None
+            stats_file.close()
+            self.journal.close()
+            self.rating_engine.save()
+
+    def _run_rounds(self, progress):
         for i in range(self.rounds_number):
             _round = self.rounds[i]
             _ng = _round.get_number_of_games()
 
             for j in range(_ng):
-                _round.play_match()
-                progress_bar.pulse()
-                while gtk.events_pending():
-                    gtk.main_iteration(False)
+                match = _round.get_next_match()
+                if not progress == None:
+                    progress.check_cancelled()
+                if self._is_decided(match):
+                    _round.skip_match()
+                    result = None
+                else:
+                    if not progress == None:
+                        progress.game_started(match)
+                    match, result = _round.play_match()
+                    self._add_opponent_result(match, result)
+                if not progress == None:
+                    progress.game_finished(match, result)
             
-            self._merge_stats(_round.get_round_stats())
+            self._finish_round(i)
+
+    def _finish_round(self, i):
+        """
+        Adds the stats and the results of a completed round to the suite
+        """
+        _round = self.rounds[i]
+        self._merge_stats(_round.get_round_stats())
+        self.rating_engine.add_results(_round.get_rating_results())
+        self.rating_engine.update()
+        _round.log_games(self.journal, i)
+        self.journal.write_round(i, stats=_round.get_round_stats(),
+                                 makespan=_round.makespan)
+
+    def _run_rounds_on_pool(self, progress, pool):
+        """
+        Plays the rounds on a pool. The results are added in the same order
+        as if they were played one by one, so the stats and the files are
+        the same. On adaptive mode the rounds are sent one by one, as the
+        games of a round depend on the decisions taken on the previous ones.
+        """
+        if self.adaptive:
+            batches = [[i] for i in range(self.rounds_number)]
+        else:
+            batches = [range(self.rounds_number)]
+
+        for batch in batches:
+            games = []
+            for i in batch:
+                _round = self.rounds[i]
+                for j in _round.get_pending_games():
+                    match = _round.round[j][0]
+                    if self._is_decided(match):
+                        _round.skip_match(j)
+                        if not progress == None:
+                            progress.game_finished(match, None)
+                    else:
+                        if not progress == None:
+                            progress.game_started(match)
+                        games.append(((i, j), _round.get_game_job(j)))
+                _round.next_game = _round.number_games
+
+            start = time.time()
+            predicted = pool.submit_all(games)
+            order = sorted([tag for tag, job in games])
+            finished = {}
+            next_index = 0
+            while next_index < len(order):
+                if not progress == None and progress.is_cancelled():
+                    pool.terminate()
+                    progress.check_cancelled()
+                game = pool.get_result(0.5)
+                if not game == None:
+                    (i, j), (result, stats), info = game
+                    finished[(i, j)] = (result, stats, info['seconds'])
+                    if not progress == None:
+                        progress.game_finished(self.rounds[i].round[j][0],
+                                               result)
+                while next_index < len(order) and \
+                        order[next_index] in finished:
+                    i, j = order[next_index]
+                    result, stats, seconds = finished.pop((i, j))
+                    self.rounds[i].add_game_result(j, result, stats, seconds)
+                    self._add_opponent_result(self.rounds[i].round[j][0],
+                                              result)
+                    next_index = next_index + 1
+
+            pool.save_history()
+            contest_round.report_makespan(predicted, time.time() - start,
+                                          progress,
+                                          [self.rounds[i] for i in batch])
+            for i in batch:
+                self._finish_round(i)
+
+    def get_opponents_results(self):
+        """
+        Returns a dictionary with the [wins, draws, looses, decision] of the
+        main team against every opponent. The decision is 'win', 'loss',
+        'draw' or None if the series was not decided early.
+        """
+        return self.opponents_results
 
     def get_test_stats(self):
         """
@@ -56,7 +56,154 @@ def main_execution():
     from resistencia import main
     main.main()
 
+def verify_records(records):
+    """
+    Simulates again the games of the given records, checking that the
+    actual kernel reproduces them exactly. Returns 0 if all of them are
+    reproduced, 1 otherwise.
+    """
+    from libguadalete import libguadalete
+    status = 0
+    for record in records:
+        try:
+            reproduced = libguadalete.verify_record(record)
+        except libguadalete.FileError as exc:
+            print '%s: %s' % (record, exc.msg)
+            reproduced = False
+        if reproduced:
+            print '%s: OK' % record
+        else:
+            print '%s: NOT REPRODUCED' % record
+            status = 1
+    return status
+
+def cross_table(games_per_cell, output_prefix):
+    """
+    Plays the cross table of the installed teams, reusing the results
+    stored of the pairs that have not changed, and writes it as a CSV file
+    and a HTML heatmap.
+    """
+    from resistencia.contest import workers
+    from resistencia.tests import crosstable, selection
+    table = crosstable.CrossTable(selection.get_installed_teams(),
+                                  games_per_cell)
+    pool = workers.GamePool()
+    try:
+        table.run(pool)
+    finally:
+        pool.terminate()
+    table.write_csv(output_prefix + '.csv')
+    table.write_html(output_prefix + '.html')
+    return 0
+
+def profile_teams(rules_a, formation_a, rules_b, formation_b, games):
+    """
+    Plays several games between two teams with the profiler of the rules,
+    and prints the report.
+    """
+    from libguadalete import profiler
+    profile = profiler.profile_games((rules_a, formation_a),
+                                     (rules_b, formation_b), games)
+    print profile.get_report()
+    return 0
+
+def export_records(image_format, output_dir, records):
+    """
+    Renders the records of several games, without a window, as PNG frames
+    or animated GIF files on the output directory.
+    """
+    from guadaboard import export
+    try:
+        outputs = export.export_games(records, output_dir, image_format)
+    except export.ExportError as exc:
+        print exc.msg
+        return 1
+    print '%d files written' % len(outputs)
+    return 0
+
+def show_ratings():
+    """
+    Prints the ranking of the teams by their ratings, with the 95%
+    confidence interval of every rating.
+    """
+    from resistencia.contest import ratings
+    engine = ratings.RatingEngine()
+    print '%-30s %8s %17s %6s' % ('Team', 'Rating', '95% interval', 'Games')
+    for name, rating, lower, upper, games in engine.get_ranking():
+        print '%-30s %8.1f [%7.1f, %7.1f] %6d' % (name, rating, lower, upper,
+                                                 games)
+    return 0
+
+def import_ratings(records):
+    """
+    Adds the results of the records of previous games to the ratings, as
+    a single rating period.
+    """
+    from resistencia.contest import ratings
+    engine = ratings.RatingEngine()
+    imported = engine.import_records(records)
+    engine.update()
+    engine.save()
+    print '%d games imported' % imported
+    return 0
+
+#Formed by command -> (function, converters of its fixed arguments, True if
+#it takes one or more files after them, usage of the arguments)
+__commands__ = {
+    '--verify-records': (verify_records, (), True, 'RECORD...'),
+    '--crosstable': (cross_table, (int, str), False,
+                     'GAMES_PER_CELL OUTPUT_PREFIX'),
+    '--profile': (profile_teams, (str, str, str, str, int), False,
+                  'RULES_A FORMATION_A RULES_B FORMATION_B GAMES'),
+    '--export': (export_records, (str, str), True,
+                 'png|gif OUTPUT_DIR RECORD...'),
+    '--ratings': (show_ratings, (), False, ''),
+    '--import-ratings': (import_ratings, (), True, 'RECORD...'),
+    }
+
+def get_user_arguments(argv):
+    """
+    Returns the arguments given by the user, without the name of the script
+    and the ones added by the installed launcher (--datadir and --startgui)
+    """
+    arguments = []
+    for argument in argv[1:]:
+        if not (argument.startswith('--datadir=') or
+                argument == '--startgui'):
+            arguments.append(argument)
+    return arguments
+
+def run_command(arguments):
+    """
+    Runs the command line tool given as the first argument. Returns its
+    exit status, or None if no tool was given and the interface has to be
+    started.
+    """
+    if len(arguments) == 0 or not arguments[0] in __commands__:
+        return None
+    command = arguments[0]
+    function, converters, takes_files, usage = __commands__[command]
+    params = arguments[1:]
+    num_fixed = len(converters)
+    try:
+        if len(params) < num_fixed or (takes_files and
+                                       len(params) == num_fixed) or \
+                (not takes_files and len(params) > num_fixed):
+            raise ValueError()
+        values = []
+        for i in range(num_fixed):
+            values.append(converters[i](params[i]))
+    except ValueError:
+        print 'Usage: resistencia1812 %s %s' % (command, usage)
+        return 2
+    if takes_files:
+        values.append(params[num_fixed:])
+    return function(*values)
+
 if __name__ == "__main__":
+    __status__ = run_command(get_user_arguments(sys.argv))
+    if not __status__ == None:
+        sys.exit(__status__)
     main_execution()
 
 # vim: et sts=4 sw=4